@@ -1,9 +1,11 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Depends, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import uvicorn
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import os
 from typing import Optional
 
 from api.database.connection import get_database
@@ -23,6 +25,20 @@ async def lifespan(app: FastAPI):
     # Create database tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+    # Pre-compile GPU kernels for configured stack shapes
+    warmup_shapes = os.environ.get("ZSTACK_WARMUP_SHAPES")
+    if warmup_shapes:
+        from cli.config import parse_shapes
+        from core.gpu.kernel_cache import warm_up_kernels
+
+        try:
+            shapes = parse_shapes(warmup_shapes)
+            loop = asyncio.get_running_loop()
+            stats = await loop.run_in_executor(None, warm_up_kernels, shapes)
+            logger.info(f"Kernel warm-up complete: {stats}")
+        except Exception as e:
+            logger.warning(f"Kernel warm-up failed: {e}")
     
     yield
     
@@ -62,6 +78,16 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "zstack-analyzer-api"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-kernel GPU metrics in the Prometheus text format."""
+    from core.gpu.metrics import get_metrics_registry
+
+    return PlainTextResponse(
+        get_metrics_registry().to_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
@@ -10,6 +10,7 @@ import time
 from api.database.connection import get_database, AsyncSessionLocal
 from api.models.image_stack import ImageStack
 from api.models.analysis_result import AnalysisResult
+from api.routes.images import register_derived_stack
 from core.processing.analyzer import ZStackAnalyzer
 from api.websocket.manager import connection_manager
 from api.websocket.events import (
@@ -140,6 +141,21 @@ async def run_analysis(
             db.add(db_result)
             await db.flush()  # Get the ID
 
+            # Register persisted outputs (e.g. deconvolved stacks) as new stacks
+            output_path = analysis_result.get("results", {}).get("output_path")
+            if output_path:
+                derived_stack = await register_derived_stack(
+                    db,
+                    image_stack,
+                    output_path,
+                    algorithm,
+                    analysis_result["results"].get("parameters_used"),
+                )
+                db_result.results = {
+                    **analysis_result["results"],
+                    "derived_stack_id": str(derived_stack.id),
+                }
+
             # Update image stack status
             image_stack.processing_status = "completed"
 
@@ -151,7 +167,7 @@ async def run_analysis(
             complete_event = ProcessingComplete(
                 image_id=image_id,
                 result_id=str(db_result.id),
-                summary=analysis_result.get("results", {}),
+                summary=db_result.results,
                 processing_time_seconds=processing_time,
                 confidence_score=analysis_result.get("confidence_score"),
                 session_id=session_id,
@@ -131,27 +131,7 @@ async def upload_image(
             thumbnail_path = None
 
         # Create database record
-        metadata_dict = metadata.to_dict()
-
-        image_stack = ImageStack(
-            filename=file.filename,
-            file_path=str(file_path),
-            file_size=file_path.stat().st_size,
-            width=metadata.size_x,
-            height=metadata.size_y,
-            depth=metadata.size_z,
-            channels=metadata.size_c,
-            bit_depth=metadata.bits_per_pixel,
-            pixel_size_x=metadata_dict['voxel_size_um']['x'],
-            pixel_size_y=metadata_dict['voxel_size_um']['y'],
-            pixel_size_z=metadata_dict['voxel_size_um']['z'],
-            microscope_id=metadata.microscope.manufacturer if metadata.microscope else None,
-            objective_info=metadata.objective.dict() if metadata.objective else None,
-            channel_config=[ch.dict() for ch in metadata.channels],
-            image_metadata=metadata_dict,
-            processing_status="uploaded",
-            acquisition_date=metadata.acquisition_date,
-        )
+        image_stack = _build_image_stack(file.filename, file_path, metadata)
 
         db.add(image_stack)
         await db.commit()
@@ -197,6 +177,88 @@ async def upload_image(
         )
 
 
+def _build_image_stack(
+    filename: str,
+    file_path: Path,
+    metadata: ImageMetadata,
+    processing_status: str = "uploaded"
+) -> ImageStack:
+    """Create an ImageStack record from extracted metadata."""
+    metadata_dict = metadata.to_dict()
+
+    return ImageStack(
+        filename=filename,
+        file_path=str(file_path),
+        file_size=file_path.stat().st_size,
+        width=metadata.size_x,
+        height=metadata.size_y,
+        depth=metadata.size_z,
+        channels=metadata.size_c,
+        bit_depth=metadata.bits_per_pixel,
+        pixel_size_x=metadata_dict['voxel_size_um']['x'],
+        pixel_size_y=metadata_dict['voxel_size_um']['y'],
+        pixel_size_z=metadata_dict['voxel_size_um']['z'],
+        microscope_id=metadata.microscope.manufacturer if metadata.microscope else None,
+        objective_info=metadata.objective.dict() if metadata.objective else None,
+        channel_config=[ch.dict() for ch in metadata.channels],
+        image_metadata=metadata_dict,
+        processing_status=processing_status,
+        acquisition_date=metadata.acquisition_date,
+    )
+
+
+async def register_derived_stack(
+    db: AsyncSession,
+    parent: ImageStack,
+    file_path: str,
+    algorithm: str,
+    parameters: Optional[dict] = None
+) -> ImageStack:
+    """
+    Register a processed stack (e.g. deconvolved) written next to its source.
+
+    The derived stack inherits the parent's acquisition metadata (objective,
+    channels, microscope, date); its dimensions, pixel type and voxel size
+    come from the written file. The lineage is stored in
+    ``image_metadata["derived_from"]``.
+
+    Args:
+        db: Database session (not committed here)
+        parent: Source image stack
+        file_path: Path of the written stack
+        algorithm: Algorithm that produced it
+        parameters: Parameters used
+
+    Returns:
+        The new ImageStack (flushed, so its id is set)
+    """
+    path = Path(file_path)
+    metadata: ImageMetadata = await image_loader.get_metadata(str(path))
+
+    derived = _build_image_stack(
+        f"{Path(parent.filename).stem}_{algorithm}{''.join(path.suffixes[-2:])}",
+        path,
+        metadata,
+        processing_status="completed",
+    )
+    derived.microscope_id = parent.microscope_id
+    derived.objective_info = parent.objective_info
+    derived.channel_config = parent.channel_config
+    derived.acquisition_date = parent.acquisition_date
+    derived.image_metadata = {
+        **(derived.image_metadata or {}),
+        "derived_from": {
+            "stack_id": str(parent.id),
+            "algorithm": algorithm,
+            "parameters": parameters or {},
+        },
+    }
+
+    db.add(derived)
+    await db.flush()
+    return derived
+
+
 @router.get("/", response_model=List[dict])
 async def list_images(
     skip: int = 0,
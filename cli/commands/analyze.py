@@ -371,6 +371,8 @@ def list_algorithms() -> None:
         "colocalization": "Multi-channel colocalization analysis",
         "intensity_analysis": "Intensity statistics and distribution",
         "deconvolution": "Richardson-Lucy deconvolution",
+        "background_subtraction": "Rolling-ball / morphological background subtraction",
+        "ml_segmentation": "3D U-Net segmentation (tiled inference, local weights)",
     }
 
     for algo in algorithms:
@@ -189,6 +189,210 @@ def quick_benchmark() -> None:
     console.print(table)
 
 
+@app.command("kernels")
+def kernel_benchmark(
+    shape: str = typer.Option(
+        "60,512,512",
+        "--shape",
+        "-s",
+        help="Volume shape as z,y,x",
+    ),
+    sigma: float = typer.Option(
+        2.0,
+        "--sigma",
+        help="Gaussian sigma used to build the 1D kernel",
+        min=0.1,
+    ),
+    iterations: int = typer.Option(
+        5,
+        "--iterations",
+        "-i",
+        help="Number of timed iterations per axis",
+        min=1,
+    ),
+) -> None:
+    """
+    Benchmark the separable convolution passes per axis
+
+    Example:
+        zstack benchmark kernels
+        zstack benchmark kernels --shape 100,1024,1024 --sigma 4
+    """
+
+    from core.gpu.kernels import _convolve_1d, _gaussian_kernel_1d, to_tensor
+
+    try:
+        volume_shape = tuple(int(s) for s in shape.split(","))
+    except ValueError:
+        volume_shape = ()
+    if len(volume_shape) != 3:
+        console.print(f"[bold red]Invalid shape:[/bold red] {shape} (expected z,y,x)")
+        raise typer.Exit(1)
+
+    console.print(f"[bold cyan]Benchmarking separable convolution on {volume_shape}...[/bold cyan]\n")
+
+    kernel = _gaussian_kernel_1d(sigma)
+    volume = to_tensor(np.random.rand(*volume_shape).astype(np.float32)).realize()
+    num_voxels = int(np.prod(volume_shape))
+
+    table = Table(title="Separable Convolution Throughput", box=box.ROUNDED)
+    table.add_column("Axis", style="cyan")
+    table.add_column("Taps", style="yellow", justify="right")
+    table.add_column("Mean Time", style="green", justify="right")
+    table.add_column("Throughput", style="magenta", justify="right")
+
+    for axis, name in enumerate(("Z", "Y", "X")):
+        # Warm-up run compiles the kernel so it is excluded from the timing
+        _convolve_1d(volume, kernel, axis).realize()
+
+        times = []
+        for _ in range(iterations):
+            start_time = time.perf_counter()
+            _convolve_1d(volume, kernel, axis).realize()
+            times.append(time.perf_counter() - start_time)
+
+        mean_time = float(np.mean(times))
+        table.add_row(
+            name,
+            str(len(kernel)),
+            f"{mean_time * 1000:.2f} ms",
+            f"{num_voxels / mean_time / 1e6:.1f} Mvox/s",
+        )
+
+    console.print(table)
+
+
+@app.command("fft")
+def fft_benchmark(
+    shape: str = typer.Option(
+        "64,256,256",
+        "--shape",
+        "-s",
+        help="Volume shape as z,y,x",
+    ),
+    workers: Optional[int] = typer.Option(
+        None,
+        "--workers",
+        "-w",
+        help="Threads per transform (default: all cores)",
+        min=1,
+    ),
+    iterations: int = typer.Option(
+        3,
+        "--iterations",
+        "-i",
+        help="Number of timed runs per transform",
+        min=1,
+    ),
+) -> None:
+    """
+    Compare the available FFT backends on a real 3D transform
+
+    Example:
+        zstack benchmark fft
+        zstack benchmark fft --shape 100,1024,1024 --workers 32
+    """
+
+    from core.gpu.fft_backend import benchmark_fft_backends
+
+    try:
+        volume_shape = tuple(int(s) for s in shape.split(","))
+    except ValueError:
+        volume_shape = ()
+    if len(volume_shape) != 3:
+        console.print(f"[bold red]Invalid shape:[/bold red] {shape} (expected z,y,x)")
+        raise typer.Exit(1)
+
+    console.print(f"[bold cyan]Benchmarking FFT backends on {volume_shape}...[/bold cyan]\n")
+
+    results = benchmark_fft_backends(volume_shape, repeats=iterations, workers=workers)
+    num_voxels = int(np.prod(volume_shape))
+
+    table = Table(title="FFT Backend Throughput", box=box.ROUNDED)
+    table.add_column("Backend", style="cyan")
+    table.add_column("Workers", style="yellow", justify="right")
+    table.add_column("rfftn", style="green", justify="right")
+    table.add_column("irfftn", style="green", justify="right")
+    table.add_column("Throughput", style="magenta", justify="right")
+
+    for name, result in results.items():
+        pair_time = result["rfftn"] + result["irfftn"]
+        table.add_row(
+            name,
+            str(result["workers"]),
+            f"{result['rfftn'] * 1000:.2f} ms",
+            f"{result['irfftn'] * 1000:.2f} ms",
+            f"{num_voxels / pair_time / 1e6:.1f} Mvox/s",
+        )
+
+    console.print(table)
+
+
+@app.command("precision")
+def precision_benchmark(
+    precision: str = typer.Option(
+        "float16",
+        "--precision",
+        "-p",
+        help="Reduced precision to check (float16, bfloat16)",
+    ),
+    shape: str = typer.Option(
+        "16,64,64",
+        "--shape",
+        "-s",
+        help="Synthetic volume shape as z,y,x",
+    ),
+) -> None:
+    """
+    Check reduced-precision outputs against float32
+
+    Example:
+        zstack benchmark precision
+        zstack benchmark precision --precision bfloat16 --shape 32,128,128
+    """
+
+    from core.gpu.precision import check_precision_accuracy
+
+    try:
+        volume_shape = tuple(int(s) for s in shape.split(","))
+    except ValueError:
+        volume_shape = ()
+    if len(volume_shape) != 3:
+        console.print(f"[bold red]Invalid shape:[/bold red] {shape} (expected z,y,x)")
+        raise typer.Exit(1)
+
+    console.print(f"[bold cyan]Comparing {precision} against float32 on {volume_shape}...[/bold cyan]\n")
+
+    try:
+        results = check_precision_accuracy(precision, volume_shape)
+    except ValueError as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(1)
+
+    if not results:
+        console.print(f"[yellow]{precision} is not supported on this device[/yellow]")
+        raise typer.Exit(1)
+
+    table = Table(title=f"{precision} Accuracy", box=box.ROUNDED)
+    table.add_column("Algorithm", style="cyan")
+    table.add_column("Error", style="yellow", justify="right")
+    table.add_column("Tolerance", justify="right")
+    table.add_column("Status")
+
+    for name, result in results.items():
+        table.add_row(
+            name,
+            f"{result['error']:.2e}",
+            f"{result['tolerance']:.1e}",
+            "[green]✓ pass[/green]" if result["passed"] else "[red]✗ fail[/red]",
+        )
+
+    console.print(table)
+
+    if not all(result["passed"] for result in results.values()):
+        raise typer.Exit(1)
+
+
 def _benchmark_algorithm(
     algorithm: str,
     data: np.ndarray,
@@ -2,10 +2,11 @@
 Serve command - Start the web server
 """
 
+import os
 import subprocess
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import typer
 from rich.console import Console
@@ -36,7 +37,7 @@ def start(
         4,
         "--workers",
         "-w",
-        help="Number of worker processes",
+        help="Number of worker processes (1 while GPU metrics are enabled)",
         min=1,
         max=32,
     ),
@@ -51,6 +52,11 @@ def start(
         "-l",
         help="Log level (debug, info, warning, error)",
     ),
+    warmup_shapes: Optional[str] = typer.Option(
+        None,
+        "--warmup-shapes",
+        help="Pre-compile GPU kernels for these z,y,x shapes at startup (e.g., '60,512,512;100,1024,1024')",
+    ),
 ) -> None:
     """
     Start the Z-Stack Analyzer web server
@@ -59,8 +65,32 @@ def start(
         zstack serve start
         zstack serve start --port 8080 --workers 8
         zstack serve start --reload  # Development mode
+        zstack serve start --warmup-shapes "60,512,512;100,1024,1024"
     """
 
+    from cli.config import get_config, parse_shapes
+
+    config = get_config().config
+    if warmup_shapes is None:
+        warmup_shapes = config.server.warmup_shapes
+
+    if warmup_shapes:
+        try:
+            parse_shapes(warmup_shapes)
+        except ValueError as e:
+            console.print(f"[bold red]Error:[/bold red] {str(e)}")
+            raise typer.Exit(1)
+
+    # GPU metrics live in a per-process registry; with several workers each
+    # /metrics scrape would land on a different process
+    metrics_enabled = os.environ.get("ZSTACK_METRICS", "1") != "0"
+    if metrics_enabled and workers > 1 and not reload:
+        console.print(
+            f"[yellow]GPU metrics are per process: running 1 worker instead of {workers} "
+            "(set ZSTACK_METRICS=0 to run several workers without /metrics)[/yellow]\n"
+        )
+        workers = 1
+
     console.print(Panel.fit(
         "[bold cyan]Starting Z-Stack Analyzer Web Server[/bold cyan]",
         box=box.ROUNDED,
@@ -72,6 +102,7 @@ def start(
     console.print(f"  Workers: {workers}")
     console.print(f"  Reload: {'enabled' if reload else 'disabled'}")
     console.print(f"  Log Level: {log_level}")
+    console.print(f"  Kernel Warm-up: {warmup_shapes or 'disabled'}")
     console.print()
 
     # Build uvicorn command
@@ -90,6 +121,15 @@ def start(
     else:
         cmd.extend(["--workers", str(workers)])
 
+    # Workers read the warm-up shapes during application startup
+    env = os.environ.copy()
+    if warmup_shapes:
+        env["ZSTACK_WARMUP_SHAPES"] = warmup_shapes
+    # FFT backend and threads for deconvolution and filtering
+    env.setdefault("ZSTACK_FFT_BACKEND", config.gpu.fft_backend)
+    if config.gpu.fft_workers:
+        env.setdefault("ZSTACK_FFT_WORKERS", str(config.gpu.fft_workers))
+
     console.print(f"[dim]Command: {' '.join(cmd)}[/dim]\n")
 
     # Display access URLs
@@ -102,7 +142,7 @@ def start(
 
     # Start server
     try:
-        subprocess.run(cmd, check=True)
+        subprocess.run(cmd, check=True, env=env)
     except KeyboardInterrupt:
         console.print("\n[yellow]Server stopped by user[/yellow]")
     except subprocess.CalledProcessError as e:
@@ -142,6 +182,89 @@ def status() -> None:
         console.print(f"[bold red]Error:[/bold red] {str(e)}")
 
 
+@app.command()
+def metrics(
+    port: int = typer.Option(
+        8000,
+        "--port",
+        "-p",
+        help="Port the server is running on",
+        min=1,
+        max=65535,
+    ),
+    raw: bool = typer.Option(
+        False,
+        "--raw",
+        help="Print the raw Prometheus text instead of a table",
+    ),
+) -> None:
+    """
+    Dump per-kernel GPU metrics from a running server
+
+    Example:
+        zstack serve metrics
+        zstack serve metrics --raw > metrics.prom
+    """
+
+    import re
+    import requests
+    from rich.table import Table
+
+    url = f"http://localhost:{port}/metrics"
+
+    try:
+        response = requests.get(url, timeout=5)
+        response.raise_for_status()
+    except requests.exceptions.ConnectionError:
+        console.print("[bold red]✗[/bold red] Server is not running")
+        console.print(f"  No server found at port {port}")
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(1)
+
+    if raw:
+        print(response.text, end="")
+        return
+
+    # Collect the per-kernel samples we display
+    rows: Dict[Tuple[str, str], Dict[str, float]] = {}
+    pattern = re.compile(r'^(zstack_kernel_\w+)\{kernel="([^"]*)",device="([^"]*)"\} (\S+)$')
+    for line in response.text.splitlines():
+        match = pattern.match(line)
+        if match:
+            name, kernel, device, value = match.groups()
+            rows.setdefault((kernel, device), {})[name] = float(value)
+
+    if not rows:
+        console.print("[yellow]No kernel metrics recorded yet[/yellow]")
+        return
+
+    table = Table(title="Kernel Metrics", box=box.ROUNDED)
+    table.add_column("Kernel", style="cyan")
+    table.add_column("Device")
+    table.add_column("Calls", justify="right")
+    table.add_column("Errors", justify="right")
+    table.add_column("Mean Time", justify="right", style="green")
+    table.add_column("Mvox/s", justify="right", style="yellow")
+    table.add_column("GB/s", justify="right", style="yellow")
+
+    for (kernel, device), values in sorted(rows.items()):
+        calls = values.get("zstack_kernel_calls_total", 0.0)
+        total = values.get("zstack_kernel_duration_seconds_sum", 0.0)
+        table.add_row(
+            kernel,
+            device,
+            f"{calls:.0f}",
+            f"{values.get('zstack_kernel_errors_total', 0.0):.0f}",
+            f"{total / calls * 1000:.2f}ms" if calls else "-",
+            f"{values.get('zstack_kernel_voxels_per_second', 0.0) / 1e6:.1f}",
+            f"{values.get('zstack_kernel_bytes_per_second', 0.0) / 1e9:.2f}",
+        )
+
+    console.print(table)
+
+
 @app.command()
 def dev() -> None:
     """
@@ -159,6 +282,7 @@ def dev() -> None:
         workers=1,
         reload=True,
         log_level="debug",
+        warmup_shapes=None,
     )
 
 
@@ -184,6 +308,7 @@ def prod() -> None:
         workers=workers,
         reload=False,
         log_level="info",
+        warmup_shapes=None,
     )
 
 
@@ -5,7 +5,7 @@ Supports YAML configuration files with user-level and project-level configs.
 """
 
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 import yaml
 from dataclasses import dataclass, field, asdict
 
@@ -29,6 +29,8 @@ class GPUConfig:
     device: Optional[str] = None  # e.g., "cuda:0", "metal"
     memory_limit_mb: Optional[int] = None
     fallback_to_cpu: bool = True
+    fft_backend: str = "auto"  # "auto", "scipy" or "pyfftw"
+    fft_workers: Optional[int] = None  # Threads per FFT (None = all cores)
 
 
 @dataclass
@@ -50,6 +52,7 @@ class ServerConfig:
     port: int = 8000
     workers: int = 4
     log_level: str = "info"
+    warmup_shapes: Optional[str] = None  # e.g., "60,512,512;100,1024,1024"
 
 
 @dataclass
@@ -175,6 +178,8 @@ gpu:
   device: null                        # GPU device (e.g., "cuda:0", "metal", null for auto)
   memory_limit_mb: null               # GPU memory limit in MB (null for no limit)
   fallback_to_cpu: true               # Fall back to CPU if GPU fails
+  fft_backend: auto                   # FFT backend (auto, scipy, pyfftw)
+  fft_workers: null                   # Threads per FFT (null for all cores)
 
 # Output settings
 output:
@@ -190,6 +195,7 @@ server:
   port: 8000                          # Server port
   workers: 4                          # Number of worker processes
   log_level: info                     # Log level (debug, info, warning, error)
+  warmup_shapes: null                 # Pre-compile kernels at startup (e.g., "60,512,512;100,1024,1024")
 """
 
         config_path.parent.mkdir(parents=True, exist_ok=True)
@@ -233,3 +239,27 @@ def reload_config() -> None:
     """Reload configuration from files"""
     global _config_manager
     _config_manager = ConfigManager()
+
+
+def parse_shapes(spec: str) -> Tuple[Tuple[int, int, int], ...]:
+    """
+    Parse a warm-up shape list such as "60,512,512;100,1024,1024".
+
+    Kept free of GPU imports so the CLI can validate ``--warmup-shapes``
+    without initializing a device.
+
+    Args:
+        spec: Semicolon-separated z,y,x shapes
+
+    Returns:
+        Tuple of (z, y, x) shapes
+    """
+    shapes = []
+    for item in spec.replace(" ", "").split(";"):
+        if not item:
+            continue
+        dims = tuple(int(d) for d in item.lower().replace("x", ",").split(","))
+        if len(dims) != 3:
+            raise ValueError(f"Invalid warm-up shape '{item}' (expected z,y,x)")
+        shapes.append(dims)
+    return tuple(shapes)
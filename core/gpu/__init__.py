@@ -9,16 +9,22 @@ Supports both CUDA and Metal backends.
 from .kernels import (
     gaussian_blur_3d,
     sobel_3d,
+    gradient_3d,
     otsu_threshold,
+    compute_histogram,
+    histogram_threshold,
+    THRESHOLD_METHODS,
     connected_components_3d,
     rolling_ball_background,
+    morphological_background,
+    get_gaussian_crossover_sigma,
 )
 from .segmentation import (
     watershed_segmentation_3d,
     blob_detection_3d,
     threshold_segmentation,
-    UNet3D,
 )
+from .unet import UNet3D, create_unet_model, load_unet_model
 from .analysis import (
     colocalization_analysis,
     intensity_statistics,
@@ -27,23 +33,55 @@ from .analysis import (
 )
 from .deconvolution import (
     richardson_lucy_deconvolution,
+    blind_richardson_lucy_deconvolution,
     wiener_deconvolution,
+    wiener_deconvolution_multichannel,
+    tiled_deconvolution,
     generate_psf,
+    estimate_psf_from_beads,
+    psf_sigma,
+)
+from .convolution import (
+    ConvolutionPlan,
+    convolve_3d,
+    select_convolution_method,
+    get_convolution_costs,
+)
+from .fft_backend import (
+    FFTBackend,
+    get_fft_backend,
+    set_fft_backend,
+    limit_fft_workers,
+    register_fft_backend,
+    available_fft_backends,
+    benchmark_fft_backends,
 )
 from .device_manager import DeviceManager
+from .device_volume import DeviceVolume, TransferStats, track_transfers
+from .kernel_cache import KernelCache, get_kernel_cache, warm_up_kernels
+from .metrics import MetricsRegistry, get_metrics_registry
+from .psf_library import PSFLibrary, get_psf_library, psf_parameters_from_metadata
 
 __all__ = [
     # Kernels
     "gaussian_blur_3d",
     "sobel_3d",
+    "gradient_3d",
     "otsu_threshold",
+    "compute_histogram",
+    "histogram_threshold",
+    "THRESHOLD_METHODS",
     "connected_components_3d",
     "rolling_ball_background",
+    "morphological_background",
+    "get_gaussian_crossover_sigma",
     # Segmentation
     "watershed_segmentation_3d",
     "blob_detection_3d",
     "threshold_segmentation",
     "UNet3D",
+    "create_unet_model",
+    "load_unet_model",
     # Analysis
     "colocalization_analysis",
     "intensity_statistics",
@@ -51,8 +89,40 @@ __all__ = [
     "z_profile_analysis",
     # Deconvolution
     "richardson_lucy_deconvolution",
+    "blind_richardson_lucy_deconvolution",
     "wiener_deconvolution",
+    "wiener_deconvolution_multichannel",
+    "tiled_deconvolution",
     "generate_psf",
+    "estimate_psf_from_beads",
+    "psf_sigma",
+    # Convolution
+    "ConvolutionPlan",
+    "convolve_3d",
+    "select_convolution_method",
+    "get_convolution_costs",
+    # FFT backends
+    "FFTBackend",
+    "get_fft_backend",
+    "set_fft_backend",
+    "limit_fft_workers",
+    "register_fft_backend",
+    "available_fft_backends",
+    "benchmark_fft_backends",
     # Device management
     "DeviceManager",
+    "DeviceVolume",
+    "TransferStats",
+    "track_transfers",
+    # Kernel cache
+    "KernelCache",
+    "get_kernel_cache",
+    "warm_up_kernels",
+    # Metrics
+    "MetricsRegistry",
+    "get_metrics_registry",
+    # PSF library
+    "PSFLibrary",
+    "get_psf_library",
+    "psf_parameters_from_metadata",
 ]
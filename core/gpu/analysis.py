@@ -17,6 +17,7 @@ from tinygrad.dtype import dtypes
 
 from .device_manager import DeviceManager
 from .kernels import to_tensor, to_numpy, benchmark
+from .kernel_cache import get_kernel_cache
 
 logger = logging.getLogger(__name__)
 _device_manager = DeviceManager()
@@ -57,79 +58,50 @@ def colocalization_analysis(
     if channel1.shape != channel2.shape:
         raise ValueError("Channels must have the same shape")
 
-    # Convert to tensors
-    ch1_tensor = to_tensor(channel1)
-    ch2_tensor = to_tensor(channel2)
-
-    # Apply mask if provided
+    # Convert to tensors; the mask (if any) is an extra kernel input
+    inputs = [to_tensor(channel1), to_tensor(channel2)]
     if mask is not None:
-        mask_tensor = to_tensor(mask.astype(np.float32))
-        ch1_tensor = ch1_tensor * mask_tensor
-        ch2_tensor = ch2_tensor * mask_tensor
-        n_pixels = mask_tensor.sum()
-    else:
-        n_pixels = Tensor([np.prod(channel1.shape)], dtype=dtypes.float32)
+        inputs.append(to_tensor(mask.astype(np.float32)))
 
     if progress_callback:
         progress_callback(0.2)
 
-    # Compute Pearson correlation coefficient
-    mean1 = ch1_tensor.sum() / n_pixels
-    mean2 = ch2_tensor.sum() / n_pixels
-
-    diff1 = ch1_tensor - mean1
-    diff2 = ch2_tensor - mean2
-
-    numerator = (diff1 * diff2).sum()
-    denominator = ((diff1 ** 2).sum() * (diff2 ** 2).sum()).sqrt()
-
-    pearson_r = numerator / (denominator + 1e-10)
+    # Compute Pearson correlation coefficient (JIT-cached per shape)
+    pearson_r = get_kernel_cache().run("pearson", _pearson_graph, inputs)
 
     if progress_callback:
         progress_callback(0.5)
 
     # Determine thresholds using Costes' method if not provided
     if threshold_ch1 is None or threshold_ch2 is None:
-        threshold_ch1, threshold_ch2 = _costes_threshold(
-            to_numpy(ch1_tensor),
-            to_numpy(ch2_tensor),
-            mask=mask
-        )
+        masked1 = np.asarray(channel1, dtype=np.float32)
+        masked2 = np.asarray(channel2, dtype=np.float32)
+        if mask is not None:
+            masked1 = masked1 * mask
+            masked2 = masked2 * mask
+        threshold_ch1, threshold_ch2 = _costes_threshold(masked1, masked2, mask=mask)
         logger.info(f"Costes' thresholds: ch1={threshold_ch1:.4f}, ch2={threshold_ch2:.4f}")
 
-    # Create threshold masks
-    ch1_above = (ch1_tensor >= threshold_ch1).cast(dtypes.float32)
-    ch2_above = (ch2_tensor >= threshold_ch2).cast(dtypes.float32)
-
     if progress_callback:
         progress_callback(0.7)
 
-    # Compute Manders' coefficients
-    # M1: fraction of ch1 above threshold that colocalizes with ch2 above threshold
-    ch1_above_total = (ch1_tensor * ch1_above).sum()
-    ch1_coloc = (ch1_tensor * ch1_above * ch2_above).sum()
-    manders_m1 = ch1_coloc / (ch1_above_total + 1e-10)
-
-    # M2: fraction of ch2 above threshold that colocalizes with ch1 above threshold
-    ch2_above_total = (ch2_tensor * ch2_above).sum()
-    ch2_coloc = (ch2_tensor * ch1_above * ch2_above).sum()
-    manders_m2 = ch2_coloc / (ch2_above_total + 1e-10)
-
-    if progress_callback:
-        progress_callback(0.85)
-
-    # Overlap coefficient (simplified)
-    overlap = (ch1_above * ch2_above).sum() / (ch1_above.sum() + ch2_above.sum() - (ch1_above * ch2_above).sum() + 1e-10)
+    # Thresholds are passed as tensors so the cached kernel is reused
+    thresholds = [
+        Tensor([float(threshold_ch1)], dtype=dtypes.float32, device=inputs[0].device),
+        Tensor([float(threshold_ch2)], dtype=dtypes.float32, device=inputs[0].device),
+    ]
+    manders_m1, manders_m2, overlap = get_kernel_cache().run(
+        "manders", _manders_graph, thresholds + inputs
+    )
 
     if progress_callback:
         progress_callback(1.0)
 
-    # Realize all tensors and convert to numpy
     results = {
-        "pearson_r": float(to_numpy(pearson_r)[0] if pearson_r.shape == (1,) else to_numpy(pearson_r)),
-        "manders_m1": float(to_numpy(manders_m1)[0] if manders_m1.shape == (1,) else to_numpy(manders_m1)),
-        "manders_m2": float(to_numpy(manders_m2)[0] if manders_m2.shape == (1,) else to_numpy(manders_m2)),
-        "overlap_coefficient": float(to_numpy(overlap)[0] if overlap.shape == (1,) else to_numpy(overlap)),
+        "pearson_r": float(pearson_r),
+        "manders_m1": float(manders_m1),
+        "manders_m2": float(manders_m2),
+        "overlap_coefficient": float(overlap),
         "threshold_ch1": float(threshold_ch1),
         "threshold_ch2": float(threshold_ch2),
     }
@@ -139,6 +111,63 @@ def colocalization_analysis(
     return results
 
 
+def _pearson_graph(ch1: Tensor, ch2: Tensor, mask: Optional[Tensor] = None) -> Tensor:
+    """Pearson correlation graph (optionally restricted to a mask)."""
+    # Accumulate in float32 regardless of the storage precision
+    ch1 = ch1.cast(_device_manager.get_accumulator_dtype())
+    ch2 = ch2.cast(_device_manager.get_accumulator_dtype())
+    if mask is not None:
+        mask = mask.cast(_device_manager.get_accumulator_dtype())
+        ch1 = ch1 * mask
+        ch2 = ch2 * mask
+        n_pixels = mask.sum()
+    else:
+        n_pixels = float(np.prod(ch1.shape))
+
+    mean1 = ch1.sum() / n_pixels
+    mean2 = ch2.sum() / n_pixels
+
+    diff1 = ch1 - mean1
+    diff2 = ch2 - mean2
+
+    numerator = (diff1 * diff2).sum()
+    denominator = ((diff1 ** 2).sum() * (diff2 ** 2).sum()).sqrt()
+
+    return numerator / (denominator + 1e-10)
+
+
+def _manders_graph(
+    threshold_ch1: Tensor,
+    threshold_ch2: Tensor,
+    ch1: Tensor,
+    ch2: Tensor,
+    mask: Optional[Tensor] = None
+) -> Tuple[Tensor, Tensor, Tensor]:
+    """Manders' M1/M2 and overlap coefficient graph for given thresholds."""
+    ch1 = ch1.cast(_device_manager.get_accumulator_dtype())
+    ch2 = ch2.cast(_device_manager.get_accumulator_dtype())
+    if mask is not None:
+        mask = mask.cast(_device_manager.get_accumulator_dtype())
+        ch1 = ch1 * mask
+        ch2 = ch2 * mask
+
+    # Create threshold masks
+    ch1_above = (ch1 >= threshold_ch1).cast(dtypes.float32)
+    ch2_above = (ch2 >= threshold_ch2).cast(dtypes.float32)
+    both_above = ch1_above * ch2_above
+
+    # M1: fraction of ch1 above threshold that colocalizes with ch2 above threshold
+    manders_m1 = (ch1 * both_above).sum() / ((ch1 * ch1_above).sum() + 1e-10)
+
+    # M2: fraction of ch2 above threshold that colocalizes with ch1 above threshold
+    manders_m2 = (ch2 * both_above).sum() / ((ch2 * ch2_above).sum() + 1e-10)
+
+    # Overlap coefficient (simplified)
+    overlap = both_above.sum() / (ch1_above.sum() + ch2_above.sum() - both_above.sum() + 1e-10)
+
+    return manders_m1, manders_m2, overlap
+
+
 def _costes_threshold(
     channel1: np.ndarray,
     channel2: np.ndarray,
@@ -195,7 +224,8 @@ def intensity_statistics(
     if progress_callback:
         progress_callback(0.0)
 
-    vol_tensor = to_tensor(volume)
+    # Reductions accumulate in float32 regardless of the storage precision
+    vol_tensor = to_tensor(volume).cast(_device_manager.get_accumulator_dtype())
 
     if labels is None:
         # Global statistics
@@ -214,7 +244,7 @@ def intensity_statistics(
     # Per-object statistics
     from scipy import ndimage
 
-    num_objects = labels.max()
+    num_objects = int(labels.max())
     logger.info(f"Computing statistics for {num_objects} objects")
 
     object_stats = []
@@ -274,7 +304,7 @@ def object_measurements(
     from scipy import ndimage
     from skimage import measure
 
-    num_objects = labels.max()
+    num_objects = int(labels.max())
     logger.info(f"Computing measurements for {num_objects} objects")
 
     measurements = []
@@ -421,7 +451,7 @@ def z_profile_analysis(
 
     # Per-object Z-profiles if labels provided
     if labels is not None:
-        num_objects = labels.max()
+        num_objects = int(labels.max())
         object_profiles = []
 
         for obj_id in range(1, num_objects + 1):
@@ -0,0 +1,603 @@
+"""
+Convolution dispatcher: direct, separable or FFT.
+
+Deconvolution and filtering convolve volumes with kernels ranging from a
+3x3x3 stencil to a 31^3 theoretical PSF, and no single method is fastest
+over that range:
+- "direct": the full kernel as one convolution on the tinygrad device.
+  No padding to a transform size; fastest for small kernels such as a
+  7x7x7 PSF measured from beads.
+- "separable": three 1D passes on the tinygrad device, for rank-1 kernels
+  (Gaussian PSFs). O(n * (kz + ky + kx)).
+- "fft": real FFT with a precomputed OTF at a fast transform size.
+  O(M log M), independent of the kernel size.
+
+``select_convolution_method`` estimates each method's run time from costs
+measured once per device (a per-voxel overhead plus seconds per voxel-tap
+for the spatial methods, seconds per M log2 M for a transform) and picks the
+cheapest. The
+measured costs are cached in memory and on disk, so calibration runs once
+per machine (see get_convolution_costs).
+
+All methods use "same"-mode centering (the kernel center is index
+(k - 1) // 2, as in scipy.signal.fftconvolve) with zero or edge
+(replicate) boundaries.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from tinygrad.tensor import Tensor
+from scipy.fft import next_fast_len
+
+from .device_manager import DeviceManager
+from .device_volume import DeviceVolume, as_numpy
+from .fft_backend import get_fft_backend
+from .kernel_cache import get_kernel_cache
+from .kernels import _convolve_1d, _pad_edge, benchmark, to_tensor
+
+logger = logging.getLogger(__name__)
+_device_manager = DeviceManager()
+
+CONVOLUTION_METHODS = ("direct", "separable", "fft")
+CONVOLUTION_BOUNDARIES = ("zero", "edge")
+
+# Max deviation from the rank-1 reconstruction (relative to the kernel peak)
+# for a kernel to be treated as separable
+_SEPARABLE_RTOL = 1e-5
+
+
+def separable_factors(
+    kernel: np.ndarray,
+    rtol: float = _SEPARABLE_RTOL
+) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Factor a 3D kernel into 1D kernels (kz, ky, kx) if it is rank 1.
+
+    For a rank-1 kernel a (x) b (x) c the axis marginals are a, b and c up
+    to scale, so the test is a single outer-product reconstruction.
+
+    Args:
+        kernel: 3D kernel
+        rtol: Allowed deviation relative to the kernel peak
+
+    Returns:
+        Tuple of float32 1D factors, or None if the kernel is not separable
+    """
+    kernel = np.asarray(kernel, dtype=np.float64)
+    if kernel.ndim != 3:
+        return None
+
+    total = kernel.sum()
+    peak = np.abs(kernel).max()
+    if total == 0 or peak == 0:
+        return None
+
+    marginals = [kernel.sum(axis=tuple(a for a in range(3) if a != axis)) for axis in range(3)]
+    factors = (marginals[0] / total, marginals[1] / total, marginals[2])
+
+    if np.abs(np.einsum("i,j,k->ijk", *factors) - kernel).max() > rtol * peak:
+        return None
+
+    return tuple(f.astype(np.float32) for f in factors)
+
+
+def _odd_kernel(kernel: np.ndarray) -> np.ndarray:
+    """
+    Pad even kernel axes to odd length without moving the "same" center.
+
+    The center of an even axis is (k - 1) // 2, so one zero is prepended.
+    """
+    pad = [(1, 0) if k % 2 == 0 else (0, 0) for k in kernel.shape]
+    if not any(before for before, _ in pad):
+        return kernel
+    return np.pad(kernel, pad)
+
+
+def fft_shape_for(volume_shape: Sequence[int], kernel_shape: Sequence[int]) -> Tuple[int, ...]:
+    """
+    Transform shape for linear (non-wrapping) FFT convolution.
+
+    Args:
+        volume_shape: Volume shape
+        kernel_shape: Kernel shape
+
+    Returns:
+        volume + kernel - 1 per axis, rounded up to fast real-FFT lengths
+    """
+    return tuple(next_fast_len(n + k - 1, real=True) for n, k in zip(volume_shape, kernel_shape))
+
+
+def _psf_to_otf(psf: np.ndarray, fft_shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    Real-FFT a PSF centered at the origin of a fft_shape buffer.
+
+    The PSF's "same"-mode center ((k - 1) // 2) is placed at index 0 and
+    negative offsets wrap to the end of the buffer. PSFs larger than the
+    buffer wrap around (circular convolution).
+
+    Args:
+        psf: Point spread function
+        fft_shape: Transform shape
+
+    Returns:
+        complex64 half-spectrum
+    """
+    padded = np.zeros(fft_shape, dtype=np.float32)
+    index = [(np.arange(k) - (k - 1) // 2) % n for k, n in zip(psf.shape, fft_shape)]
+    if any(k > n for k, n in zip(psf.shape, fft_shape)):
+        np.add.at(padded, np.ix_(*index), psf)
+    else:
+        padded[np.ix_(*index)] = psf
+    return get_fft_backend().rfftn(padded, overwrite_x=True)
+
+
+def _separable_otf(factors: Sequence[np.ndarray], fft_shape: Tuple[int, ...]) -> np.ndarray:
+    """
+    OTF of a separable kernel as the outer product of its 1D transforms.
+
+    Equal to ``_psf_to_otf`` of the full kernel, without building the
+    kernel or its 3D transform.
+
+    Args:
+        factors: 1D kernels (kz, ky, kx)
+        fft_shape: Transform shape
+
+    Returns:
+        complex64 half-spectrum
+    """
+    backend = get_fft_backend()
+    spectra = []
+    for axis, (factor, n) in enumerate(zip(factors, fft_shape)):
+        line = np.zeros(n, dtype=np.float32)
+        np.add.at(line, (np.arange(len(factor)) - (len(factor) - 1) // 2) % n, factor)
+        spectrum = backend.rfft(line) if axis == len(fft_shape) - 1 else backend.fft(line)
+        shape = [1] * len(fft_shape)
+        shape[axis] = -1
+        spectra.append(spectrum.astype(np.complex64).reshape(shape))
+
+    otf = spectra[0] * spectra[1]
+    return otf * spectra[2]
+
+
+def _apply_otf(
+    volume: np.ndarray,
+    otf: np.ndarray,
+    fft_shape: Tuple[int, ...],
+    crop: Tuple[slice, ...],
+    conjugate: bool = False
+) -> np.ndarray:
+    """
+    Convolve a volume with a precomputed OTF ("same" mode, zero boundary).
+
+    Args:
+        volume: Input volume
+        otf: OTF from _psf_to_otf
+        fft_shape: Transform shape the OTF was computed for
+        crop: Output region (leading volume-shaped block)
+        conjugate: Multiply by conj(otf) instead (correlation / flipped PSF)
+
+    Returns:
+        Convolved volume (float32 view into the inverse-FFT buffer)
+    """
+    backend = get_fft_backend()
+    spectrum = backend.rfftn(volume, s=fft_shape)
+
+    if conjugate:
+        # spectrum * conj(otf) == conj(conj(spectrum) * otf), all in place
+        np.conjugate(spectrum, out=spectrum)
+        spectrum *= otf
+        np.conjugate(spectrum, out=spectrum)
+    else:
+        spectrum *= otf
+
+    return backend.irfftn(spectrum, s=fft_shape, overwrite_x=True)[crop]
+
+
+class ConvolutionPlan:
+    """
+    Convolution of same-shaped volumes with one kernel by a fixed method.
+
+    Everything that depends only on the kernel and the volume shape is
+    prepared once: the OTF for "fft", the 1D factors for "separable" and the
+    device weights for "direct". ``correlate`` applies the flipped kernel
+    (the adjoint, as used by Richardson-Lucy's back-projection) with the
+    same preparation.
+    """
+
+    def __init__(
+        self,
+        kernel: np.ndarray,
+        volume_shape: Tuple[int, int, int],
+        method: str = "auto",
+        boundary: str = "zero"
+    ):
+        """
+        Initialize convolution plan.
+
+        Args:
+            kernel: 3D kernel
+            volume_shape: Shape of the volumes to convolve (z, y, x)
+            method: "auto", "direct", "separable" or "fft"
+            boundary: "zero" or "edge" (replicate borders)
+        """
+        kernel = np.asarray(kernel, dtype=np.float32)
+        if kernel.ndim != 3 or len(volume_shape) != 3:
+            raise ValueError(f"Expected 3D kernel and volume, got {kernel.shape} and {tuple(volume_shape)}")
+        if boundary not in CONVOLUTION_BOUNDARIES:
+            raise ValueError(f"Unknown convolution boundary: {boundary}")
+
+        self.kernel = kernel
+        self.kernel_shape = kernel.shape
+        self.volume_shape = tuple(int(n) for n in volume_shape)
+        self.boundary = boundary
+
+        factors = separable_factors(kernel)
+
+        if method == "auto":
+            method = select_convolution_method(self.kernel_shape, self.volume_shape, separable=factors is not None)
+        elif method not in CONVOLUTION_METHODS:
+            raise ValueError(f"Unknown convolution method: {method}")
+        elif method == "separable" and factors is None:
+            raise ValueError("Kernel is not separable")
+
+        self.method = method
+        self._factors = factors
+        self._prepared: Dict[bool, Any] = {}
+
+    def convolve(self, volume: Union[np.ndarray, DeviceVolume]) -> np.ndarray:
+        """Convolve a volume with the kernel (float32 result)."""
+        return self._run(volume, flipped=False)
+
+    def correlate(self, volume: Union[np.ndarray, DeviceVolume]) -> np.ndarray:
+        """Convolve a volume with the flipped kernel (float32 result)."""
+        return self._run(volume, flipped=True)
+
+    def _run(self, volume: Union[np.ndarray, DeviceVolume], flipped: bool) -> np.ndarray:
+        if tuple(volume.shape) != self.volume_shape:
+            raise ValueError(f"Plan is for shape {self.volume_shape}, got {tuple(volume.shape)}")
+
+        if self.method == "direct":
+            return self._direct(volume, flipped)
+        if self.method == "separable":
+            return self._separable(volume, flipped)
+        return self._fft(as_numpy(volume), flipped)
+
+    def _direct(self, volume: Union[np.ndarray, DeviceVolume], flipped: bool) -> np.ndarray:
+        weights = self._prepared.get(flipped)
+        if weights is None:
+            kernel = np.flip(self.kernel) if flipped else self.kernel
+            # conv2d correlates, so the weights are the mirrored (odd-sized) kernel
+            weights = np.ascontiguousarray(np.flip(_odd_kernel(kernel)))
+            weights = Tensor(weights[np.newaxis, np.newaxis], device=_device_manager.device).realize()
+            self._prepared[flipped] = weights
+
+        boundary = self.boundary
+
+        def convolve(vol_tensor: Tensor, weight_tensor: Tensor) -> Tensor:
+            pads = [k // 2 for k in weight_tensor.shape[2:]]
+            padded = vol_tensor.cast(_device_manager.get_accumulator_dtype())
+            if boundary == "edge":
+                for axis, pad in enumerate(pads):
+                    padded = _pad_edge(padded, pad, axis)
+            else:
+                padded = padded.pad(tuple((pad, pad) for pad in pads))
+            result = padded.reshape(1, 1, *padded.shape).conv2d(weight_tensor)
+            return result.reshape(vol_tensor.shape).cast(vol_tensor.dtype)
+
+        return get_kernel_cache().run(
+            "convolve_direct", convolve, [to_tensor(volume), weights], params=(boundary,)
+        )
+
+    def _separable(self, volume: Union[np.ndarray, DeviceVolume], flipped: bool) -> np.ndarray:
+        factors = self._prepared.get(flipped)
+        if factors is None:
+            factors = tuple(
+                _odd_kernel(np.flip(f) if flipped else f) for f in self._factors
+            )
+            self._prepared[flipped] = factors
+
+        boundary = self.boundary
+
+        def convolve(vol_tensor: Tensor) -> Tensor:
+            # Realize between passes so each pass is its own k-tap kernel
+            result = _convolve_1d(vol_tensor, factors[0], axis=0, boundary=boundary).realize()
+            result = _convolve_1d(result, factors[1], axis=1, boundary=boundary).realize()
+            return _convolve_1d(result, factors[2], axis=2, boundary=boundary)
+
+        # The 1D weights are graph constants, so they are part of the cache key
+        params = (boundary,) + tuple(f.tobytes() for f in factors)
+        return get_kernel_cache().run("convolve_separable", convolve, [to_tensor(volume)], params=params)
+
+    def _fft(self, volume: np.ndarray, flipped: bool) -> np.ndarray:
+        prepared = self._prepared.get(False)
+        if prepared is None:
+            fft_shape = fft_shape_for(self.volume_shape, self.kernel_shape)
+            if self._factors is not None:
+                otf = _separable_otf(self._factors, fft_shape)
+            else:
+                otf = _psf_to_otf(self.kernel, fft_shape)
+            prepared = self._prepared[False] = (fft_shape, otf)
+
+        fft_shape, otf = prepared
+        conjugate = False
+
+        if flipped:
+            if all(k % 2 == 1 for k in self.kernel_shape):
+                # The flipped kernel's OTF is the conjugate for odd sizes
+                conjugate = True
+            else:
+                otf = self._prepared.get(True)
+                if otf is None:
+                    otf = self._prepared[True] = _psf_to_otf(
+                        np.ascontiguousarray(np.flip(self.kernel)), fft_shape
+                    )
+
+        if self.boundary == "edge":
+            # Replicate borders: offsets of the pad widths (k - 1 - c, c)
+            # keep the kernel center c at the original origin
+            before = [k - 1 - (k - 1) // 2 for k in self.kernel_shape]
+            after = [(k - 1) // 2 for k in self.kernel_shape]
+            volume = np.pad(volume, list(zip(before, after)), mode="edge")
+            crop = tuple(slice(b, b + n) for b, n in zip(before, self.volume_shape))
+        else:
+            crop = tuple(slice(0, n) for n in self.volume_shape)
+
+        return _apply_otf(volume, otf, fft_shape, crop, conjugate=conjugate)
+
+    def info(self) -> Dict[str, Any]:
+        """Describe the plan (method, shapes and estimated costs)."""
+        return {
+            "method": self.method,
+            "kernel_shape": tuple(self.kernel_shape),
+            "volume_shape": self.volume_shape,
+            "boundary": self.boundary,
+            "separable": self._factors is not None,
+            "estimated_seconds": estimate_convolution_times(
+                self.kernel_shape, self.volume_shape, separable=self._factors is not None
+            ) if _convolution_costs.get(_device_manager.device) else None,
+        }
+
+
+@benchmark
+def convolve_3d(
+    volume: Union[np.ndarray, DeviceVolume],
+    kernel: np.ndarray,
+    method: str = "auto",
+    boundary: str = "zero",
+    return_info: bool = False
+) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, Any]]]:
+    """
+    Convolve a 3D volume with a 3D kernel ("same" size output).
+
+    With method="auto" the fastest of direct, separable and FFT convolution
+    is chosen from the kernel size, the volume size and whether the kernel
+    is separable (see select_convolution_method). To convolve many volumes
+    of one shape with the same kernel, use ConvolutionPlan directly.
+
+    Args:
+        volume: 3D volume (z, y, x), as a NumPy array or DeviceVolume
+        kernel: 3D kernel
+        method: "auto", "direct", "separable" or "fft"
+        boundary: "zero" (as fftconvolve) or "edge" (replicate borders)
+        return_info: Also return a dict describing the method used
+
+    Returns:
+        Convolved volume (float32), or (volume, info) if return_info is True
+    """
+    plan = ConvolutionPlan(kernel, volume.shape, method=method, boundary=boundary)
+    result = plan.convolve(volume)
+
+    logger.debug(f"convolve_3d used {plan.method} convolution (kernel {plan.kernel_shape})")
+
+    if return_info:
+        return result, plan.info()
+
+    return result
+
+
+def estimate_convolution_times(
+    kernel_shape: Sequence[int],
+    volume_shape: Sequence[int],
+    separable: bool = False,
+    transforms: float = 2.0
+) -> Dict[str, float]:
+    """
+    Estimate the run time of each convolution method from calibrated costs.
+
+    Args:
+        kernel_shape: Kernel shape
+        volume_shape: Volume shape
+        separable: Whether the kernel is separable
+        transforms: FFTs per convolution (2; less when the volume spectrum
+            is shared between several kernels)
+
+    Returns:
+        Dict mapping method to estimated seconds
+    """
+    costs = get_convolution_costs()
+    voxels = float(np.prod(volume_shape))
+    fft_size = float(np.prod(fft_shape_for(volume_shape, kernel_shape)))
+
+    estimates = {
+        "direct": voxels * (costs["direct_overhead"] + costs["direct"] * float(np.prod(kernel_shape))),
+        "fft": costs["fft"] * transforms * fft_size * float(np.log2(max(fft_size, 2.0))),
+    }
+    if separable:
+        estimates["separable"] = voxels * (costs["separable_overhead"] + costs["separable"] * float(sum(kernel_shape)))
+
+    return estimates
+
+
+def select_convolution_method(
+    kernel_shape: Sequence[int],
+    volume_shape: Sequence[int],
+    separable: bool = False,
+    transforms: float = 2.0
+) -> str:
+    """
+    Choose the fastest convolution method for a kernel and volume size.
+
+    Args:
+        kernel_shape: Kernel shape
+        volume_shape: Volume shape
+        separable: Whether the kernel is separable
+        transforms: FFTs per convolution (see estimate_convolution_times)
+
+    Returns:
+        "direct", "separable" or "fft"
+    """
+    estimates = estimate_convolution_times(kernel_shape, volume_shape, separable, transforms)
+    return min(estimates, key=estimates.get)
+
+
+# Per-unit convolution costs per device, measured lazily on first use
+_convolution_costs: Dict[str, Dict[str, float]] = {}
+_convolution_costs_lock = threading.Lock()
+
+_COST_PROBE_SHAPE = (24, 96, 96)
+# Kernel sizes timed for the spatial methods (k^3 direct; 3k and 9k taps separable)
+_COST_PROBE_KERNELS = (3, 5)
+_COST_KEYS = ("direct", "direct_overhead", "separable", "separable_overhead", "fft")
+
+
+def get_convolution_costs(recalibrate: bool = False) -> Dict[str, float]:
+    """
+    Get the per-unit costs used to choose a convolution method.
+
+    Measured once per device by timing each method on a probe volume, then
+    cached in memory and in the calibration file (ZSTACK_CONVOLUTION_CALIBRATION;
+    empty string = memory only), so later processes on the same machine
+    skip the measurement.
+
+    Args:
+        recalibrate: Force a new measurement
+
+    Returns:
+        Dict with "direct" and "separable" (seconds per voxel-tap),
+        "direct_overhead" and "separable_overhead" (seconds per voxel) and
+        "fft" (seconds per M log2 M of one transform)
+    """
+    device = _device_manager.device
+
+    with _convolution_costs_lock:
+        if not recalibrate and device in _convolution_costs:
+            return _convolution_costs[device]
+
+        path = _calibration_path()
+        stored = _load_calibration(path)
+
+        if recalibrate or device not in stored:
+            stored[device] = _measure_convolution_costs()
+            logger.info(
+                f"Convolution costs on {device}: "
+                + ", ".join(f"{method}={cost:.2e}s" for method, cost in stored[device].items())
+            )
+            _save_calibration(path, stored)
+
+        _convolution_costs[device] = stored[device]
+        return _convolution_costs[device]
+
+
+def _measure_convolution_costs() -> Dict[str, float]:
+    """
+    Time each method on a probe volume and fit its per-unit costs.
+
+    The spatial methods are timed with two kernel sizes so a fixed
+    per-voxel overhead (padding, transfers, launches) is separated from the
+    per-tap cost.
+    """
+    rng = np.random.default_rng(0)
+    probe = rng.random(_COST_PROBE_SHAPE, dtype=np.float32)
+    voxels = float(probe.size)
+
+    def best_time(run: Callable[[], Any]) -> float:
+        run()
+        run()  # warm-up (kernel compilation and JIT capture)
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def fit(method: str, kernels: Tuple[np.ndarray, np.ndarray], taps: Tuple[float, float]) -> Tuple[float, float]:
+        small, large = (
+            best_time(lambda plan=ConvolutionPlan(kernel, probe.shape, method=method): plan.convolve(probe)) / voxels
+            for kernel in kernels
+        )
+        per_tap = max((large - small) / (taps[1] - taps[0]), 0.0)
+        return per_tap, max(small - per_tap * taps[0], 0.0)
+
+    def outer(factor: np.ndarray) -> np.ndarray:
+        return np.einsum("i,j,k->ijk", factor, factor, factor).astype(np.float32)
+
+    small, large = _COST_PROBE_KERNELS
+    direct, direct_overhead = fit(
+        "direct",
+        (rng.random((small,) * 3, dtype=np.float32), rng.random((large,) * 3, dtype=np.float32)),
+        (small ** 3, large ** 3),
+    )
+    separable, separable_overhead = fit(
+        "separable",
+        (outer(np.hanning(small + 2)[1:-1]), outer(np.hanning(3 * large + 2)[1:-1])),
+        (3 * small, 9 * large),
+    )
+
+    kernel = rng.random((large,) * 3, dtype=np.float32)
+    fft = ConvolutionPlan(kernel, probe.shape, method="fft")
+    fft_size = float(np.prod(fft_shape_for(probe.shape, kernel.shape)))
+
+    return {
+        "direct": direct,
+        "direct_overhead": direct_overhead,
+        "separable": separable,
+        "separable_overhead": separable_overhead,
+        "fft": best_time(lambda: fft.convolve(probe)) / float(2 * fft_size * np.log2(fft_size)),
+    }
+
+
+def _calibration_path() -> Optional[Path]:
+    """Calibration file (ZSTACK_CONVOLUTION_CALIBRATION; empty string = memory only)."""
+    configured = os.environ.get("ZSTACK_CONVOLUTION_CALIBRATION")
+    if configured is not None:
+        return Path(configured).expanduser() if configured else None
+    return Path.home() / ".cache" / "zstack-analyzer" / "convolution_costs.json"
+
+
+def _load_calibration(path: Optional[Path]) -> Dict[str, Dict[str, float]]:
+    """Read stored per-device costs (empty if missing or unreadable)."""
+    if path is None or not path.exists():
+        return {}
+
+    try:
+        stored = json.loads(path.read_text())
+        return {
+            device: {key: float(costs[key]) for key in _COST_KEYS}
+            for device, costs in stored.items()
+        }
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"Ignoring unreadable convolution calibration {path}: {e}")
+        return {}
+
+
+def _save_calibration(path: Optional[Path], stored: Dict[str, Dict[str, float]]) -> None:
+    """Write per-device costs atomically."""
+    if path is None:
+        return
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=path.parent)
+        with os.fdopen(fd, "w") as f:
+            json.dump(stored, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not save convolution calibration to {path}: {e}")
@@ -2,21 +2,32 @@
 GPU-accelerated deconvolution algorithms for microscopy.
 
 Implements:
-- Richardson-Lucy deconvolution (iterative blind deconvolution)
+- Richardson-Lucy deconvolution (iterative)
+- Blind Richardson-Lucy (joint object and PSF refinement)
 - Wiener deconvolution (frequency domain)
 - PSF generation (Gaussian, Airy disk)
 """
 
 import numpy as np
+import hashlib
+import itertools
 import logging
-from typing import Optional, Callable, Tuple, List
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 from tinygrad.tensor import Tensor
 from tinygrad.dtype import dtypes
-from scipy import signal, ndimage
+from scipy import ndimage
+from scipy import fft as sp_fft
+from scipy.special import j1, xlogy
 
 from .device_manager import DeviceManager
+from .fft_backend import get_fft_backend, limit_fft_workers
 from .kernels import to_tensor, to_numpy, benchmark, gaussian_blur_3d
+from .convolution import ConvolutionPlan, fft_shape_for, separable_factors, _psf_to_otf, _separable_otf
 
 logger = logging.getLogger(__name__)
 _device_manager = DeviceManager()
@@ -28,10 +39,15 @@ def richardson_lucy_deconvolution(
     psf: np.ndarray,
     iterations: int = 10,
     clip: bool = True,
-    progress_callback: Optional[Callable[[float], None]] = None
-) -> np.ndarray:
+    progress_callback: Optional[Callable[[float], None]] = None,
+    accelerate: bool = False,
+    tolerance: Optional[float] = None,
+    stop_metric: str = "relative_change",
+    return_info: bool = False,
+    convolution: str = "auto"
+) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, Any]]]:
     """
-    GPU-accelerated Richardson-Lucy deconvolution.
+    Richardson-Lucy deconvolution with a prepared convolution plan.
 
     Iteratively estimates the true image by deconvolving with PSF.
     Standard algorithm for fluorescence microscopy deconvolution.
@@ -41,78 +57,398 @@ def richardson_lucy_deconvolution(
 
     Where * is convolution and / is element-wise division.
 
+    Both convolutions per iteration go through one ConvolutionPlan (see
+    convolution.py), which picks direct, separable or FFT convolution from
+    the PSF size, volume size and separability: small measured PSFs run as
+    direct device convolutions, Gaussian PSFs as separable passes, large
+    PSFs with a precomputed single-precision OTF whose conjugate serves the
+    back-projection. Results match ``fftconvolve(..., mode="same")`` (zero
+    boundary) up to float32 rounding.
+
+    With accelerate=True the Biggs-Andrews vector extrapolation is applied:
+    each RL step starts from the prediction Y = I^(n) + a * (I^(n) - I^(n-1)),
+    with a estimated from the last two RL steps (clamped to [0, 1]). It
+    typically reaches the same result in about a third of the iterations.
+
+    Updates run in place in a fixed set of buffers (the estimate and a
+    spare swap roles each iteration). The convergence metric is only
+    computed when it is used (``tolerance`` set or ``return_info``):
+    - "relative_change": ||I^(n+1) - I^(n)|| / ||I^(n)||
+    - "i_divergence": relative decrease of the I-divergence (Csiszar)
+      between the observed volume and the re-blurred estimate
+    Iteration stops early once the metric drops below ``tolerance``.
+
     Args:
         volume: Blurred input volume
         psf: Point spread function (must be same or smaller size)
-        iterations: Number of RL iterations (10-50 typical)
+        iterations: Maximum number of RL iterations (10-50 typical)
         clip: Whether to clip negative values
         progress_callback: Progress callback
+        accelerate: Use Biggs-Andrews acceleration
+        tolerance: Stop once the metric is below this (None = run all iterations)
+        stop_metric: "relative_change" or "i_divergence"
+        return_info: Also return a dict with the iterations run and metric trace
+        convolution: Convolution method ("auto", "direct", "separable", "fft")
 
     Returns:
-        Deconvolved volume
+        Deconvolved volume (float32), or (volume, info) if return_info is True
     """
+    if stop_metric not in ("relative_change", "i_divergence"):
+        raise ValueError(f"Unknown convergence metric: {stop_metric}")
+
     if progress_callback:
         progress_callback(0.0)
 
-    # Ensure PSF is normalized
-    psf = psf / psf.sum()
-
-    # Flip PSF for back-projection
-    psf_flipped = np.flip(psf)
+    observed = np.asarray(volume, dtype=np.float32)
 
-    # Initialize estimate with observed image
-    estimate = volume.copy()
-
-    # Convert to tensors for GPU acceleration
-    observed_tensor = to_tensor(volume)
-    psf_tensor = to_tensor(psf)
-    psf_flipped_tensor = to_tensor(psf_flipped)
+    # Ensure PSF is normalized; negligible borders only enlarge the FFTs
+    psf = _trim_psf(np.asarray(psf, dtype=np.float32))
+    psf = psf / psf.sum()
 
-    logger.info(f"Starting Richardson-Lucy deconvolution: {iterations} iterations")
+    plan = ConvolutionPlan(psf, observed.shape, method=convolution)
+
+    # Initialize estimate with observed image. The estimate stays float32
+    # under every precision policy: the multiplicative update would be
+    # rounded each iteration, and NumPy float16 arithmetic is emulated.
+    estimate = observed.copy()
+    spare = np.empty_like(estimate)
+
+    # Biggs-Andrews state (float32): last estimate step, last RL step
+    # (update - prediction) and the buffers they are written to
+    track_metric = tolerance is not None or return_info
+    step = None
+    previous_update = None
+    update_buffer = None
+    prediction_buffer = None
+    alpha = 0.0
+
+    observed_total = float(observed.sum(dtype=np.float64))
+    previous_divergence = None
+    trace: List[float] = []
+    alphas: List[float] = []
+    converged = False
+    iterations_run = 0
+
+    logger.info(
+        f"Starting Richardson-Lucy deconvolution: up to {iterations} iterations "
+        f"({plan.method} convolution, PSF {psf.shape}, acceleration {'on' if accelerate else 'off'})"
+    )
 
     for iteration in range(iterations):
-        # Forward convolution: estimate * PSF
-        convolved = _convolve_fft(estimate, psf)
-
-        # Compute ratio: observed / convolved
+        # Prediction (the plain estimate without acceleration)
+        if alpha > 0:
+            if prediction_buffer is None:
+                prediction_buffer = np.empty(estimate.shape, dtype=np.float32)
+            prediction = np.multiply(step, np.float32(alpha), out=prediction_buffer)
+            prediction += estimate
+            np.maximum(prediction, 0, out=prediction)
+        else:
+            prediction = estimate
+
+        # Forward convolution: prediction * PSF
+        blurred = plan.convolve(prediction)
+
+        # Compute ratio in place: observed / convolved
         # Add epsilon to avoid division by zero
-        ratio = volume / (convolved + 1e-10)
+        blurred += 1e-10
+        divergence_metric = track_metric and stop_metric == "i_divergence"
+        if divergence_metric:
+            blurred_total = float(blurred.sum(dtype=np.float64))
+        ratio = np.divide(observed, blurred, out=blurred)
+
+        if divergence_metric:
+            # D(O || B) = sum(O * log(O / B)) - sum(O) + sum(B)
+            divergence = float(xlogy(observed, ratio).sum(dtype=np.float64)) - observed_total + blurred_total
 
         # Back-project: ratio * PSF_flipped
-        correction = _convolve_fft(ratio, psf_flipped)
+        correction = plan.correlate(ratio)
 
-        # Update estimate
-        estimate = estimate * correction
+        # Update estimate into the spare buffer
+        updated = np.multiply(prediction, correction, out=spare)
+        del correction
 
         # Optional: clip negative values
         if clip:
-            estimate = np.maximum(estimate, 0)
+            np.maximum(updated, 0, out=updated)
+
+        if accelerate:
+            # a = <g_n, g_n-1> / <g_n-1, g_n-1>, with g the RL step
+            if update_buffer is None:
+                update_buffer = np.empty(estimate.shape, dtype=np.float32)
+            update = np.subtract(updated, prediction, out=update_buffer)
+            if previous_update is not None:
+                denominator = float(np.vdot(previous_update, previous_update))
+                if denominator > 0:
+                    alpha = float(np.clip(np.vdot(update, previous_update) / denominator, 0.0, 1.0))
+            update_buffer, previous_update = previous_update, update
+            alphas.append(alpha)
+
+        if accelerate or (track_metric and stop_metric == "relative_change"):
+            if step is None:
+                step = np.empty(estimate.shape, dtype=np.float32)
+            np.subtract(updated, estimate, out=step)
+
+        metric = None
+        if track_metric:
+            if stop_metric == "relative_change":
+                norm = _norm(estimate)
+                metric = _norm(step) / norm if norm > 0 else 0.0
+            else:
+                if previous_divergence is None:
+                    metric = float("inf")
+                else:
+                    metric = abs(previous_divergence - divergence) / max(abs(divergence), 1e-30)
+                previous_divergence = divergence
+            trace.append(metric)
+
+        # The old estimate becomes the next spare
+        estimate, spare = updated, estimate
+        iterations_run += 1
+
+        if progress_callback:
+            progress_callback((iteration + 1) / iterations)
+
+        if metric is not None and (iteration + 1) % 5 == 0:
+            logger.debug(f"RL iteration {iteration + 1}/{iterations}: {stop_metric}={metric:.3e}")
+
+        if tolerance is not None and metric < tolerance:
+            converged = True
+            if progress_callback:
+                progress_callback(1.0)
+            break
+
+    logger.info(
+        f"Richardson-Lucy deconvolution completed after {iterations_run} iterations"
+        + (f" ({stop_metric}={trace[-1]:.3e})" if trace else "")
+    )
+
+    result = estimate
+
+    if return_info:
+        return result, {
+            "iterations": iterations_run,
+            "max_iterations": iterations,
+            "converged": converged,
+            "tolerance": tolerance,
+            "metric": stop_metric,
+            "metric_trace": trace,
+            "accelerated": accelerate,
+            "acceleration_trace": alphas,
+            "convolution": plan.method,
+        }
+
+    return result
+
+
+@benchmark
+def blind_richardson_lucy_deconvolution(
+    volume: np.ndarray,
+    psf: np.ndarray,
+    iterations: int = 10,
+    clip: bool = True,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    tolerance: Optional[float] = None,
+    return_info: bool = False
+) -> Union[Tuple[np.ndarray, np.ndarray], Tuple[np.ndarray, np.ndarray, Dict[str, Any]]]:
+    """
+    Blind Richardson-Lucy deconvolution that refines the PSF with the object.
+
+    Each outer iteration applies one multiplicative RL update to the object
+    (PSF fixed) and one to the PSF (object fixed), both driven by the same
+    ratio O / (I * PSF) (Fish et al., 1995):
+
+        I^(n+1)   = I^(n) * (ratio * PSF_flipped)
+        PSF^(n+1) = PSF^(n) * (ratio * I_flipped) / sum(I^(n))
+
+    The PSF is only updated inside its initial window (``psf.shape``),
+    which is the support constraint that keeps the problem well posed, and
+    is renormalized to unit sum after every update.
+
+    Both updates share one transform shape, the forward model and the
+    ratio spectrum, and reuse preallocated spectrum buffers, so an outer
+    iteration costs six real FFTs against four for a plain FFT RL
+    iteration. Start from a theoretical or bead-measured PSF of the right
+    size; the refinement corrects its width and asymmetry.
+
+    Args:
+        volume: Blurred input volume (3D)
+        psf: Initial PSF estimate; its shape is the PSF support
+        iterations: Maximum number of outer iterations
+        clip: Whether to clip negative values
+        progress_callback: Progress callback
+        tolerance: Stop once the relative object change is below this
+            (None = run all iterations)
+        return_info: Also return a dict with the iterations run and traces
+
+    Returns:
+        (deconvolved volume, refined PSF) as float32, plus an info dict if
+        return_info is True
+    """
+    if progress_callback:
+        progress_callback(0.0)
+
+    observed = np.asarray(volume, dtype=np.float32)
+    if observed.ndim != 3:
+        raise ValueError(f"Expected a 3D volume, got shape {observed.shape}")
+
+    psf = np.maximum(np.asarray(psf, dtype=np.float32), 0)
+    psf = psf / psf.sum()
+
+    fft_shape = fft_shape_for(observed.shape, psf.shape)
+    crop = tuple(slice(0, n) for n in observed.shape)
+    # PSF window positions in the transform buffer ("same"-mode center at the origin)
+    window = np.ix_(*[(np.arange(k) - (k - 1) // 2) % n for k, n in zip(psf.shape, fft_shape)])
+
+    # Buffers shared by the object and PSF updates across iterations
+    psf_buffer = np.zeros(fft_shape, dtype=np.float32)
+    spectrum_shape = fft_shape[:-1] + (fft_shape[-1] // 2 + 1,)
+    spectrum = np.empty(spectrum_shape, dtype=np.complex64)
+    backend = get_fft_backend()
+
+    estimate = observed.copy()
+    trace: List[float] = []
+    psf_trace: List[float] = []
+    converged = False
+
+    logger.info(
+        f"Starting blind Richardson-Lucy deconvolution: up to {iterations} iterations "
+        f"(PSF support {psf.shape}, FFT {fft_shape})"
+    )
+
+    object_spectrum = backend.rfftn(estimate, s=fft_shape)
+
+    for iteration in range(iterations):
+        psf_buffer[window] = psf
+        otf = backend.rfftn(psf_buffer)
+
+        # Forward model and the ratio spectrum shared by both updates
+        np.multiply(object_spectrum, otf, out=spectrum)
+        blurred = backend.irfftn(spectrum, s=fft_shape, overwrite_x=True)[crop]
+        blurred += 1e-10
+        ratio = np.divide(observed, blurred, out=blurred)
+        ratio_spectrum = backend.rfftn(ratio, s=fft_shape)
+
+        # Object update (PSF fixed): correlate the ratio with the PSF
+        np.multiply(ratio_spectrum, otf.conj(), out=spectrum)
+        correction = backend.irfftn(spectrum, s=fft_shape, overwrite_x=True)[crop]
+
+        # PSF update (object fixed): correlate the ratio with the current
+        # estimate and read it back on the PSF window
+        np.multiply(ratio_spectrum, object_spectrum.conj(), out=ratio_spectrum)
+        psf_correction = backend.irfftn(ratio_spectrum, s=fft_shape, overwrite_x=True)[window]
+
+        # Update in place: the correction buffer takes the new estimate and
+        # the estimate buffer briefly holds the step for the metric
+        updated = np.multiply(correction, estimate, out=correction)
+        if clip:
+            np.maximum(updated, 0, out=updated)
+
+        norm = _norm(estimate)
+        step = np.subtract(updated, estimate, out=estimate)
+        metric = _norm(step) / norm if norm > 0 else 0.0
+        np.copyto(estimate, updated)
+        trace.append(metric)
+        # Carries over to the next iteration's forward model
+        object_spectrum = backend.rfftn(estimate, s=fft_shape)
+
+        updated_psf = psf * psf_correction
+        np.maximum(updated_psf, 0, out=updated_psf)
+        psf_total = float(updated_psf.sum(dtype=np.float64))
+        if psf_total > 0:
+            updated_psf /= np.float32(psf_total)
+            psf_norm = _norm(psf)
+            psf_trace.append(_norm(updated_psf - psf) / psf_norm if psf_norm > 0 else 0.0)
+            psf = updated_psf
+        else:
+            psf_trace.append(0.0)
 
         if progress_callback:
             progress_callback((iteration + 1) / iterations)
 
         if (iteration + 1) % 5 == 0:
-            logger.debug(f"RL iteration {iteration + 1}/{iterations}")
+            logger.debug(
+                f"Blind RL iteration {iteration + 1}/{iterations}: "
+                f"relative_change={metric:.3e} psf_change={psf_trace[-1]:.3e}"
+            )
+
+        if tolerance is not None and metric < tolerance:
+            converged = True
+            if progress_callback:
+                progress_callback(1.0)
+            break
+
+    logger.info(
+        f"Blind Richardson-Lucy deconvolution completed after {len(trace)} iterations "
+        f"(relative_change={trace[-1] if trace else 0.0:.3e})"
+    )
+
+    result = estimate.astype(np.float32, copy=False)
+    psf = psf.astype(np.float32, copy=False)
 
-    logger.info(f"Richardson-Lucy deconvolution completed")
+    if return_info:
+        return result, psf, {
+            "iterations": len(trace),
+            "max_iterations": iterations,
+            "converged": converged,
+            "tolerance": tolerance,
+            "metric": "relative_change",
+            "metric_trace": trace,
+            "psf_change_trace": psf_trace,
+            "psf_sigma": psf_sigma(psf),
+            "convolution": "fft",
+        }
 
-    return estimate
+    return result, psf
 
 
-def _convolve_fft(volume: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+def psf_sigma(psf: np.ndarray) -> Tuple[float, float, float]:
     """
-    FFT-based convolution (faster for large kernels).
+    Second-moment width of a PSF along each axis.
 
     Args:
-        volume: Input volume
-        kernel: Convolution kernel
+        psf: 3D PSF
 
     Returns:
-        Convolved volume
+        Standard deviation (z, y, x) in voxels
     """
-    # Use scipy's FFT convolution (optimized)
-    # For GPU version, would use tinygrad FFT operations
-    return signal.fftconvolve(volume, kernel, mode='same')
+    psf = np.maximum(np.asarray(psf, dtype=np.float64), 0)
+    total = psf.sum() or 1.0
+    sigmas = []
+    for axis in range(3):
+        profile = psf.sum(axis=tuple(a for a in range(3) if a != axis)) / total
+        coordinates = np.arange(profile.size)
+        mean = float(np.dot(profile, coordinates))
+        sigmas.append(float(np.sqrt(max(np.dot(profile, (coordinates - mean) ** 2), 0.0))))
+    return tuple(sigmas)
+
+
+def _norm(array: np.ndarray) -> float:
+    """Euclidean norm, accumulated in at least float32."""
+    flat = array.ravel().astype(np.float32, copy=False)
+    return float(np.sqrt(np.vdot(flat, flat)))
+
+
+def _trim_psf(psf: np.ndarray, rel_threshold: float = 1e-7) -> np.ndarray:
+    """
+    Crop PSF border planes whose values are all below rel_threshold * max.
+
+    Planes are removed symmetrically, so the PSF center is unchanged.
+
+    Args:
+        psf: Point spread function
+        rel_threshold: Threshold relative to the PSF maximum
+
+    Returns:
+        Cropped PSF (a view)
+    """
+    significant = np.abs(psf) >= rel_threshold * np.abs(psf).max()
+    slices = []
+    for axis in range(psf.ndim):
+        other = tuple(a for a in range(psf.ndim) if a != axis)
+        planes = np.flatnonzero(significant.any(axis=other))
+        trim = min(planes[0], psf.shape[axis] - 1 - planes[-1])
+        slices.append(slice(trim, psf.shape[axis] - trim))
+    return psf[tuple(slices)]
 
 
 @benchmark
@@ -121,7 +457,8 @@ def wiener_deconvolution(
     psf: np.ndarray,
     noise_variance: Optional[float] = None,
     signal_variance: Optional[float] = None,
-    progress_callback: Optional[Callable[[float], None]] = None
+    progress_callback: Optional[Callable[[float], None]] = None,
+    regularization: Optional[float] = None
 ) -> np.ndarray:
     """
     GPU-accelerated Wiener deconvolution.
@@ -132,112 +469,578 @@ def wiener_deconvolution(
     Wiener filter: H_w(f) = H*(f) / (|H(f)|² + λ)
     Where H is PSF frequency response, λ = noise/signal variance ratio.
 
+    Runs in single precision on the real half-spectrum (periodic boundary).
+    The filter is cached per (PSF, shape, λ), see
+    wiener_deconvolution_multichannel.
+
     Args:
         volume: Blurred input volume
         psf: Point spread function
         noise_variance: Noise variance (estimated if None)
         signal_variance: Signal variance (estimated if None)
         progress_callback: Progress callback
+        regularization: λ to use directly instead of the variance ratio
 
     Returns:
-        Deconvolved volume
+        Deconvolved volume (float32)
     """
-    if progress_callback:
-        progress_callback(0.0)
+    return _wiener_batch(
+        np.asarray(volume)[np.newaxis],
+        psf,
+        noise_variance,
+        signal_variance,
+        progress_callback,
+        regularization,
+    )[0]
 
-    # Estimate variances if not provided
-    if noise_variance is None:
-        # Estimate from background regions (corners)
-        corner_size = min(volume.shape) // 10
-        corners = [
-            volume[:corner_size, :corner_size, :corner_size],
-            volume[-corner_size:, :corner_size, :corner_size],
-            volume[:corner_size, -corner_size:, :corner_size],
-            volume[:corner_size, :corner_size, -corner_size:],
-        ]
-        noise_variance = np.mean([np.var(corner) for corner in corners])
-        logger.info(f"Estimated noise variance: {noise_variance:.6f}")
 
-    if signal_variance is None:
-        signal_variance = np.var(volume)
-        logger.info(f"Estimated signal variance: {signal_variance:.6f}")
+@benchmark
+def wiener_deconvolution_multichannel(
+    stack: np.ndarray,
+    psfs: Union[np.ndarray, List[np.ndarray]],
+    noise_variance: Optional[Union[float, List[float]]] = None,
+    signal_variance: Optional[Union[float, List[float]]] = None,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    regularization: Optional[Union[float, List[float]]] = None
+) -> np.ndarray:
+    """
+    Batched single-precision Wiener deconvolution of a (C, Z, Y, X) stack.
 
-    if progress_callback:
-        progress_callback(0.2)
+    All channels are transformed together with one float32 rfftn over the
+    spatial axes and filtered in place in the half-spectrum. Wiener filters
+    are built in place from the PSF's OTF and kept in an LRU cache keyed by
+    (PSF, shape, λ), so reprocessing data acquired with the same optics
+    skips the filter build; pass ``regularization`` (or both variances) to
+    make λ reproducible across datasets.
 
-    # Ensure PSF is normalized and same size as volume
-    psf_padded = _pad_psf_to_volume(psf, volume.shape)
-    psf_padded = psf_padded / psf_padded.sum()
+    Args:
+        stack: Blurred channels (C, Z, Y, X)
+        psfs: One PSF for all channels, or one per channel (list or
+            (C, kz, ky, kx) array)
+        noise_variance: Noise variance, scalar or per channel (estimated if None)
+        signal_variance: Signal variance, scalar or per channel (estimated if None)
+        progress_callback: Progress callback
+        regularization: λ, scalar or per channel, instead of the variance ratio
+
+    Returns:
+        Deconvolved channels (C, Z, Y, X), float32
+    """
+    return _wiener_batch(stack, psfs, noise_variance, signal_variance, progress_callback, regularization)
+
+
+def _wiener_batch(
+    stack: np.ndarray,
+    psfs: Union[np.ndarray, List[np.ndarray]],
+    noise_variance: Optional[Union[float, List[float]]],
+    signal_variance: Optional[Union[float, List[float]]],
+    progress_callback: Optional[Callable[[float], None]],
+    regularization: Optional[Union[float, List[float]]]
+) -> np.ndarray:
+    """Shared implementation of the (multi-channel) Wiener filters."""
+    stack = np.asarray(stack, dtype=np.float32)
+    if stack.ndim != 4:
+        raise ValueError(f"Expected a (C, Z, Y, X) stack, got shape {stack.shape}")
 
-    # FFT of volume and PSF
-    volume_fft = np.fft.fftn(volume)
-    psf_fft = np.fft.fftn(psf_padded)
+    channels = stack.shape[0]
+    spatial_shape = stack.shape[1:]
 
     if progress_callback:
-        progress_callback(0.5)
+        progress_callback(0.0)
 
-    # Wiener filter in frequency domain
-    # H_w(f) = conj(H) / (|H|^2 + noise/signal)
-    psf_fft_conj = np.conj(psf_fft)
-    psf_power = np.abs(psf_fft) ** 2
+    if isinstance(psfs, np.ndarray) and psfs.ndim == 3:
+        psfs = [psfs] * channels
+    if len(psfs) != channels:
+        raise ValueError(f"Got {len(psfs)} PSFs for {channels} channels")
+
+    def per_channel(value: Any) -> List[Optional[float]]:
+        if value is None or np.isscalar(value):
+            return [value] * channels
+        if len(value) != channels:
+            raise ValueError(f"Expected {channels} per-channel values, got {len(value)}")
+        return list(value)
+
+    regularizations = per_channel(regularization)
+    noise_variances = per_channel(noise_variance)
+    signal_variances = per_channel(signal_variance)
+
+    for c in range(channels):
+        if regularizations[c] is None:
+            noise, signal_var = _estimate_wiener_variances(
+                stack[c], noise_variances[c], signal_variances[c]
+            )
+            regularizations[c] = noise / signal_var if signal_var > 0 else 0.0
 
-    # Regularization parameter
-    reg = noise_variance / signal_variance
+    if progress_callback:
+        progress_callback(0.2)
 
-    wiener_filter = psf_fft_conj / (psf_power + reg)
+    otfs = [_get_wiener_otf(np.asarray(psf, dtype=np.float32), spatial_shape) for psf in psfs]
 
     if progress_callback:
-        progress_callback(0.7)
+        progress_callback(0.4)
+
+    # FFT of all channels at once
+    axes = (1, 2, 3)
+    backend = get_fft_backend()
+    spectrum = backend.rfftn(stack, axes=axes)
 
-    # Apply filter
-    deconvolved_fft = volume_fft * wiener_filter
+    if progress_callback:
+        progress_callback(0.6)
+
+    # Apply filter (a shared OTF and λ broadcast over the channel axis)
+    if all(otf is otfs[0] for otf in otfs) and len(set(regularizations)) == 1:
+        _apply_wiener_filter(spectrum, otfs[0], float(regularizations[0]))
+    else:
+        for c, (otf, reg) in enumerate(zip(otfs, regularizations)):
+            _apply_wiener_filter(spectrum[c], otf, float(reg))
 
     # Inverse FFT
-    deconvolved = np.fft.ifftn(deconvolved_fft).real
+    deconvolved = backend.irfftn(spectrum, s=spatial_shape, axes=axes, overwrite_x=True)
+    del spectrum
 
     if progress_callback:
         progress_callback(0.9)
 
     # Clip negative values
-    deconvolved = np.maximum(deconvolved, 0)
+    np.maximum(deconvolved, 0, out=deconvolved)
 
     if progress_callback:
         progress_callback(1.0)
 
-    logger.info(f"Wiener deconvolution completed (reg={reg:.6f})")
+    logger.info(
+        f"Wiener deconvolution completed ({channels} channel(s), "
+        f"reg={', '.join(f'{reg:.6f}' for reg in regularizations)})"
+    )
 
     return deconvolved
 
 
-def _pad_psf_to_volume(psf: np.ndarray, target_shape: Tuple[int, int, int]) -> np.ndarray:
+# LRU cache of OTFs keyed by (PSF digest, PSF shape, volume shape), bounded
+# by bytes. Each entry holds conj(H) (complex64) and |H|^2 (float32) over the
+# half-spectrum, 12 bytes per element; λ is applied per call, so stacks with
+# different noise estimates share an entry.
+_WIENER_CACHE_BYTES = int(float(os.environ.get("ZSTACK_WIENER_CACHE_MB", 2048)) * 1024**2)
+_wiener_otf_cache: "OrderedDict[Tuple[Any, ...], Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+_wiener_cache_bytes = 0
+_wiener_cache_lock = threading.Lock()
+
+# Z planes of the spectrum filtered per step (bounds the λ temporary)
+_WIENER_SLAB = 16
+
+
+def _get_wiener_otf(psf: np.ndarray, shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Pad PSF to match volume shape with PSF centered.
+    Get conj(H) and |H|^2 of a PSF for a volume shape.
+
+    Wiener is an inverse filter spanning the whole volume, so it always
+    runs in the frequency domain; separable (Gaussian) PSFs get their OTF
+    from three 1D transforms instead of a full 3D FFT. The result does not
+    depend on λ, so it is reused across stacks from the same optics.
 
     Args:
-        psf: Input PSF
-        target_shape: Target shape (z, y, x)
+        psf: Point spread function (normalized here)
+        shape: Volume shape (z, y, x)
 
     Returns:
-        Padded PSF
+        (conj(H) complex64, |H|^2 float32) half-spectra (shared; do not modify)
     """
-    padded = np.zeros(target_shape, dtype=psf.dtype)
+    global _wiener_cache_bytes
 
-    # Compute padding
-    pad_z = (target_shape[0] - psf.shape[0]) // 2
-    pad_y = (target_shape[1] - psf.shape[1]) // 2
-    pad_x = (target_shape[2] - psf.shape[2]) // 2
+    psf = psf / psf.sum()
+    key = (
+        hashlib.sha1(np.ascontiguousarray(psf).tobytes()).hexdigest(),
+        psf.shape,
+        tuple(shape),
+    )
+
+    with _wiener_cache_lock:
+        cached = _wiener_otf_cache.get(key)
+        if cached is not None:
+            _wiener_otf_cache.move_to_end(key)
+            return cached
+
+    factors = separable_factors(psf)
+    if factors is not None:
+        otf = _separable_otf(factors, shape)
+    else:
+        otf = _psf_to_otf(psf, shape)
+
+    power = np.abs(otf)
+    np.square(power, out=power)
+    np.conjugate(otf, out=otf)
+    otf.flags.writeable = False
+    power.flags.writeable = False
+    entry = (otf, power)
+    size = otf.nbytes + power.nbytes
+
+    with _wiener_cache_lock:
+        if size <= _WIENER_CACHE_BYTES and key not in _wiener_otf_cache:
+            _wiener_otf_cache[key] = entry
+            _wiener_cache_bytes += size
+            while _wiener_cache_bytes > _WIENER_CACHE_BYTES:
+                _, (old_otf, old_power) = _wiener_otf_cache.popitem(last=False)
+                _wiener_cache_bytes -= old_otf.nbytes + old_power.nbytes
+
+    return entry
+
+
+def _apply_wiener_filter(
+    spectrum: np.ndarray,
+    otf: Tuple[np.ndarray, np.ndarray],
+    regularization: float
+) -> None:
+    """
+    Multiply a spectrum in place by conj(H) / (|H|^2 + λ).
 
-    # Place PSF in center
-    padded[
-        pad_z:pad_z + psf.shape[0],
-        pad_y:pad_y + psf.shape[1],
-        pad_x:pad_x + psf.shape[2]
-    ] = psf
+    Works in slabs of Z planes so the only temporary is one slab of
+    |H|^2 + λ. A leading channel axis in ``spectrum`` is broadcast.
+    """
+    conj_otf, power = otf
+    for z in range(0, power.shape[0], _WIENER_SLAB):
+        planes = slice(z, z + _WIENER_SLAB)
+        denominator = power[planes] + np.float32(regularization)
+        block = spectrum[..., planes, :, :]
+        block *= conj_otf[planes]
+        np.divide(block, denominator, out=block, where=denominator > 0)
 
-    # Circularly shift PSF so center is at (0, 0, 0)
-    padded = np.roll(padded, shift=(-pad_z, -pad_y, -pad_x), axis=(0, 1, 2))
 
-    return padded
+def clear_wiener_filter_cache() -> None:
+    """Drop all cached Wiener OTFs."""
+    global _wiener_cache_bytes
+    with _wiener_cache_lock:
+        _wiener_otf_cache.clear()
+        _wiener_cache_bytes = 0
+
+
+def _estimate_wiener_variances(
+    volume: Any,
+    noise_variance: Optional[float] = None,
+    signal_variance: Optional[float] = None
+) -> Tuple[float, float]:
+    """
+    Estimate the Wiener noise and signal variances where not given.
+
+    Noise is estimated from the four background corners, signal from the
+    whole volume read a slab of Z planes at a time (per-slab moments in
+    float64, merged pairwise), so memmaps and dask arrays larger than
+    memory are never materialized.
+
+    Args:
+        volume: 3D volume (NumPy or dask array)
+        noise_variance: Known noise variance (estimated if None)
+        signal_variance: Known signal variance (estimated if None)
+
+    Returns:
+        Tuple of (noise_variance, signal_variance)
+    """
+    if noise_variance is None:
+        # Estimate from background regions (corners)
+        corner_size = max(min(volume.shape) // 10, 1)
+        corners = [
+            volume[:corner_size, :corner_size, :corner_size],
+            volume[-corner_size:, :corner_size, :corner_size],
+            volume[:corner_size, -corner_size:, :corner_size],
+            volume[:corner_size, :corner_size, -corner_size:],
+        ]
+        noise_variance = float(np.mean([np.var(np.asarray(corner, dtype=np.float32)) for corner in corners]))
+        logger.info(f"Estimated noise variance: {noise_variance:.6f}")
+
+    if signal_variance is None:
+        signal_variance = _slab_variance(volume)
+        logger.info(f"Estimated signal variance: {signal_variance:.6f}")
+
+    return noise_variance, signal_variance
+
+
+def _slab_variance(volume: Any, slab: int = 8) -> float:
+    """Population variance of a volume, reading ``slab`` Z planes at a time."""
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    for z in range(0, volume.shape[0], slab):
+        block = np.asarray(volume[z:z + slab], dtype=np.float64)
+        n = block.size
+        if n == 0:
+            continue
+        block_mean = float(block.mean())
+        block -= block_mean
+        block_m2 = float(np.vdot(block, block))
+        # Chan et al. pairwise update
+        delta = block_mean - mean
+        total = count + n
+        mean += delta * n / total
+        m2 += block_m2 + delta * delta * count * n / total
+        count = total
+    return m2 / count if count else 0.0
+
+
+# Peak working memory of one Richardson-Lucy tile, in bytes per padded voxel:
+# observed, estimate, spare, prediction, step and two acceleration buffers
+# (float32), plus the half-spectrum (complex64) and the inverse-FFT output
+_TILE_BYTES_PER_VOXEL = 52
+
+_TILE_METHODS = {
+    "richardson_lucy": richardson_lucy_deconvolution,
+    "wiener": wiener_deconvolution,
+}
+
+
+@benchmark
+def tiled_deconvolution(
+    volume: Any,
+    psf: np.ndarray,
+    method: str = "richardson_lucy",
+    tile_shape: Optional[Tuple[int, int, int]] = None,
+    memory_budget_mb: Optional[float] = None,
+    halo: Optional[Tuple[int, int, int]] = None,
+    max_workers: Optional[int] = None,
+    executor: str = "thread",
+    out: Optional[np.ndarray] = None,
+    progress_callback: Optional[Callable[[float], None]] = None,
+    return_info: bool = False,
+    **method_kwargs: Any
+) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, Any]]]:
+    """
+    Block-wise deconvolution for volumes that do not fit in memory.
+
+    The volume is split into a grid of core tiles. Each tile is read with a
+    halo of one PSF extent on every interior side (volume borders keep the
+    zero boundary of the untiled algorithms), deconvolved independently,
+    and written back with linear blending ramps across each seam. The ramps
+    form a partition of unity, so tiles are accumulated straight into the
+    output without a weight volume.
+
+    Tiles are read with ``volume[slices]``, so NumPy arrays, memmaps and
+    dask arrays (``ImageLoader.load_image(lazy=True)``) are accepted; only
+    the tiles in flight are held in memory. ``out`` may be any writable
+    array (e.g. ``np.lib.format.open_memmap``) to keep the result on disk.
+
+    Tile size comes from, in order: ``tile_shape``, ``memory_budget_mb``,
+    the ``ZSTACK_MEMORY_BUDGET_MB`` environment variable, and
+    ``DeviceManager.estimate_max_volume_size``; the budget is shared by
+    all workers.
+
+    Args:
+        volume: 3D volume (z, y, x), NumPy or dask array
+        psf: Point spread function
+        method: "richardson_lucy" or "wiener"
+        tile_shape: Core tile shape (z, y, x); derived from the budget if None
+        memory_budget_mb: Working-memory budget for all tiles in flight
+        halo: Halo per axis (None = PSF extent)
+        max_workers: Parallel tiles (None = CPU count, capped at 4)
+        executor: "thread" or "process"
+        out: Optional output array (float32, same shape as volume)
+        progress_callback: Progress callback
+        return_info: Also return a dict with the tiling and, for
+            Richardson-Lucy, the per-tile convergence info
+        **method_kwargs: Passed to the per-tile deconvolution (iterations,
+            accelerate, noise_variance, ...). Thread workers default to
+            ``convolution="fft"``.
+
+    Returns:
+        Deconvolved volume (float32, ``out`` if given), or (volume, info) if
+        return_info is True
+    """
+    if method not in _TILE_METHODS:
+        raise ValueError(f"Unknown tiled deconvolution method: {method}")
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor: {executor}")
+
+    if progress_callback:
+        progress_callback(0.0)
+
+    shape = tuple(int(n) for n in volume.shape)
+    psf = _trim_psf(np.asarray(psf, dtype=np.float32))
+
+    if halo is None:
+        halo = psf.shape
+    halo = tuple(min(int(h), n) for h, n in zip(halo, shape))
+
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, 4)
+
+    if tile_shape is None:
+        tile_shape = _tile_shape_for_budget(shape, halo, _tile_budget_voxels(memory_budget_mb, max_workers))
+    tile_shape = tuple(min(max(int(t), 1), n) for t, n in zip(tile_shape, shape))
+
+    # Blend over half the halo on each side of a seam, so both neighbours
+    # are still at least half a halo away from their own cut
+    blend = tuple(min(h // 2, t // 2) for h, t in zip(halo, tile_shape))
+
+    if method == "wiener":
+        # One regularization for all tiles, or the seams would not match
+        noise_variance, signal_variance = _estimate_wiener_variances(
+            volume, method_kwargs.pop("noise_variance", None), method_kwargs.pop("signal_variance", None)
+        )
+        method_kwargs.update(noise_variance=noise_variance, signal_variance=signal_variance)
+    elif executor == "thread":
+        # tinygrad is not thread-safe, so concurrent tiles convolve on the
+        # host (scipy.fft releases the GIL) unless a method is requested
+        method_kwargs.setdefault("convolution", "fft")
+
+    if out is None:
+        out = np.zeros(shape, dtype=np.float32)
+    else:
+        out[...] = 0
+
+    grid = [range(0, n, t) for n, t in zip(shape, tile_shape)]
+    tiles = [
+        tuple((start, min(start + t, n)) for start, t, n in zip(corner, tile_shape, shape))
+        for corner in itertools.product(*grid)
+    ]
+
+    logger.info(
+        f"Tiled {method} deconvolution: {len(tiles)} tiles of {tile_shape} "
+        f"(halo {halo}, {max_workers} {executor} workers)"
+    )
+
+    pool_class = ThreadPoolExecutor if executor == "thread" else ProcessPoolExecutor
+
+    # Concurrent tiles share the FFT threads instead of each using all of them
+    fft_workers = max(get_fft_backend().workers // max_workers, 1)
+
+    with pool_class(max_workers=max_workers) as pool:
+        pending = {}
+        tile_info = []
+        queue = iter(tiles)
+        done_count = 0
+
+        def submit(core: Tuple[Tuple[int, int], ...]) -> None:
+            read = tuple(
+                slice(max(start - h, 0), min(stop + h, n))
+                for (start, stop), h, n in zip(core, halo, shape)
+            )
+            tile = np.asarray(volume[read], dtype=np.float32)
+            future = pool.submit(_deconvolve_tile, method, tile, psf, method_kwargs, fft_workers)
+            pending[future] = (core, read)
+
+        # Keep at most two tiles per worker in memory
+        for core in itertools.islice(queue, 2 * max_workers):
+            submit(core)
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                core, read = pending.pop(future)
+                result, info = future.result()
+                _blend_tile(out, result, core, read, blend, shape)
+                if info is not None:
+                    tile_info.append(dict(info, tile=tuple(start for start, _ in core)))
+
+                done_count += 1
+                if progress_callback:
+                    progress_callback(done_count / len(tiles))
+
+                following = next(queue, None)
+                if following is not None:
+                    submit(following)
+
+    logger.info(f"Tiled {method} deconvolution completed ({len(tiles)} tiles)")
+
+    if return_info:
+        return out, {
+            "tiles": len(tiles),
+            "tile_shape": tile_shape,
+            "halo": halo,
+            "workers": max_workers,
+            "executor": executor,
+            "tile_info": sorted(tile_info, key=lambda info: info["tile"]),
+        }
+
+    return out
+
+
+def _deconvolve_tile(
+    method: str,
+    tile: np.ndarray,
+    psf: np.ndarray,
+    kwargs: Dict[str, Any],
+    fft_workers: Optional[int] = None
+) -> Tuple[np.ndarray, Optional[Dict[str, Any]]]:
+    """Deconvolve one tile (module-level so process pools can pickle it)."""
+    with limit_fft_workers(fft_workers or get_fft_backend().workers):
+        if method == "richardson_lucy":
+            return richardson_lucy_deconvolution(tile, psf, return_info=True, **kwargs)
+        return wiener_deconvolution(tile, psf, **kwargs), None
+
+
+def _tile_budget_voxels(memory_budget_mb: Optional[float], workers: int) -> int:
+    """Maximum padded voxels per tile for a memory budget shared by all workers."""
+    if memory_budget_mb is None and os.environ.get("ZSTACK_MEMORY_BUDGET_MB"):
+        memory_budget_mb = float(os.environ["ZSTACK_MEMORY_BUDGET_MB"])
+
+    if memory_budget_mb is not None:
+        voxels = memory_budget_mb * 1024**2 / _TILE_BYTES_PER_VOXEL
+    else:
+        # Already accounts for processing overhead
+        voxels = float(np.prod(_device_manager.estimate_max_volume_size(dtypes.float32)))
+
+    return max(int(voxels / workers), 1)
+
+
+def _tile_shape_for_budget(
+    shape: Tuple[int, ...],
+    halo: Tuple[int, ...],
+    max_voxels: int
+) -> Tuple[int, ...]:
+    """
+    Largest core tile (halving the longest axis) whose padded size fits max_voxels.
+
+    Cores are kept at least two halos long so seams stay blendable; if the
+    budget cannot be met the smallest such tile is used.
+    """
+    tile = list(shape)
+    minimum = [max(2 * h, 1) for h in halo]
+
+    def padded(t: List[int]) -> int:
+        return int(np.prod([min(c + 2 * h, n) for c, h, n in zip(t, halo, shape)]))
+
+    while padded(tile) > max_voxels:
+        candidates = [i for i in range(len(tile)) if (tile[i] + 1) // 2 >= minimum[i] and tile[i] > 1]
+        if not candidates:
+            logger.warning(
+                f"Memory budget too small for halo {halo}: using tiles of {tuple(tile)} "
+                f"({padded(tile) * _TILE_BYTES_PER_VOXEL / 1024**2:.0f}MB each)"
+            )
+            break
+        axis = max(candidates, key=lambda i: tile[i])
+        tile[axis] = (tile[axis] + 1) // 2
+
+    return tuple(tile)
+
+
+def _blend_tile(
+    out: np.ndarray,
+    result: np.ndarray,
+    core: Tuple[Tuple[int, int], ...],
+    read: Tuple[slice, ...],
+    blend: Tuple[int, ...],
+    shape: Tuple[int, ...]
+) -> None:
+    """
+    Accumulate a deconvolved tile into the output with linear seam ramps.
+
+    Along each axis the tile contributes over its core extended by ``blend``
+    on interior sides, with weight ramping linearly from 0 to 1 across
+    [start - blend, start + blend) and back down across [stop - blend,
+    stop + blend). Neighbouring ramps sum to 1.
+    """
+    region = []
+    weights = []
+    for (start, stop), b, n, r in zip(core, blend, shape, read):
+        lo = start - b if start > 0 else 0
+        hi = min(stop + b, n)
+        positions = np.arange(lo, hi) + 0.5
+        weight = np.ones(hi - lo, dtype=np.float32)
+        if start > 0 and b > 0:
+            weight = np.minimum(weight, np.clip((positions - (start - b)) / (2 * b), 0, 1))
+        if stop < n and b > 0:
+            weight = np.minimum(weight, np.clip(((stop + b) - positions) / (2 * b), 0, 1))
+        region.append(slice(lo, hi))
+        weights.append((slice(lo - r.start, hi - r.start), weight))
+
+    window = weights[0][1][:, None, None] * weights[1][1][None, :, None] * weights[2][1][None, None, :]
+    local = tuple(w[0] for w in weights)
+    out[tuple(region)] += result[local] * window
 
 
 @benchmark
@@ -386,43 +1189,39 @@ def _generate_airy_psf(
 
     logger.info(f"PSF resolution: lateral={lateral_res:.3f}μm, axial={axial_res:.3f}μm")
 
-    # Create coordinate grids in micrometers
+    # Coordinates in micrometers
     z = (np.arange(sz) - sz // 2) * vz
     y = (np.arange(sy) - sy // 2) * vy
     x = (np.arange(sx) - sx // 2) * vx
 
-    zz, yy, xx = np.meshgrid(z, y, x, indexing='ij')
+    # Radial distance in XY plane (one plane; the model is separable in z)
+    r = np.hypot(y[:, None], x[None, :])
 
     if progress_callback:
         progress_callback(0.5)
 
-    # Radial distance in XY plane
-    r = np.sqrt(xx**2 + yy**2)
-
-    # Normalized coordinates
-    v = (2 * np.pi * numerical_aperture * r) / wavelength
-    u = (2 * np.pi * numerical_aperture**2 * np.abs(zz)) / wavelength
+    # Airy disk in XY (2J₁(v)/v)², v = 2π NA r / λ. Evaluated on a 1D radial
+    # profile sampled every 1/128 in v (interpolation error < 1e-5) and
+    # interpolated over the plane, instead of calling j1 on every voxel.
+    v_scale = 2 * np.pi * numerical_aperture / wavelength
+    v_profile = np.arange(0.0, r.max() * v_scale + 1 / 64, 1 / 128)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        airy_profile = (2 * j1(v_profile) / v_profile) ** 2
+    airy_profile[0] = 1.0
+    airy_xy = np.interp(r * v_scale, v_profile, airy_profile)
 
     if progress_callback:
         progress_callback(0.7)
 
-    # Airy disk in XY (2J₁(v)/v)²
-    # Use approximation to avoid singularity at v=0
-    with np.errstate(divide='ignore', invalid='ignore'):
-        from scipy.special import j1
-        airy_xy = (2 * j1(v) / (v + 1e-10)) ** 2
-        airy_xy[v == 0] = 1.0
-
-    # Axial component (sin(u/4)/(u/4))²
-    with np.errstate(divide='ignore', invalid='ignore'):
-        airy_z = (np.sin(u / 4) / (u / 4 + 1e-10)) ** 2
-        airy_z[u == 0] = 1.0
+    # Axial component (sin(u/4)/(u/4))², u = 2π NA² |z| / λ
+    u = (2 * np.pi * numerical_aperture**2 * np.abs(z)) / wavelength
+    airy_z = np.sinc(u / (4 * np.pi)) ** 2
 
     if progress_callback:
         progress_callback(0.9)
 
     # Combine XY and Z components
-    psf = airy_xy * airy_z
+    psf = airy_z[:, None, None] * airy_xy[None, :, :]
 
     # Normalize
     psf = psf / psf.sum()
@@ -439,74 +1238,312 @@ def estimate_psf_from_beads(
     bead_volume: np.ndarray,
     bead_coordinates: Optional[List[Tuple[int, int, int]]] = None,
     psf_size: Tuple[int, int, int] = (31, 31, 31),
-    progress_callback: Optional[Callable[[float], None]] = None
-) -> np.ndarray:
+    progress_callback: Optional[Callable[[float], None]] = None,
+    threshold: float = 0.1,
+    min_distance: int = 3,
+    upsample_factor: int = 10,
+    outlier_threshold: float = 3.0,
+    return_info: bool = False
+) -> Union[np.ndarray, Tuple[np.ndarray, Dict[str, Any]]]:
     """
     Estimate empirical PSF from fluorescent bead images.
 
-    Averages PSF measurements from multiple isolated beads.
+    Averages sub-voxel registered measurements from multiple isolated beads:
+    1. Candidates are the local maxima of a lightly smoothed volume above
+       ``threshold``; beads whose PSF-sized crops overlap are dropped.
+    2. All crops are gathered with one fancy-indexing read, and each crop's
+       background (median of its border) is subtracted.
+    3. Crops are registered to the (centered) mean bead by phase
+       correlation, batched over all beads, and refined to
+       1 / upsample_factor voxel with a local upsampled DFT. Each crop is
+       then shifted by the Fourier shift theorem.
+    4. Beads whose correlation with the mean or whose brightness deviate by
+       more than ``outlier_threshold`` robust z-scores (doublets, clumps,
+       debris) are rejected before the final average.
 
     Args:
         bead_volume: 3D volume containing fluorescent beads
         bead_coordinates: List of (z, y, x) bead centers (auto-detected if None)
         psf_size: Size of extracted PSF (should be odd)
         progress_callback: Progress callback
+        threshold: Detection threshold as a fraction of the brightest peak
+            above the background
+        min_distance: Minimum distance between detected peaks (voxels)
+        upsample_factor: Sub-voxel registration precision (1/voxels)
+        outlier_threshold: Robust z-score above which a bead is rejected
+        return_info: Also return a dict with bead counts, sub-voxel centers
+            and rejection reasons
 
     Returns:
-        Averaged empirical PSF
+        Averaged empirical PSF (float32, normalized), or (psf, info) if
+        return_info is True
     """
     if progress_callback:
         progress_callback(0.0)
 
+    volume = np.asarray(bead_volume, dtype=np.float32)
+    psf_size = tuple(int(s) for s in psf_size)
+    half_size = np.array([s // 2 for s in psf_size])
+
     # Auto-detect beads if coordinates not provided
     if bead_coordinates is None:
-        from skimage.feature import blob_log
-        blobs = blob_log(
-            bead_volume,
-            min_sigma=1,
-            max_sigma=5,
-            num_sigma=10,
-            threshold=0.1
-        )
-        bead_coordinates = [(int(b[0]), int(b[1]), int(b[2])) for b in blobs]
-        logger.info(f"Detected {len(bead_coordinates)} beads")
+        centers = _detect_bead_candidates(volume, threshold, min_distance)
+        logger.info(f"Detected {len(centers)} bead candidates")
+    else:
+        centers = np.rint(np.asarray(bead_coordinates, dtype=np.float64)).astype(np.int64).reshape(-1, 3)
+
+    detected = len(centers)
+
+    # Keep beads whose crop lies inside the volume and overlaps no other crop
+    inside = np.all((centers >= half_size) & (centers < np.array(volume.shape) - half_size), axis=1)
+    centers = centers[inside]
+    isolated = _isolated_beads(centers, half_size)
+    centers = centers[isolated]
+
+    if len(centers) == 0:
+        raise ValueError("No valid beads found for PSF estimation")
 
     if progress_callback:
         progress_callback(0.3)
 
-    # Extract PSF regions around each bead
-    psf_stack = []
-    half_size = tuple(s // 2 for s in psf_size)
+    crops = _gather_crops(volume, centers, psf_size)
 
-    for i, (z, y, x) in enumerate(bead_coordinates):
-        # Check if bead is far enough from edges
-        if (z >= half_size[0] and z < bead_volume.shape[0] - half_size[0] and
-            y >= half_size[1] and y < bead_volume.shape[1] - half_size[1] and
-            x >= half_size[2] and x < bead_volume.shape[2] - half_size[2]):
+    # Subtract each crop's background (median of its border voxels)
+    border = np.ones(psf_size, dtype=bool)
+    border[tuple(slice(1, -1) for _ in psf_size)] = False
+    crops -= np.median(crops[:, border], axis=1)[:, np.newaxis, np.newaxis, np.newaxis]
+    brightness = crops.sum(axis=(1, 2, 3), dtype=np.float64)
+    valid = brightness > 0
+    crops, centers, brightness = crops[valid], centers[valid], brightness[valid]
+
+    if len(crops) == 0:
+        raise ValueError("No valid beads found for PSF estimation")
 
-            psf_region = bead_volume[
-                z - half_size[0]:z + half_size[0] + 1,
-                y - half_size[1]:y + half_size[1] + 1,
-                x - half_size[2]:x + half_size[2] + 1
-            ]
+    crops /= brightness[:, np.newaxis, np.newaxis, np.newaxis].astype(np.float32)
 
-            # Normalize PSF region
-            psf_region = psf_region / psf_region.sum()
-            psf_stack.append(psf_region)
+    if progress_callback:
+        progress_callback(0.4)
 
-        if progress_callback and i % max(1, len(bead_coordinates) // 10) == 0:
-            progress_callback(0.3 + 0.6 * i / len(bead_coordinates))
+    # Register to the mean bead twice: the second pass uses the sharper
+    # average of the first
+    reference = _center_psf(crops.mean(axis=0))
+    shifts = np.zeros((len(crops), 3))
+    for _ in range(2):
+        shifts = _register_to_reference(crops, reference, upsample_factor)
+        aligned = _fourier_shift(crops, -shifts)
+        reference = _center_psf(aligned.mean(axis=0))
 
-    if len(psf_stack) == 0:
-        raise ValueError("No valid beads found for PSF estimation")
+    if progress_callback:
+        progress_callback(0.8)
+
+    # Reject beads unlike the mean (correlation) or too bright/dim (clumps)
+    flat = aligned.reshape(len(aligned), -1)
+    centered_reference = reference.ravel() - reference.mean()
+    centered = flat - flat.mean(axis=1, keepdims=True)
+    correlation = centered @ centered_reference / (
+        np.linalg.norm(centered, axis=1) * np.linalg.norm(centered_reference) + 1e-30
+    )
+    shape_outliers = _robust_z(correlation) < -outlier_threshold
+    brightness_outliers = np.abs(_robust_z(np.log(brightness))) > outlier_threshold
+    keep = ~(shape_outliers | brightness_outliers)
+
+    if not keep.any():
+        raise ValueError("All beads were rejected as outliers")
 
     # Average PSFs
-    psf_empirical = np.mean(psf_stack, axis=0)
-    psf_empirical = psf_empirical / psf_empirical.sum()
+    psf_empirical = _center_psf(aligned[keep].mean(axis=0))
+    np.maximum(psf_empirical, 0, out=psf_empirical)
+    psf_empirical /= psf_empirical.sum()
 
     if progress_callback:
         progress_callback(1.0)
 
-    logger.info(f"Estimated empirical PSF from {len(psf_stack)} beads")
+    logger.info(
+        f"Estimated empirical PSF from {int(keep.sum())} of {detected} beads "
+        f"({int(shape_outliers.sum())} shape and {int(brightness_outliers.sum())} brightness outliers)"
+    )
+
+    psf_empirical = psf_empirical.astype(np.float32)
+
+    if return_info:
+        return psf_empirical, {
+            "beads_detected": detected,
+            "beads_isolated": int(isolated.sum()),
+            "beads_used": int(keep.sum()),
+            "shape_outliers": int(shape_outliers.sum()),
+            "brightness_outliers": int(brightness_outliers.sum()),
+            "centers": (centers[keep] + shifts[keep]).tolist(),
+            "correlation": correlation[keep].tolist(),
+        }
+
+    return psf_empirical
+
+
+def _detect_bead_candidates(volume: np.ndarray, threshold: float, min_distance: int) -> np.ndarray:
+    """
+    Find bead candidates as local maxima of a lightly smoothed volume.
+
+    Args:
+        volume: Bead volume (float32)
+        threshold: Fraction of the brightest peak above the background
+        min_distance: Half-width of the local-maximum window
+
+    Returns:
+        (N, 3) integer peak coordinates
+    """
+    smoothed = gaussian_blur_3d(volume, sigma=1.0, method="fir")
+    background = float(np.median(smoothed))
+    level = background + threshold * (float(smoothed.max()) - background)
+
+    peaks = smoothed == ndimage.maximum_filter(smoothed, size=2 * min_distance + 1, mode="nearest")
+    peaks &= smoothed > level
+    return np.argwhere(peaks)
+
 
-    return psf_empirical.astype(np.float32)
+def _isolated_beads(centers: np.ndarray, half_size: np.ndarray) -> np.ndarray:
+    """Mask of beads whose PSF-sized crop contains no other bead center."""
+    isolated = np.ones(len(centers), dtype=bool)
+    if len(centers) < 2:
+        return isolated
+
+    from scipy.spatial import cKDTree
+
+    # Chebyshev distance in half-crop units: < 1 means inside the crop
+    tree = cKDTree(centers / np.maximum(half_size, 1))
+    pairs = tree.query_pairs(r=1.0 - 1e-9, p=np.inf, output_type="ndarray")
+    isolated[pairs.ravel()] = False
+    return isolated
+
+
+def _gather_crops(volume: np.ndarray, centers: np.ndarray, size: Tuple[int, int, int]) -> np.ndarray:
+    """Gather (N, *size) crops centered on integer centers in one indexing read."""
+    index = [
+        (centers[:, axis, np.newaxis] + np.arange(n) - n // 2).reshape(
+            (-1,) + tuple(n if a == axis else 1 for a in range(3))
+        )
+        for axis, n in enumerate(size)
+    ]
+    return volume[index[0], index[1], index[2]].astype(np.float32)
+
+
+def _robust_z(values: np.ndarray) -> np.ndarray:
+    """Robust z-scores (median / scaled MAD)."""
+    median = np.median(values)
+    mad = 1.4826 * np.median(np.abs(values - median))
+    if mad == 0:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - median) / mad
+
+
+def _center_psf(psf: np.ndarray) -> np.ndarray:
+    """Shift a PSF so its intensity centroid is the center voxel (sub-voxel)."""
+    weights = np.maximum(psf, 0)
+    total = weights.sum()
+    if total <= 0:
+        return psf
+
+    center = np.array([(n - 1) / 2 for n in psf.shape])
+    centroid = np.array([
+        (weights.sum(axis=tuple(a for a in range(3) if a != axis)) * np.arange(n)).sum() / total
+        for axis, n in enumerate(psf.shape)
+    ])
+    return _fourier_shift(psf[np.newaxis], (center - centroid)[np.newaxis])[0]
+
+
+def _fourier_shift(crops: np.ndarray, shifts: np.ndarray) -> np.ndarray:
+    """
+    Shift a batch of crops by sub-voxel amounts (circularly, via FFT).
+
+    Args:
+        crops: (N, kz, ky, kx) crops
+        shifts: (N, 3) shifts in voxels (positive moves content up the axis)
+
+    Returns:
+        Shifted crops (float32)
+    """
+    size = crops.shape[1:]
+    backend = get_fft_backend()
+    spectrum = backend.rfftn(crops, axes=(1, 2, 3))
+    for axis, n in enumerate(size):
+        frequencies = sp_fft.rfftfreq(n) if axis == 2 else sp_fft.fftfreq(n)
+        shape = [-1, 1, 1, 1]
+        shape[axis + 1] = len(frequencies)
+        phase = np.exp(-2j * np.pi * shifts[:, axis, np.newaxis] * frequencies).astype(np.complex64)
+        spectrum *= phase.reshape(shape)
+    return backend.irfftn(spectrum, s=size, axes=(1, 2, 3)).astype(np.float32)
+
+
+# Beads registered per batch (bounds the complex spectra held at once)
+_REGISTRATION_BATCH = 64
+
+
+def _register_to_reference(crops: np.ndarray, reference: np.ndarray, upsample_factor: int) -> np.ndarray:
+    """
+    Sub-voxel shifts of each crop relative to a reference, by phase correlation.
+
+    The normalized cross-power spectrum is restricted to frequencies where
+    the reference has signal (noise-only frequencies would dominate the
+    whitened spectrum). The integer peak of its inverse FFT is refined by
+    evaluating the correlation on a 1 / upsample_factor grid within one
+    voxel of the peak, as three batched matrix products (upsampled DFT,
+    Guizar-Sicairos et al. 2008).
+
+    Args:
+        crops: (N, kz, ky, kx) crops
+        reference: (kz, ky, kx) reference
+        upsample_factor: Grid refinement
+
+    Returns:
+        (N, 3) shifts of each crop relative to the reference (voxels)
+    """
+    size = reference.shape
+    backend = get_fft_backend()
+    reference_spectrum = backend.fftn(reference)
+    magnitude = np.abs(reference_spectrum)
+    support = magnitude > 1e-3 * magnitude.max()
+    reference_conj = np.conjugate(reference_spectrum) * support
+
+    frequencies = [sp_fft.fftfreq(n) for n in size]
+    offsets = np.arange(-upsample_factor, upsample_factor + 1) / upsample_factor
+    shifts = np.zeros((len(crops), 3))
+
+    for start in range(0, len(crops), _REGISTRATION_BATCH):
+        batch = crops[start:start + _REGISTRATION_BATCH]
+        cross = backend.fftn(batch, axes=(1, 2, 3)) * reference_conj
+        cross /= np.maximum(np.abs(cross), 1e-30)
+
+        # Integer peak
+        correlation = backend.ifftn(cross, axes=(1, 2, 3)).real
+        peak = np.array(np.unravel_index(correlation.reshape(len(batch), -1).argmax(axis=1), size)).T
+        peak = np.where(peak > np.array(size) // 2, peak - np.array(size), peak).astype(np.float64)
+
+        # Upsampled correlation around the peak: one DFT matrix per axis and bead
+        kernels = [
+            np.exp(2j * np.pi * (peak[:, axis, np.newaxis, np.newaxis] + offsets[:, np.newaxis]) * frequencies[axis])
+            for axis in range(3)
+        ]
+        local = np.einsum("nzyx,nax->nzya", cross, kernels[2], optimize=True)
+        local = np.einsum("nzya,nby->nzba", local, kernels[1], optimize=True)
+        local = np.einsum("nzba,ncz->ncba", local, kernels[0], optimize=True).real
+
+        best = np.array(np.unravel_index(local.reshape(len(batch), -1).argmax(axis=1), local.shape[1:])).T
+        refined = peak + offsets[best]
+
+        # Parabolic interpolation between the upsampled grid points
+        rows = np.arange(len(batch))
+        for axis in range(3):
+            index = [rows] + [best[:, a] for a in range(3)]
+            center = local[tuple(index)]
+            interior = (best[:, axis] > 0) & (best[:, axis] < len(offsets) - 1)
+            lower = list(index)
+            upper = list(index)
+            lower[axis + 1] = np.clip(best[:, axis] - 1, 0, len(offsets) - 1)
+            upper[axis + 1] = np.clip(best[:, axis] + 1, 0, len(offsets) - 1)
+            below, above = local[tuple(lower)], local[tuple(upper)]
+            curvature = below - 2 * center + above
+            step = np.where(interior & (curvature < 0), 0.5 * (below - above) / np.where(curvature < 0, curvature, -1), 0.0)
+            refined[:, axis] += np.clip(step, -0.5, 0.5) / upsample_factor
+
+        shifts[start:start + len(batch)] = refined
+
+    return shifts
@@ -6,15 +6,26 @@ provides utilities for optimal device configuration.
 """
 
 import logging
+import os
 from typing import Optional, Dict, Any
 from functools import lru_cache
 
+import numpy as np
+
 from tinygrad.device import Device
 from tinygrad.tensor import Tensor
 from tinygrad.dtype import dtypes
 
 logger = logging.getLogger(__name__)
 
+# Storage dtypes for each precision policy. Reductions and convolution
+# sums always accumulate in float32 (see get_accumulator_dtype).
+PRECISION_DTYPES = {
+    "float32": dtypes.float32,
+    "float16": dtypes.float16,
+    "bfloat16": dtypes.bfloat16,
+}
+
 
 class DeviceManager:
     """Manages GPU device selection and configuration for tinygrad operations."""
@@ -22,6 +33,8 @@ class DeviceManager:
     _instance: Optional['DeviceManager'] = None
     _device: Optional[str] = None
     _device_info: Dict[str, Any] = {}
+    _precision: str = "float32"
+    _dtype_support: Dict[str, bool] = {}
 
     def __new__(cls):
         """Singleton pattern to ensure single device manager instance."""
@@ -35,6 +48,11 @@ class DeviceManager:
             self._initialized = True
             self._detect_device()
 
+            # Opt-in reduced precision (ZSTACK_PRECISION=float16|bfloat16)
+            precision = os.environ.get("ZSTACK_PRECISION")
+            if precision:
+                self.set_precision(precision)
+
     def _detect_device(self) -> None:
         """
         Detect and configure the best available GPU device.
@@ -149,19 +167,84 @@ class DeviceManager:
         """Check if using Metal device."""
         return self._device == "METAL"
 
+    @property
+    def precision(self) -> str:
+        """Get the active precision policy ("float32", "float16", "bfloat16")."""
+        return self._precision
+
+    def set_precision(self, precision: str) -> str:
+        """
+        Set the storage precision policy for device tensors.
+
+        Reduced precision halves the memory of every stored volume and
+        intermediate. Kernels still accumulate sums and reductions in float32.
+        If the device cannot run the requested dtype, float32 is kept.
+
+        Args:
+            precision: "float32", "float16" or "bfloat16"
+
+        Returns:
+            The precision actually in effect
+        """
+        if precision not in PRECISION_DTYPES:
+            raise ValueError(
+                f"Unknown precision: {precision} (expected one of {', '.join(PRECISION_DTYPES)})"
+            )
+
+        if precision != "float32" and not self.supports_dtype(PRECISION_DTYPES[precision]):
+            logger.warning(f"{precision} is not supported on {self.device}, keeping float32")
+            precision = "float32"
+
+        DeviceManager._precision = precision
+        logger.info(f"Precision policy: {precision} storage, float32 accumulation")
+        return precision
+
+    def supports_dtype(self, dtype) -> bool:
+        """
+        Check whether the current device can compute in a dtype.
+
+        Runs a tiny cast round-trip once per dtype, since a backend may
+        advertise a type its compiler cannot build.
+
+        Args:
+            dtype: tinygrad dtype
+
+        Returns:
+            True if the dtype works on the device
+        """
+        key = f"{self.device}:{dtype}"
+        if key not in self._dtype_support:
+            try:
+                probe = Tensor([1.5, -2.0], device=self.device).cast(dtype)
+                result = (probe * 2).cast(dtypes.float32).numpy()
+                self._dtype_support[key] = bool(np.allclose(result, [3.0, -4.0]))
+            except Exception as e:
+                logger.debug(f"{dtype} unavailable on {self.device}: {e}")
+                self._dtype_support[key] = False
+        return self._dtype_support[key]
+
     def get_optimal_dtype(self) -> dtypes:
         """
-        Get optimal data type for current device.
+        Get the storage data type for device tensors.
 
         Returns:
-            dtypes.float32 for GPU (best performance/precision tradeoff)
-            dtypes.float32 for CPU
+            dtypes.float32 by default (microscopy quantitative analysis needs
+            float32 precision); float16/bfloat16 under a reduced precision policy
         """
-        # float32 is optimal for most microscopy operations
-        # float16 could be used for memory-constrained scenarios but
-        # microscopy quantitative analysis needs float32 precision
+        return PRECISION_DTYPES[self._precision]
+
+    def get_accumulator_dtype(self) -> dtypes:
+        """Get the data type used for sums and reductions (always float32)."""
         return dtypes.float32
 
+    def get_host_dtype(self) -> np.dtype:
+        """
+        Get the NumPy dtype for volumes kept in host memory between passes.
+
+        NumPy has no bfloat16, so both reduced policies store float16.
+        """
+        return np.dtype(np.float32 if self._precision == "float32" else np.float16)
+
     @lru_cache(maxsize=1)
     def get_device_memory_info(self) -> Dict[str, Any]:
         """
@@ -220,12 +303,13 @@ class DeviceManager:
             "used": 0,
         }
 
-    def estimate_max_volume_size(self, dtype=dtypes.float32, safety_factor: float = 0.7) -> tuple[int, int, int]:
+    def estimate_max_volume_size(self, dtype=None, safety_factor: float = 0.7) -> tuple[int, int, int]:
         """
         Estimate maximum 3D volume dimensions that can fit in device memory.
 
         Args:
-            dtype: Data type for computation
+            dtype: Data type for computation (None = storage dtype of the
+                precision policy)
             safety_factor: Use only this fraction of available memory (0.0-1.0)
 
         Returns:
@@ -237,8 +321,10 @@ class DeviceManager:
         # Account for safety factor and intermediate buffers (3x for processing overhead)
         usable_bytes = available_bytes * safety_factor / 3
 
-        # float32 = 4 bytes per element
-        bytes_per_element = 4 if dtype == dtypes.float32 else 2
+        # float32 = 4 bytes per element, float16/bfloat16 = 2
+        if dtype is None:
+            dtype = self.get_optimal_dtype()
+        bytes_per_element = dtype.itemsize
 
         # Estimate cubic volume
         elements = usable_bytes / bytes_per_element
@@ -0,0 +1,284 @@
+"""
+Device-resident volume handles and host<->device transfer accounting.
+
+Kernels in this package accept either a NumPy array or a ``DeviceVolume``.
+When given a ``DeviceVolume`` they return one too, so a chain such as
+blur -> gradient -> Laplacian keeps its intermediates on the tinygrad
+device and only copies to host memory when a consumer actually needs it.
+A handle uploads its host data at most once and downloads its device data
+at most once; both copies are kept for later consumers.
+
+Every copy made through ``to_tensor``/``to_numpy``/``DeviceVolume`` is
+recorded, so ``track_transfers`` can report the bytes moved per job.
+Device copies use the storage dtype of the DeviceManager precision policy
+(float32 unless reduced precision is enabled); host copies made from the
+device are always float32.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from tinygrad.tensor import Tensor
+from tinygrad.dtype import dtypes
+
+from .device_manager import DeviceManager
+
+logger = logging.getLogger(__name__)
+_device_manager = DeviceManager()
+
+
+class TransferStats:
+    """Host<->device transfer counters for one job."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.host_to_device_bytes = 0
+        self.device_to_host_bytes = 0
+        self.host_to_device_count = 0
+        self.device_to_host_count = 0
+
+    def record(self, direction: str, nbytes: int) -> None:
+        """
+        Record one transfer.
+
+        Args:
+            direction: "h2d" (host to device) or "d2h" (device to host)
+            nbytes: Number of bytes copied
+        """
+        with self._lock:
+            if direction == "h2d":
+                self.host_to_device_bytes += nbytes
+                self.host_to_device_count += 1
+            else:
+                self.device_to_host_bytes += nbytes
+                self.device_to_host_count += 1
+
+    @property
+    def total_bytes(self) -> int:
+        """Total bytes moved in both directions."""
+        return self.host_to_device_bytes + self.device_to_host_bytes
+
+    def as_dict(self) -> Dict[str, int]:
+        """Get the counters as a plain dict."""
+        with self._lock:
+            return {
+                "host_to_device_bytes": self.host_to_device_bytes,
+                "device_to_host_bytes": self.device_to_host_bytes,
+                "host_to_device_count": self.host_to_device_count,
+                "device_to_host_count": self.device_to_host_count,
+                "total_bytes": self.host_to_device_bytes + self.device_to_host_bytes,
+            }
+
+
+# Trackers active in the current context (outermost first)
+_active_trackers: ContextVar[Tuple[TransferStats, ...]] = ContextVar("zstack_transfer_trackers", default=())
+
+
+@contextmanager
+def track_transfers() -> Iterator[TransferStats]:
+    """
+    Count host<->device transfers made inside the block.
+
+    Tracking follows the current context, so work submitted to an executor
+    is only counted when it runs in a copy of the caller's context
+    (``contextvars.copy_context().run``). Nested trackers all see the
+    transfers made in the innermost block.
+
+    Yields:
+        TransferStats updated as transfers happen
+    """
+    stats = TransferStats()
+    token = _active_trackers.set(_active_trackers.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active_trackers.reset(token)
+
+
+def record_transfer(direction: str, nbytes: int) -> None:
+    """Record a transfer with every active tracker."""
+    for stats in _active_trackers.get():
+        stats.record(direction, nbytes)
+
+
+# Largest finite float16 value; larger inputs stay float32
+_FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+
+def host_to_tensor(array: np.ndarray, device: Optional[str] = None) -> Tensor:
+    """
+    Upload a host array in the storage dtype of the precision policy.
+
+    float16 is converted on the host so only half the bytes are copied.
+    bfloat16 has no NumPy type and is cast on the device after a float32
+    upload. Unsigned integer data of up to 16 bits (camera counts) is
+    always stored in float16, with counts above 65504 clipped to it (float16
+    spacing there is 32 counts anyway). Other volumes outside the float16
+    range are kept in float32, with a warning.
+
+    Args:
+        array: Host array
+        device: Target device (None = use default)
+
+    Returns:
+        Device tensor
+    """
+    if device is None:
+        device = _device_manager.device
+
+    storage = _device_manager.get_optimal_dtype()
+
+    saturating = array.dtype.kind == "u" and array.dtype.itemsize <= 2
+    if storage == dtypes.float16 and array.size and not saturating:
+        if np.issubdtype(array.dtype, np.floating) or array.dtype.itemsize > 1:
+            if max(float(array.max()), -float(array.min())) > _FLOAT16_MAX:
+                logger.warning(
+                    f"Volume ({array.dtype}) exceeds the float16 range, "
+                    "keeping float32 (twice the device memory)"
+                )
+                storage = dtypes.float32
+
+    if storage == dtypes.float16:
+        clip = saturating and array.dtype.itemsize == 2
+        with np.errstate(over="ignore"):
+            array = array.astype(np.float16)
+        if clip:
+            # 65520+ rounds to inf
+            np.minimum(array, _FLOAT16_MAX, out=array)
+    elif array.dtype != np.float32:
+        array = array.astype(np.float32)
+
+    record_transfer("h2d", array.nbytes)
+    tensor = Tensor(array, device=device)
+    return tensor if tensor.dtype == storage else tensor.cast(storage)
+
+
+def tensor_to_host(tensor: Tensor) -> np.ndarray:
+    """
+    Download a (realized or lazy) tensor as a float32 host array.
+
+    Args:
+        tensor: Device tensor
+
+    Returns:
+        float32 NumPy array
+    """
+    if tensor.dtype not in (dtypes.float32, dtypes.float16):
+        tensor = tensor.cast(dtypes.float32)
+
+    array = tensor.realize().numpy()
+    record_transfer("d2h", array.nbytes)
+    return array.astype(np.float32, copy=False)
+
+
+class DeviceVolume:
+    """
+    Handle to a volume living on the tinygrad device, in host memory, or both.
+
+    The device copy uses the storage dtype of the precision policy and may
+    be a lazy (unrealized) tinygrad graph. The host copy keeps whatever
+    dtype it was created with, so raw uint16 stacks can still use integer
+    histogramming.
+    """
+
+    def __init__(self, tensor: Optional[Tensor] = None, host: Optional[np.ndarray] = None):
+        """
+        Initialize device volume.
+
+        Args:
+            tensor: Device tensor (possibly lazy)
+            host: Host array
+        """
+        if tensor is None and host is None:
+            raise ValueError("DeviceVolume needs a tensor or a host array")
+
+        self._tensor = tensor
+        self._host = host
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_numpy(cls, array: np.ndarray) -> "DeviceVolume":
+        """Wrap a host array; it is uploaded on first device use."""
+        return cls(host=np.asarray(array))
+
+    @classmethod
+    def from_tensor(cls, tensor: Tensor) -> "DeviceVolume":
+        """Wrap a device tensor; it is downloaded on first host use."""
+        return cls(tensor=tensor)
+
+    @property
+    def tensor(self) -> Tensor:
+        """Device tensor, uploading the host copy if needed."""
+        with self._lock:
+            if self._tensor is None:
+                self._tensor = host_to_tensor(self._host)
+            return self._tensor
+
+    def numpy(self) -> np.ndarray:
+        """Host array, downloading (and realizing) the device copy if needed."""
+        with self._lock:
+            if self._host is None:
+                self._host = tensor_to_host(self._tensor)
+            return self._host
+
+    def realize(self) -> "DeviceVolume":
+        """Force evaluation of a lazy device tensor."""
+        with self._lock:
+            if self._tensor is not None:
+                self._tensor.realize()
+        return self
+
+    @property
+    def on_device(self) -> bool:
+        """Whether a device copy exists."""
+        return self._tensor is not None
+
+    @property
+    def on_host(self) -> bool:
+        """Whether a host copy exists."""
+        return self._host is not None
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Volume shape."""
+        if self._host is not None:
+            return self._host.shape
+        return tuple(self._tensor.shape)
+
+    @property
+    def ndim(self) -> int:
+        """Number of dimensions."""
+        return len(self.shape)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Host dtype (float32 for device-only volumes)."""
+        if self._host is not None:
+            return self._host.dtype
+        return np.dtype(np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the volume in bytes (host dtype)."""
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __array__(self, dtype: Any = None, copy: Any = None) -> np.ndarray:
+        array = self.numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self) -> str:
+        location = "+".join(
+            name for name, present in (("device", self.on_device), ("host", self.on_host)) if present
+        )
+        return f"DeviceVolume(shape={self.shape}, dtype={self.dtype}, on={location})"
+
+
+def as_numpy(volume: Union[np.ndarray, DeviceVolume]) -> np.ndarray:
+    """Get a host array from a NumPy array or DeviceVolume."""
+    if isinstance(volume, DeviceVolume):
+        return volume.numpy()
+    return volume
@@ -0,0 +1,407 @@
+"""
+FFT backends for deconvolution, Wiener filtering and other spectral work.
+
+Every transform in ``core.gpu`` goes through ``get_fft_backend()`` instead of
+calling ``scipy.fft`` directly, so the implementation and thread count are
+chosen in one place:
+- "scipy": ``scipy.fft`` (pocketfft) with ``workers`` threads. pocketfft
+  keeps its own cache of recent plans.
+- "pyfftw": FFTW through ``pyfftw.interfaces.scipy_fft`` when pyFFTW is
+  installed. Plans are kept by the pyFFTW interfaces cache, and FFTW wisdom
+  is loaded at start-up and written back at exit, so later processes skip
+  the planning.
+
+The backend is selected with ZSTACK_FFT_BACKEND ("auto", "scipy" or
+"pyfftw"; "auto" takes the highest-priority available backend) and the
+thread count with ZSTACK_FFT_WORKERS (default: all cores);
+``limit_fft_workers`` lowers it for code running several transforms
+concurrently (e.g. parallel deconvolution tiles). Other
+implementations (e.g. a tinygrad FFT, once tinygrad has one) plug in with
+``register_fft_backend``.
+
+All backends follow the ``scipy.fft`` signatures and dtype rules
+(float32 in, complex64 out).
+"""
+
+import atexit
+import contextvars
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import fft as sp_fft
+
+try:
+    import pyfftw
+    import pyfftw.interfaces.cache
+    import pyfftw.interfaces.scipy_fft
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Axes = Optional[Sequence[int]]
+Shape = Optional[Sequence[int]]
+
+# Per-context cap on threads per transform (see limit_fft_workers)
+_worker_limit: "contextvars.ContextVar[Optional[int]]" = contextvars.ContextVar(
+    "zstack_fft_worker_limit", default=None
+)
+
+
+@contextmanager
+def limit_fft_workers(workers: int) -> Iterator[int]:
+    """
+    Cap the threads per transform for calls made in this context.
+
+    Used by callers that run several transforms at once (one per pool
+    worker), so together they use the backend's threads instead of
+    each starting all of them.
+
+    Args:
+        workers: Maximum threads per transform
+
+    Yields:
+        The applied limit
+    """
+    workers = max(int(workers), 1)
+    token = _worker_limit.set(workers)
+    try:
+        yield workers
+    finally:
+        _worker_limit.reset(token)
+
+
+class FFTBackend:
+    """
+    scipy.fft-compatible transforms with a fixed worker count.
+
+    The default implementation is ``scipy.fft``; subclasses swap the
+    module that implements the n-D transforms.
+    """
+
+    name = "scipy"
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Initialize FFT backend.
+
+        Args:
+            workers: Threads per transform (None = all cores)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._module = sp_fft
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _run(self, kind: str, x: np.ndarray, s: Shape, axes: Axes, overwrite_x: bool) -> np.ndarray:
+        with self._lock:
+            self._calls[kind] = self._calls.get(kind, 0) + 1
+        workers = self.workers
+        limit = _worker_limit.get()
+        if limit is not None:
+            workers = min(workers, limit)
+        return getattr(self._module, kind)(
+            x, s=s, axes=axes, overwrite_x=overwrite_x, workers=workers, **self._options()
+        )
+
+    def _options(self) -> Dict[str, Any]:
+        """Backend-specific keyword arguments for every transform."""
+        return {}
+
+    def rfftn(self, x: np.ndarray, s: Shape = None, axes: Axes = None, overwrite_x: bool = False) -> np.ndarray:
+        """N-D real-to-half-spectrum transform."""
+        return self._run("rfftn", x, s, axes, overwrite_x)
+
+    def irfftn(self, x: np.ndarray, s: Shape = None, axes: Axes = None, overwrite_x: bool = False) -> np.ndarray:
+        """Inverse of ``rfftn``; pass ``s`` to recover odd last-axis lengths."""
+        return self._run("irfftn", x, s, axes, overwrite_x)
+
+    def fftn(self, x: np.ndarray, s: Shape = None, axes: Axes = None, overwrite_x: bool = False) -> np.ndarray:
+        """N-D complex transform."""
+        return self._run("fftn", x, s, axes, overwrite_x)
+
+    def ifftn(self, x: np.ndarray, s: Shape = None, axes: Axes = None, overwrite_x: bool = False) -> np.ndarray:
+        """N-D inverse complex transform."""
+        return self._run("ifftn", x, s, axes, overwrite_x)
+
+    def rfft(self, x: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+        """1D real transform (short lines such as separable kernel factors)."""
+        return sp_fft.rfft(x, n=n)
+
+    def fft(self, x: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+        """1D complex transform (short lines such as separable kernel factors)."""
+        return sp_fft.fft(x, n=n)
+
+    def clear_plans(self) -> None:
+        """Drop cached plans (pocketfft manages its own cache)."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend statistics."""
+        with self._lock:
+            return {
+                "backend": self.name,
+                "workers": self.workers,
+                "calls": dict(self._calls),
+            }
+
+
+class PyFFTWBackend(FFTBackend):
+    """FFTW through pyFFTW's scipy.fft interface, with persisted wisdom."""
+
+    name = "pyfftw"
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        planner_effort: str = "FFTW_MEASURE",
+        wisdom_path: Optional[Path] = None,
+        keepalive_seconds: float = 300.0
+    ):
+        """
+        Initialize pyFFTW backend.
+
+        Args:
+            workers: Threads per transform (None = all cores)
+            planner_effort: FFTW planner flag; FFTW_MEASURE plans are slower
+                to create but are reused from the plan cache and wisdom
+            wisdom_path: File FFTW wisdom is loaded from and saved to
+                (None = not persisted)
+            keepalive_seconds: How long an unused plan stays cached
+        """
+        if not PYFFTW_AVAILABLE:
+            raise RuntimeError("pyFFTW is not installed")
+
+        super().__init__(workers)
+        self._module = pyfftw.interfaces.scipy_fft
+        self.planner_effort = planner_effort
+        self.wisdom_path = Path(wisdom_path) if wisdom_path is not None else None
+        self.keepalive_seconds = keepalive_seconds
+
+        pyfftw.interfaces.cache.enable()
+        pyfftw.interfaces.cache.set_keepalive_time(keepalive_seconds)
+
+        self._load_wisdom()
+        if self.wisdom_path is not None:
+            atexit.register(self.save_wisdom)
+
+    def _options(self) -> Dict[str, Any]:
+        return {"planner_effort": self.planner_effort}
+
+    def _load_wisdom(self) -> None:
+        """Import FFTW wisdom saved by an earlier process."""
+        if self.wisdom_path is None or not self.wisdom_path.exists():
+            return
+
+        try:
+            with open(self.wisdom_path, "rb") as f:
+                pyfftw.import_wisdom(pickle.load(f))
+            logger.info(f"Loaded FFTW wisdom from {self.wisdom_path}")
+        except (OSError, ValueError, TypeError, pickle.UnpicklingError) as e:
+            logger.warning(f"Ignoring unreadable FFTW wisdom {self.wisdom_path}: {e}")
+
+    def save_wisdom(self) -> None:
+        """Write the accumulated FFTW wisdom atomically."""
+        if self.wisdom_path is None:
+            return
+
+        try:
+            self.wisdom_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".pkl", dir=self.wisdom_path.parent)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(pyfftw.export_wisdom(), f)
+            os.replace(tmp_path, self.wisdom_path)
+        except OSError as e:
+            logger.warning(f"Could not save FFTW wisdom to {self.wisdom_path}: {e}")
+
+    def clear_plans(self) -> None:
+        """Drop the pyFFTW plan cache (wisdom is kept)."""
+        pyfftw.interfaces.cache.disable()
+        pyfftw.interfaces.cache.enable()
+        pyfftw.interfaces.cache.set_keepalive_time(self.keepalive_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats.update({
+            "planner_effort": self.planner_effort,
+            "wisdom_path": str(self.wisdom_path) if self.wisdom_path else None,
+        })
+        return stats
+
+
+# name -> (factory taking workers, priority for "auto", availability check)
+_backend_factories: Dict[str, Tuple[Callable[[int], FFTBackend], int, Callable[[], bool]]] = {}
+
+
+def register_fft_backend(
+    name: str,
+    factory: Callable[[int], FFTBackend],
+    priority: int = 0,
+    available: Callable[[], bool] = lambda: True
+) -> None:
+    """
+    Register an FFT backend.
+
+    Args:
+        name: Name used by ZSTACK_FFT_BACKEND and set_fft_backend
+        factory: Called with the worker count to create the backend
+        priority: "auto" picks the available backend with the highest priority
+        available: Whether the backend can be created in this process
+    """
+    _backend_factories[name] = (factory, priority, available)
+
+
+def available_fft_backends() -> Tuple[str, ...]:
+    """Names of the backends usable in this process, highest priority first."""
+    usable = [(priority, name) for name, (_, priority, available) in _backend_factories.items() if available()]
+    return tuple(name for _, name in sorted(usable, reverse=True))
+
+
+def create_fft_backend(name: str = "auto", workers: Optional[int] = None) -> FFTBackend:
+    """
+    Create an FFT backend by name.
+
+    Args:
+        name: Registered backend name, or "auto"
+        workers: Threads per transform (None = all cores)
+
+    Returns:
+        FFTBackend
+    """
+    if name == "auto":
+        name = available_fft_backends()[0]
+    elif name not in _backend_factories:
+        raise ValueError(f"Unknown FFT backend: {name}")
+    elif not _backend_factories[name][2]():
+        raise ValueError(f"FFT backend {name} is not available")
+
+    return _backend_factories[name][0](workers or os.cpu_count() or 1)
+
+
+register_fft_backend("scipy", FFTBackend, priority=0)
+register_fft_backend(
+    "pyfftw",
+    lambda workers: PyFFTWBackend(workers, wisdom_path=_wisdom_path()),
+    priority=10,
+    available=lambda: PYFFTW_AVAILABLE,
+)
+
+
+def benchmark_fft_backends(
+    shape: Tuple[int, ...] = (64, 256, 256),
+    repeats: int = 3,
+    backends: Optional[Sequence[str]] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Time a real forward and inverse transform with each backend.
+
+    Each backend transforms once untimed (planning, plan cache) and then
+    reports the best of ``repeats`` runs.
+
+    Args:
+        shape: float32 volume shape to transform
+        repeats: Timed runs per transform
+        backends: Backend names (None = all available)
+        workers: Threads per transform (None = all cores)
+
+    Returns:
+        Dict mapping backend name to {"rfftn", "irfftn"} seconds and workers
+    """
+    volume = np.random.default_rng(0).random(shape, dtype=np.float32)
+    results = {}
+
+    for name in backends or available_fft_backends():
+        backend = create_fft_backend(name, workers)
+        spectrum = backend.rfftn(volume)
+        backend.irfftn(spectrum, s=shape)
+
+        timings = {}
+        for kind, run in (
+            ("rfftn", lambda: backend.rfftn(volume)),
+            ("irfftn", lambda: backend.irfftn(spectrum, s=shape)),
+        ):
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+            timings[kind] = min(times)
+
+        results[name] = dict(timings, workers=backend.workers)
+        logger.info(
+            f"FFT {name} ({backend.workers} workers) on {shape}: "
+            f"rfftn={timings['rfftn'] * 1000:.1f}ms irfftn={timings['irfftn'] * 1000:.1f}ms"
+        )
+
+    return results
+
+
+def _wisdom_path() -> Optional[Path]:
+    """FFTW wisdom file (ZSTACK_FFTW_WISDOM; empty string = not persisted)."""
+    configured = os.environ.get("ZSTACK_FFTW_WISDOM")
+    if configured is not None:
+        return Path(configured).expanduser() if configured else None
+    return Path.home() / ".cache" / "zstack-analyzer" / "fftw_wisdom.pkl"
+
+
+def _default_workers() -> Optional[int]:
+    """Threads per transform (ZSTACK_FFT_WORKERS; default all cores)."""
+    configured = os.environ.get("ZSTACK_FFT_WORKERS")
+    if configured:
+        try:
+            return max(int(configured), 1)
+        except ValueError:
+            logger.warning(f"Ignoring invalid ZSTACK_FFT_WORKERS={configured!r}")
+    return None
+
+
+# Global instance, created on first use so registrations made at import time count
+_fft_backend: Optional[FFTBackend] = None
+_fft_backend_lock = threading.Lock()
+
+
+def get_fft_backend() -> FFTBackend:
+    """Get the global FFT backend (ZSTACK_FFT_BACKEND, ZSTACK_FFT_WORKERS)."""
+    global _fft_backend
+
+    if _fft_backend is None:
+        with _fft_backend_lock:
+            if _fft_backend is None:
+                name = os.environ.get("ZSTACK_FFT_BACKEND", "auto")
+                try:
+                    backend = create_fft_backend(name, _default_workers())
+                except ValueError as e:
+                    logger.warning(f"{e}; using scipy")
+                    backend = create_fft_backend("scipy", _default_workers())
+                logger.info(f"FFT backend: {backend.name} ({backend.workers} workers)")
+                _fft_backend = backend
+
+    return _fft_backend
+
+
+def set_fft_backend(name: str = "auto", workers: Optional[int] = None) -> FFTBackend:
+    """
+    Replace the global FFT backend.
+
+    Args:
+        name: Registered backend name, or "auto"
+        workers: Threads per transform (None = ZSTACK_FFT_WORKERS or all cores)
+
+    Returns:
+        The new backend
+    """
+    global _fft_backend
+
+    backend = create_fft_backend(name, workers or _default_workers())
+    with _fft_backend_lock:
+        _fft_backend = backend
+    return backend
@@ -0,0 +1,209 @@
+"""
+Shape-keyed cache of JIT-compiled tinygrad kernels.
+
+Every call to a tinygrad function normally rebuilds its lazy graph,
+re-schedules it and looks the compiled programs up again, even when the
+same stack shape is processed thousands of times. This module keeps one
+TinyJit instance per (op, shape, dtype, device, params) key so repeated
+calls replay the captured kernels directly. Compiled programs are also
+persisted on disk by tinygrad's own compile cache, so warm-up after a
+deploy only pays the graph capture.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from tinygrad import TinyJit
+from tinygrad.tensor import Tensor
+
+from .device_manager import DeviceManager
+from .device_volume import tensor_to_host
+
+logger = logging.getLogger(__name__)
+_device_manager = DeviceManager()
+
+
+class KernelCache:
+    """LRU cache of TinyJit-wrapped kernels keyed by op, shape, dtype and device."""
+
+    def __init__(self, max_entries: int = 64, enabled: bool = True):
+        """
+        Initialize kernel cache.
+
+        Args:
+            max_entries: Maximum number of cached JIT kernels
+            enabled: If False, kernels run un-jitted every call
+        """
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, Tuple[Callable[..., Any], threading.Lock]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def run(
+        self,
+        op: str,
+        builder: Callable[..., Any],
+        inputs: Sequence[Tensor],
+        params: Tuple[Hashable, ...] = (),
+        on_device: bool = False
+    ) -> Any:
+        """
+        Run a kernel through the cache and return its outputs.
+
+        ``builder`` must be a pure function of its tensor inputs that returns
+        a Tensor or a tuple of Tensors; ``params`` holds every Python value
+        baked into its graph (sigma, operator name, ...).
+
+        TinyJit reuses output buffers between calls, so outputs are copied
+        (to host memory, or to fresh device buffers with ``on_device``)
+        while the entry is still locked.
+
+        Args:
+            op: Kernel name
+            builder: Function building the tinygrad graph
+            inputs: Realized input tensors
+            params: Hashable parameters baked into the graph
+            on_device: Return device tensors instead of numpy arrays
+
+        Returns:
+            numpy array or tuple of numpy arrays (Tensors with ``on_device``),
+            mirroring builder's output
+        """
+        copy = _to_device_copy if on_device else _to_host
+
+        if not self.enabled:
+            outputs = builder(*inputs)
+            return outputs if on_device else _to_host(outputs)
+
+        key = (
+            op,
+            tuple((tuple(t.shape), str(t.dtype)) for t in inputs),
+            _device_manager.device,
+            params,
+        )
+        jitted, entry_lock = self._get_entry(key, builder)
+
+        with entry_lock:
+            return copy(jitted(*[t.realize() for t in inputs]))
+
+    def _get_entry(
+        self,
+        key: Hashable,
+        builder: Callable[..., Any]
+    ) -> Tuple[Callable[..., Any], threading.Lock]:
+        """Look up or create the JIT entry for a key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return entry
+
+            self._misses += 1
+
+            def realized(*tensors: Tensor) -> Any:
+                outputs = builder(*tensors)
+                if isinstance(outputs, tuple):
+                    return tuple(t.realize() for t in outputs)
+                return outputs.realize()
+
+            entry = (TinyJit(realized), threading.Lock())
+            self._entries[key] = entry
+
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"Evicted JIT kernel {evicted[0]} {evicted[1]}")
+
+            return entry
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "enabled": self.enabled,
+            }
+
+    def clear(self) -> None:
+        """Drop all cached kernels."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+def _to_host(outputs: Any) -> Any:
+    """Copy a Tensor or tuple of Tensors to numpy."""
+    if isinstance(outputs, tuple):
+        return tuple(_to_host(t) for t in outputs)
+    return tensor_to_host(outputs)
+
+
+def _to_device_copy(outputs: Any) -> Any:
+    """Copy a Tensor or tuple of Tensors into fresh device buffers."""
+    if isinstance(outputs, tuple):
+        return tuple(t.clone().realize() for t in outputs)
+    return outputs.clone().realize()
+
+
+# Global instance (ZSTACK_KERNEL_CACHE=0 disables JIT replay)
+_kernel_cache = KernelCache(enabled=os.environ.get("ZSTACK_KERNEL_CACHE", "1") != "0")
+
+
+def get_kernel_cache() -> KernelCache:
+    """Get the global kernel cache."""
+    return _kernel_cache
+
+
+def warm_up_kernels(
+    shapes: Iterable[Tuple[int, int, int]],
+    sigmas: Iterable[float] = (1.0,),
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Dict[str, Any]:
+    """
+    Pre-compile and capture the cached kernels for common stack shapes.
+
+    TinyJit captures on the second call, so each kernel is run twice per
+    shape on a zero volume. Runs the FIR Gaussian passes, the gradient
+    engine and the colocalization statistics. The Gaussian FIR/IIR
+    crossover is calibrated first (if not already stored), so the first
+    request does not pay for it.
+
+    Args:
+        shapes: (z, y, x) shapes to warm up
+        sigmas: Gaussian sigmas to warm up (FIR backend)
+        progress_callback: Optional progress callback
+
+    Returns:
+        Kernel cache statistics after warm-up
+    """
+    from .kernels import _fir_gaussian_3d, get_gaussian_crossover_sigma, gradient_3d
+    from .analysis import colocalization_analysis
+
+    shapes = list(shapes)
+    sigmas = list(sigmas)
+
+    get_gaussian_crossover_sigma()
+
+    for i, shape in enumerate(shapes):
+        volume = np.zeros(shape, dtype=np.float32)
+        for _ in range(2):
+            for sigma in sigmas:
+                _fir_gaussian_3d(volume, sigma)
+            gradient_3d(volume)
+            colocalization_analysis(volume, volume, threshold_ch1=0.0, threshold_ch2=0.0)
+
+        logger.info(f"Warmed up kernels for shape {shape}")
+        if progress_callback:
+            progress_callback((i + 1) / len(shapes))
+
+    return _kernel_cache.stats()
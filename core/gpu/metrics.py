@@ -0,0 +1,246 @@
+"""
+In-process metrics registry for GPU kernels.
+
+The ``@benchmark`` decorator records every kernel call here: call counts,
+a latency histogram, input voxel/byte counts and the derived throughput,
+tagged by device. Recording is a lock, a bisect and a few additions, so it
+is cheap enough to leave on in production.
+
+The registry can be queried with ``snapshot()`` or rendered in the
+Prometheus text exposition format with ``to_prometheus()`` (served by the
+API at ``/metrics``).
+"""
+
+import bisect
+import os
+import threading
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from tinygrad.tensor import Tensor
+
+from .device_volume import DeviceVolume
+
+# Latency histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+class _KernelStats:
+    """Accumulated statistics for one (kernel, device) pair."""
+
+    __slots__ = ("calls", "errors", "total_seconds", "voxels", "bytes", "buckets")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.voxels = 0
+        self.bytes = 0
+        # Non-cumulative counts; the last slot is the +Inf bucket
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+
+class MetricsRegistry:
+    """Thread-safe registry of per-kernel metrics."""
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize metrics registry.
+
+        Args:
+            enabled: If False, record() is a no-op
+        """
+        self.enabled = enabled
+        self._stats: Dict[Tuple[str, str], _KernelStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        kernel: str,
+        device: str,
+        seconds: float,
+        voxels: int = 0,
+        nbytes: int = 0,
+        error: bool = False
+    ) -> None:
+        """
+        Record one kernel call.
+
+        Args:
+            kernel: Kernel name
+            device: Device the kernel ran on
+            seconds: Wall time including device synchronization
+            voxels: Number of input voxels processed
+            nbytes: Number of input bytes processed
+            error: Whether the call raised
+        """
+        if not self.enabled:
+            return
+
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        key = (kernel, device)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _KernelStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.total_seconds += seconds
+            stats.voxels += voxels
+            stats.bytes += nbytes
+            stats.buckets[bucket] += 1
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get a copy of all kernel metrics.
+
+        Returns:
+            One dict per (kernel, device) with counts, latency summary
+            (mean/p50/p95 in ms, estimated from the histogram) and throughput
+        """
+        with self._lock:
+            items = [
+                (kernel, device, stats.calls, stats.errors, stats.total_seconds,
+                 stats.voxels, stats.bytes, list(stats.buckets))
+                for (kernel, device), stats in self._stats.items()
+            ]
+
+        snapshot = []
+        for kernel, device, calls, errors, total, voxels, nbytes, buckets in sorted(items):
+            snapshot.append({
+                "kernel": kernel,
+                "device": device,
+                "calls": calls,
+                "errors": errors,
+                "total_seconds": total,
+                "mean_ms": total / calls * 1000 if calls else 0.0,
+                "p50_ms": _bucket_quantile(buckets, 0.50) * 1000,
+                "p95_ms": _bucket_quantile(buckets, 0.95) * 1000,
+                "voxels": voxels,
+                "bytes": nbytes,
+                "voxels_per_second": voxels / total if total > 0 else 0.0,
+                "bytes_per_second": nbytes / total if total > 0 else 0.0,
+                "buckets": buckets,
+            })
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """
+        Render the registry in the Prometheus text exposition format.
+
+        Returns:
+            Metrics text (version 0.0.4)
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(entry: Dict[str, Any], extra: str = "") -> str:
+            return f'kernel="{entry["kernel"]}",device="{entry["device"]}"{extra}'
+
+        family("zstack_kernel_calls_total", "counter", "Kernel invocations")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_calls_total{{{labels(entry)}}} {entry['calls']}")
+
+        family("zstack_kernel_errors_total", "counter", "Kernel invocations that raised")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_errors_total{{{labels(entry)}}} {entry['errors']}")
+
+        family("zstack_kernel_duration_seconds", "histogram", "Kernel wall time including device sync")
+        for entry in snapshot:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry["buckets"]):
+                cumulative += count
+                bucket_labels = labels(entry, ',le="%s"' % bound)
+                lines.append(f"zstack_kernel_duration_seconds_bucket{{{bucket_labels}}} {cumulative}")
+            bucket_labels = labels(entry, ',le="+Inf"')
+            lines.append(f"zstack_kernel_duration_seconds_bucket{{{bucket_labels}}} {entry['calls']}")
+            lines.append(f"zstack_kernel_duration_seconds_sum{{{labels(entry)}}} {entry['total_seconds']:.6f}")
+            lines.append(f"zstack_kernel_duration_seconds_count{{{labels(entry)}}} {entry['calls']}")
+
+        family("zstack_kernel_voxels_total", "counter", "Input voxels processed")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_voxels_total{{{labels(entry)}}} {entry['voxels']}")
+
+        family("zstack_kernel_bytes_total", "counter", "Input bytes processed")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_bytes_total{{{labels(entry)}}} {entry['bytes']}")
+
+        family("zstack_kernel_voxels_per_second", "gauge", "Mean throughput in voxels per second")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_voxels_per_second{{{labels(entry)}}} {entry['voxels_per_second']:.1f}")
+
+        family("zstack_kernel_bytes_per_second", "gauge", "Mean throughput in bytes per second")
+        for entry in snapshot:
+            lines.append(f"zstack_kernel_bytes_per_second{{{labels(entry)}}} {entry['bytes_per_second']:.1f}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drop all recorded metrics."""
+        with self._lock:
+            self._stats.clear()
+
+
+def _bucket_quantile(buckets: List[int], q: float) -> float:
+    """Estimate a quantile (seconds) by linear interpolation within a bucket."""
+    total = sum(buckets)
+    if total == 0:
+        return 0.0
+
+    rank = q * total
+    cumulative = 0
+    for i, count in enumerate(buckets):
+        if count and cumulative + count >= rank:
+            lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+            if i == len(LATENCY_BUCKETS):
+                return lower
+            return lower + (LATENCY_BUCKETS[i] - lower) * (rank - cumulative) / count
+        cumulative += count
+    return LATENCY_BUCKETS[-1]
+
+
+def volume_size(value: Any) -> Tuple[int, int]:
+    """
+    Get the (voxels, bytes) of an array-like kernel input.
+
+    Args:
+        value: NumPy array, DeviceVolume or tinygrad Tensor
+
+    Returns:
+        (voxels, bytes), or (0, 0) for anything else
+    """
+    if isinstance(value, np.ndarray):
+        return value.size, value.nbytes
+    if isinstance(value, DeviceVolume):
+        return int(np.prod(value.shape)), value.nbytes
+    if isinstance(value, Tensor):
+        voxels = int(np.prod(value.shape))
+        return voxels, voxels * value.dtype.itemsize
+    return 0, 0
+
+
+def synchronize(result: Any) -> None:
+    """Force evaluation of lazy device outputs so timings include the work."""
+    if isinstance(result, (Tensor, DeviceVolume)):
+        result.realize()
+    elif isinstance(result, tuple):
+        for item in result:
+            if isinstance(item, (Tensor, DeviceVolume, tuple)):
+                synchronize(item)
+
+
+# Global instance (ZSTACK_METRICS=0 disables recording)
+_metrics_registry = MetricsRegistry(enabled=os.environ.get("ZSTACK_METRICS", "1") != "0")
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Get the global metrics registry."""
+    return _metrics_registry
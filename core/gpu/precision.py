@@ -0,0 +1,189 @@
+"""
+Accuracy harness for the reduced-precision execution mode.
+
+Runs each precision-aware algorithm once under float32 and once under a
+reduced precision policy and compares the outputs. Volume outputs are
+compared by their maximum absolute error normalized by the float32 output
+range; scalar outputs by their absolute error (correlation coefficients)
+or relative error (intensity statistics).
+
+Documented tolerances (PRECISION_TOLERANCES) for float16 are about 4x
+the error measured on the synthetic uint16 stack used here (11 significant
+bits, ~5e-4 relative rounding). bfloat16 keeps 8 bits, so its tolerances
+are the float16 ones scaled by 8. The LoG tolerance is the loosest: the
+second difference amplifies the rounding of the stored blur.
+
+Richardson-Lucy keeps its estimate in float32 under every policy; the
+policy reaches it through the device convolutions, whose input volumes are
+stored in the reduced dtype. It is checked with both device paths
+("direct" and "separable"; the FFT path runs in float32 on the host), and
+its tolerance covers the rounding of both convolutions compounded over
+five iterations.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .device_manager import DeviceManager, PRECISION_DTYPES
+
+logger = logging.getLogger(__name__)
+_device_manager = DeviceManager()
+
+# Maximum error per algorithm and precision (see module docstring)
+PRECISION_TOLERANCES: Dict[str, Dict[str, float]] = {
+    "gaussian_blur_3d": {"float16": 2e-3, "bfloat16": 1.6e-2},
+    "gradient_3d": {"float16": 4e-3, "bfloat16": 3.2e-2},
+    "laplacian_of_gaussian": {"float16": 4e-2, "bfloat16": 3.2e-1},
+    "colocalization_analysis": {"float16": 1e-5, "bfloat16": 8e-5},
+    "intensity_statistics": {"float16": 4e-5, "bfloat16": 3.2e-4},
+    "richardson_lucy_direct": {"float16": 4e-3, "bfloat16": 3.2e-2},
+    "richardson_lucy_separable": {"float16": 4e-3, "bfloat16": 3.2e-2},
+}
+
+
+@contextmanager
+def precision_scope(precision: str) -> Iterator[str]:
+    """
+    Temporarily switch the global precision policy.
+
+    The policy is process-wide, so do not use this while other threads run
+    kernels.
+
+    Args:
+        precision: "float32", "float16" or "bfloat16"
+
+    Yields:
+        The precision actually in effect
+    """
+    previous = _device_manager.precision
+    try:
+        yield _device_manager.set_precision(precision)
+    finally:
+        _device_manager.set_precision(previous)
+
+
+def _synthetic_stack(shape: Tuple[int, int, int], seed: int) -> np.ndarray:
+    """Gaussian spots on an offset background with Poisson noise (uint16)."""
+    rng = np.random.default_rng(seed)
+    z, y, x = np.indices(shape, dtype=np.float32)
+    signal = np.full(shape, 100.0, dtype=np.float32)
+
+    for _ in range(max(4, shape[1] * shape[2] // 512)):
+        center = rng.uniform(0, shape)
+        width = rng.uniform(1.5, 4.0)
+        distance = ((z - center[0]) ** 2 + (y - center[1]) ** 2 + (x - center[2]) ** 2)
+        signal += rng.uniform(500, 4000) * np.exp(-distance / (2 * width ** 2))
+
+    return rng.poisson(signal).astype(np.uint16)
+
+
+def _volume_error(reference: np.ndarray, candidate: np.ndarray) -> float:
+    """Max absolute error normalized by the reference range."""
+    value_range = float(reference.max() - reference.min()) or 1.0
+    return float(np.abs(candidate.astype(np.float64) - reference).max() / value_range)
+
+
+def _algorithms(volume: np.ndarray) -> Dict[str, Tuple[Callable[[], Any], Callable[[Any, Any], float]]]:
+    """Algorithm runners and error metrics for the harness."""
+    from .kernels import gaussian_blur_3d, gradient_3d
+    from .segmentation import _laplacian_3d
+    from .analysis import colocalization_analysis, intensity_statistics
+    from .deconvolution import richardson_lucy_deconvolution, generate_psf
+    from .device_volume import DeviceVolume
+
+    second = np.roll(volume, 2, axis=2)
+
+    def log_response() -> np.ndarray:
+        blurred = gaussian_blur_3d(DeviceVolume.from_numpy(volume), sigma=2.0, method="fir")
+        return _laplacian_3d(blurred, scale=4.0).numpy()
+
+    def scalar_error(keys: Tuple[str, ...], relative: bool) -> Callable[[Dict, Dict], float]:
+        def error(reference: Dict[str, float], candidate: Dict[str, float]) -> float:
+            errors = []
+            for key in keys:
+                diff = abs(candidate[key] - reference[key])
+                errors.append(diff / (abs(reference[key]) or 1.0) if relative else diff)
+            return float(max(errors))
+        return error
+
+    psf = generate_psf((9, 9, 9), "gaussian", sigma=(1.5, 1.0, 1.0))
+
+    return {
+        "gaussian_blur_3d": (lambda: gaussian_blur_3d(volume, sigma=1.5, method="fir"), _volume_error),
+        "gradient_3d": (lambda: gradient_3d(volume), _volume_error),
+        "laplacian_of_gaussian": (log_response, _volume_error),
+        "colocalization_analysis": (
+            lambda: colocalization_analysis(volume, second, threshold_ch1=500.0, threshold_ch2=500.0),
+            scalar_error(("pearson_r", "manders_m1", "manders_m2"), relative=False),
+        ),
+        "intensity_statistics": (
+            lambda: intensity_statistics(volume),
+            scalar_error(("mean", "std", "total_intensity"), relative=True),
+        ),
+        "richardson_lucy_direct": (
+            lambda: richardson_lucy_deconvolution(
+                volume.astype(np.float32), psf, iterations=5, convolution="direct"
+            ),
+            _volume_error,
+        ),
+        "richardson_lucy_separable": (
+            lambda: richardson_lucy_deconvolution(
+                volume.astype(np.float32), psf, iterations=5, convolution="separable"
+            ),
+            _volume_error,
+        ),
+    }
+
+
+def check_precision_accuracy(
+    precision: str = "float16",
+    shape: Tuple[int, int, int] = (16, 64, 64),
+    seed: int = 0,
+    progress_callback: Optional[Callable[[float], None]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare each algorithm under a reduced precision policy against float32.
+
+    Args:
+        precision: Reduced precision to check ("float16" or "bfloat16")
+        shape: Synthetic volume shape (z, y, x)
+        seed: Random seed for the synthetic volume
+        progress_callback: Optional progress callback
+
+    Returns:
+        Dict mapping algorithm name to {"error", "tolerance", "passed"}.
+        Empty if the device does not support the precision.
+    """
+    if precision not in PRECISION_DTYPES or precision == "float32":
+        raise ValueError(f"Expected a reduced precision, got: {precision}")
+
+    if not _device_manager.supports_dtype(PRECISION_DTYPES[precision]):
+        logger.warning(f"{precision} is not supported on {_device_manager.device}")
+        return {}
+
+    volume = _synthetic_stack(shape, seed)
+    algorithms = _algorithms(volume)
+    results = {}
+
+    for i, (name, (run, error_metric)) in enumerate(algorithms.items()):
+        with precision_scope("float32"):
+            reference = run()
+        with precision_scope(precision):
+            candidate = run()
+
+        error = error_metric(reference, candidate)
+        tolerance = PRECISION_TOLERANCES[name][precision]
+        results[name] = {
+            "error": error,
+            "tolerance": tolerance,
+            "passed": error <= tolerance,
+        }
+        logger.info(f"{name} ({precision}): error={error:.2e} tolerance={tolerance:.1e}")
+
+        if progress_callback:
+            progress_callback((i + 1) / len(algorithms))
+
+    return results
@@ -0,0 +1,263 @@
+"""
+Cache of theoretical PSFs keyed by optical parameters.
+
+Deconvolution jobs on data from the same microscope keep asking for the
+same PSF. ``PSFLibrary`` keeps generated PSFs in an in-memory LRU backed by
+an on-disk ``.npy`` cache, keyed by (type, shape, wavelength, NA,
+refractive index, voxel size, sigma), so a PSF is generated once per
+optical setup rather than once per job. Returned arrays are read-only and
+shared between callers.
+
+``psf_parameters_from_metadata`` fills the optical parameters from an
+``ImageMetadata`` (objective NA and immersion, channel emission wavelength,
+voxel size) where the file provides them.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .deconvolution import generate_psf
+
+logger = logging.getLogger(__name__)
+
+# Immersion media refractive indices (used when the metadata names the medium)
+IMMERSION_REFRACTIVE_INDICES = {
+    "air": 1.0,
+    "dry": 1.0,
+    "water": 1.333,
+    "silicone": 1.406,
+    "glycerol": 1.47,
+    "glycerin": 1.47,
+    "oil": 1.518,
+}
+
+
+class PSFLibrary:
+    """LRU cache of generated PSFs with an optional on-disk .npy store."""
+
+    def __init__(self, max_entries: int = 16, cache_dir: Optional[Path] = None):
+        """
+        Initialize PSF library.
+
+        Args:
+            max_entries: Maximum number of PSFs kept in memory
+            cache_dir: Directory for the .npy cache (None = memory only)
+        """
+        self.max_entries = max_entries
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def get(
+        self,
+        shape: Tuple[int, int, int],
+        psf_type: str = "gaussian",
+        sigma: Optional[Tuple[float, float, float]] = None,
+        wavelength: float = 0.52,
+        numerical_aperture: float = 1.4,
+        refractive_index: float = 1.518,
+        voxel_size: Tuple[float, float, float] = (0.2, 0.1, 0.1)
+    ) -> np.ndarray:
+        """
+        Get a PSF, generating (and caching) it on a miss.
+
+        Arguments match ``generate_psf``.
+
+        Returns:
+            Normalized 3D PSF (float32, read-only)
+        """
+        key = _psf_key(shape, psf_type, sigma, wavelength, numerical_aperture, refractive_index, voxel_size)
+
+        with self._lock:
+            psf = self._entries.get(key)
+            if psf is not None:
+                self._hits += 1
+                self._entries.move_to_end(key)
+                return psf
+
+        psf = self._load(key)
+        if psf is not None:
+            with self._lock:
+                self._disk_hits += 1
+        else:
+            psf = generate_psf(
+                tuple(shape), psf_type, sigma, wavelength, numerical_aperture,
+                refractive_index, tuple(voxel_size), None
+            )
+            psf = np.ascontiguousarray(psf, dtype=np.float32)
+            self._save(key, psf)
+            with self._lock:
+                self._misses += 1
+
+        psf.flags.writeable = False
+
+        with self._lock:
+            self._entries[key] = psf
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return psf
+
+    def _path(self, key: Hashable) -> Path:
+        """Cache file for a key."""
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        return self.cache_dir / f"{key[0]}_{digest}.npy"
+
+    def _load(self, key: Hashable) -> Optional[np.ndarray]:
+        """Load a PSF from the disk cache."""
+        if self.cache_dir is None:
+            return None
+
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            return np.load(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cached PSF {path}: {e}")
+            return None
+
+    def _save(self, key: Hashable, psf: np.ndarray) -> None:
+        """Write a PSF to the disk cache (atomically, so readers never see a partial file)."""
+        if self.cache_dir is None:
+            return
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=self.cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, psf)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning(f"Could not cache PSF in {self.cache_dir}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "cache_dir": str(self.cache_dir) if self.cache_dir else None,
+            }
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Drop all cached PSFs.
+
+        Args:
+            disk: Also delete the on-disk cache files
+        """
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._disk_hits = 0
+            self._misses = 0
+
+        if disk and self.cache_dir is not None and self.cache_dir.exists():
+            for path in self.cache_dir.glob("*.npy"):
+                path.unlink(missing_ok=True)
+
+
+def _psf_key(
+    shape: Tuple[int, int, int],
+    psf_type: str,
+    sigma: Optional[Tuple[float, float, float]],
+    wavelength: float,
+    numerical_aperture: float,
+    refractive_index: float,
+    voxel_size: Tuple[float, float, float]
+) -> Tuple[Hashable, ...]:
+    """Cache key; floats are rounded so metadata round-trips hit the same entry."""
+    def rounded(values: Any) -> Any:
+        if values is None:
+            return None
+        if np.isscalar(values):
+            return round(float(values), 6)
+        return tuple(round(float(v), 6) for v in values)
+
+    if psf_type == "gaussian":
+        # Gaussian PSFs are defined in voxels by sigma alone
+        wavelength = numerical_aperture = refractive_index = voxel_size = None
+
+    return (
+        psf_type,
+        tuple(int(n) for n in shape),
+        rounded(sigma),
+        rounded(wavelength),
+        rounded(numerical_aperture),
+        rounded(refractive_index),
+        rounded(voxel_size),
+    )
+
+
+def psf_parameters_from_metadata(metadata: Any, channel: int = 0) -> Dict[str, Any]:
+    """
+    Get PSF optical parameters from image metadata.
+
+    Only parameters present in the metadata are returned, so the result
+    can be merged over defaults.
+
+    Args:
+        metadata: ImageMetadata (or None)
+        channel: Channel whose emission wavelength to use
+
+    Returns:
+        Dict with any of wavelength (μm), numerical_aperture,
+        refractive_index and voxel_size ((z, y, x) in μm)
+    """
+    parameters: Dict[str, Any] = {}
+    if metadata is None:
+        return parameters
+
+    objective = getattr(metadata, "objective", None)
+    if objective is not None:
+        if objective.numerical_aperture:
+            parameters["numerical_aperture"] = float(objective.numerical_aperture)
+        immersion = (objective.immersion or "").strip().lower()
+        if immersion in IMMERSION_REFRACTIVE_INDICES:
+            parameters["refractive_index"] = IMMERSION_REFRACTIVE_INDICES[immersion]
+
+    channels = getattr(metadata, "channels", None) or []
+    if channel < len(channels):
+        # Emission wavelength determines the detection PSF
+        wavelength_nm = channels[channel].emission_wavelength or channels[channel].wavelength
+        if wavelength_nm:
+            parameters["wavelength"] = float(wavelength_nm) / 1000.0
+
+    sizes = (metadata.pixel_size_z, metadata.pixel_size_y, metadata.pixel_size_x)
+    if all(size is not None for size in sizes):
+        parameters["voxel_size"] = tuple(size.to_micrometers() for size in sizes)
+
+    return parameters
+
+
+def _default_cache_dir() -> Optional[Path]:
+    """PSF cache directory (ZSTACK_PSF_CACHE_DIR; empty string = memory only)."""
+    configured = os.environ.get("ZSTACK_PSF_CACHE_DIR")
+    if configured is not None:
+        return Path(configured).expanduser() if configured else None
+    return Path.home() / ".cache" / "zstack-analyzer" / "psf"
+
+
+# Global instance
+_psf_library = PSFLibrary(cache_dir=_default_cache_dir())
+
+
+def get_psf_library() -> PSFLibrary:
+    """Get the global PSF library."""
+    return _psf_library
@@ -5,23 +5,25 @@ Implements:
 - Watershed segmentation
 - Blob detection (Laplacian of Gaussian)
 - Threshold-based segmentation with morphological cleanup
-- Simple U-Net style encoder-decoder for cell segmentation
+- 3D U-Net inference (see unet.py)
 """
 
 import numpy as np
 import logging
-from typing import Optional, Callable, Tuple, List, Dict
-
-from tinygrad.tensor import Tensor
-from tinygrad.dtype import dtypes
+from typing import Optional, Callable, Tuple, List, Dict, Union
 
 from .device_manager import DeviceManager
+from .device_volume import DeviceVolume, as_numpy
+from .unet import UNet3D, create_unet_model
 from .kernels import (
     gaussian_blur_3d,
     sobel_3d,
     otsu_threshold,
-    to_tensor,
-    to_numpy,
+    connected_components_3d,
+    compute_histogram,
+    histogram_threshold,
+    THRESHOLD_METHODS,
+    _convolve_1d,
     benchmark
 )
 
@@ -31,21 +33,31 @@ _device_manager = DeviceManager()
 
 @benchmark
 def watershed_segmentation_3d(
-    volume: np.ndarray,
+    volume: Union[np.ndarray, DeviceVolume],
     markers: Optional[np.ndarray] = None,
     mask: Optional[np.ndarray] = None,
     compactness: float = 0.0,
-    progress_callback: Optional[Callable[[float], None]] = None
+    progress_callback: Optional[Callable[[float], None]] = None,
+    voxel_size: Optional[Tuple[float, float, float]] = None,
+    h: float = 2.0
 ) -> np.ndarray:
     """
     GPU-accelerated 3D watershed segmentation.
 
+    Without markers, seeds are the h-maxima of the distance transform of
+    the foreground (``mask``, or an Otsu threshold of the volume), and the
+    watershed is restricted to that foreground.
+
     Args:
         volume: Input intensity volume (typically gradient magnitude or distance transform)
         markers: Optional seed markers for watershed (labeled array)
         mask: Optional binary mask to restrict watershed region
         compactness: Compactness parameter for watershed (0 = standard watershed)
         progress_callback: Progress callback function
+        voxel_size: Voxel size (z, y, x) for the distance transform
+            (None = isotropic voxels)
+        h: Minimum height of a distance maximum to seed an object, in
+            voxel_size units (smaller values split more)
 
     Returns:
         Labeled segmentation mask
@@ -53,24 +65,28 @@ def watershed_segmentation_3d(
     if progress_callback:
         progress_callback(0.0)
 
-    # If no markers provided, generate from local minima
+    host_volume = as_numpy(volume)
+
+    # If no markers provided, seed from the foreground's distance transform
     if markers is None:
-        logger.info("Generating watershed markers from local minima")
-        markers = _generate_watershed_markers(volume)
+        if mask is None:
+            _, mask = otsu_threshold(host_volume)
+        logger.info("Generating watershed markers from distance-transform h-maxima")
+        markers = _generate_watershed_markers(mask, voxel_size, h)
 
     if progress_callback:
         progress_callback(0.2)
 
     # Use skimage watershed for now (production would implement GPU version)
     from skimage.segmentation import watershed
-    from scipy import ndimage
 
     # Compute gradient if input is intensity image
-    if volume.max() > 1.0:
+    # (reuses the device copy of a DeviceVolume instead of re-uploading)
+    if host_volume.max() > 1.0:
         logger.info("Computing gradient for watershed")
-        gradient = sobel_3d(volume, progress_callback=None)
+        gradient = as_numpy(sobel_3d(volume, progress_callback=None))
     else:
-        gradient = volume
+        gradient = host_volume
 
     if progress_callback:
         progress_callback(0.5)
@@ -84,52 +100,102 @@ def watershed_segmentation_3d(
     return labels
 
 
-def _generate_watershed_markers(volume: np.ndarray, min_distance: int = 10) -> np.ndarray:
+def _generate_watershed_markers(
+    foreground: np.ndarray,
+    voxel_size: Optional[Tuple[float, float, float]] = None,
+    h: float = 2.0
+) -> np.ndarray:
     """
-    Generate watershed markers from local minima.
+    Generate watershed markers from h-maxima of the foreground distance transform.
+
+    Each connected foreground component is processed in its own bounding
+    box (grown by one voxel of background), so the distance transform and
+    the h-maxima reconstruction cost scales with the foreground rather than
+    the volume. The Euclidean distance transform is exact and separable
+    (scipy's Maurer et al. algorithm) and weights each axis by the voxel
+    size. Cropping does not change it: the crop treats other components
+    as background, but no voxel of another component can be nearer than
+    the nearest true background (the foreground lattice path between them
+    would make them one component).
+
+    Each h-maximum plateau becomes one marker. A component whose maximum
+    distance does not exceed h has no h-maxima; it is seeded at its
+    distance maximum instead, so no object is dropped by the watershed.
 
     Args:
-        volume: Input volume
-        min_distance: Minimum distance between markers
+        foreground: Binary foreground mask
+        voxel_size: Voxel size (z, y, x) (None = isotropic voxels)
+        h: Minimum height of a maximum above its surroundings
 
     Returns:
-        Labeled marker array
+        Labeled marker array (int32)
     """
     from scipy import ndimage
-    from skimage.feature import peak_local_max
+    from skimage.morphology import h_maxima
 
-    # Invert volume to find minima as maxima
-    inverted = volume.max() - volume
+    foreground = np.asarray(foreground, dtype=bool)
+    components, _ = connected_components_3d(foreground, min_size=1)
 
-    # Find local maxima (minima of original)
-    coordinates = peak_local_max(
-        inverted,
-        min_distance=min_distance,
-        exclude_border=True
-    )
+    markers = np.zeros(foreground.shape, dtype=np.int32)
+    structure = np.ones((3, 3, 3), dtype=bool)
+    next_label = 1
+
+    for index, box in enumerate(ndimage.find_objects(components), start=1):
+        if box is None:
+            continue
+
+        grown = tuple(slice(max(b.start - 1, 0), min(b.stop + 1, n)) for b, n in zip(box, foreground.shape))
+        component = components[grown] == index
+
+        distance = ndimage.distance_transform_edt(component, sampling=voxel_size)
+        seeds, count = ndimage.label(h_maxima(distance, h).astype(bool) & component, structure=structure)
+        if count == 0:
+            # Too thin for h: one seed at the innermost voxel
+            seeds = np.zeros(distance.shape, dtype=np.int32)
+            seeds[np.unravel_index(np.argmax(distance), distance.shape)] = 1
+            count = 1
 
-    # Create labeled markers
-    markers = np.zeros(volume.shape, dtype=np.int32)
-    markers[tuple(coordinates.T)] = np.arange(1, len(coordinates) + 1)
+        region = markers[grown]
+        seeded = seeds > 0
+        region[seeded] = seeds[seeded] + (next_label - 1)
+        next_label += count
+
+    logger.debug(f"Generated {next_label - 1} watershed markers")
 
     return markers
 
 
 @benchmark
 def blob_detection_3d(
-    volume: np.ndarray,
+    volume: Union[np.ndarray, DeviceVolume],
     min_sigma: float = 1.0,
     max_sigma: float = 50.0,
     num_sigma: int = 10,
     threshold: float = 0.1,
     overlap: float = 0.5,
-    progress_callback: Optional[Callable[[float], None]] = None
+    progress_callback: Optional[Callable[[float], None]] = None,
+    pyramid: bool = False
 ) -> List[Tuple[int, int, int, float]]:
     """
     GPU-accelerated 3D blob detection using Laplacian of Gaussian.
 
-    Detects blob-like structures (cells, nuclei, organelles) using LoG
-    across multiple scales.
+    Detects bright blob-like structures (cells, nuclei, organelles) as
+    maxima of the scale-normalized LoG response -sigma^2 * laplacian(G * I)
+    over space and scale.
+
+    The scale space is streamed: only three adjacent scales are held, and
+    the 3x3x3x3 maxima of the middle one are extracted as soon as the next
+    scale is ready, so memory is independent of num_sigma. Each blur starts
+    from the previous scale's blur (Gaussians compose, so only the
+    increment sqrt(sigma_i^2 - sigma_(i-1)^2) is applied). With
+    ``pyramid=True`` the blurred volume is halved along every axis once its
+    sigma is large enough that subsampling does not alias, so coarse
+    scales run on 1/8, 1/64, ... of the voxels; their positions are
+    reported in full-resolution coordinates.
+
+    As with peak_local_max(exclude_border=True) over the stacked scale
+    space, blobs are only reported at the inner scales and at least one
+    voxel from the volume border.
 
     Args:
         volume: Input 3D volume
@@ -139,13 +205,20 @@ def blob_detection_3d(
         threshold: Blob detection threshold
         overlap: Maximum overlap between blobs (0-1)
         progress_callback: Progress callback
+        pyramid: Downsample at coarse scales (octave pyramid)
 
     Returns:
         List of blobs as (z, y, x, sigma) tuples
     """
+    from collections import deque
+
     if progress_callback:
         progress_callback(0.0)
 
+    # Upload once; scales blur and take the Laplacian on the device
+    if not isinstance(volume, DeviceVolume):
+        volume = DeviceVolume.from_numpy(volume)
+
     # Generate sigma values (scale space)
     sigmas = np.logspace(
         np.log10(min_sigma),
@@ -153,72 +226,148 @@ def blob_detection_3d(
         num_sigma
     )
 
-    # Compute LoG at each scale
-    log_images = []
-    for i, sigma in enumerate(sigmas):
-        # Apply Gaussian blur
-        blurred = gaussian_blur_3d(volume, sigma=sigma, progress_callback=None)
-
-        # Compute Laplacian (second derivative)
-        laplacian = _laplacian_3d(blurred)
+    blurred = volume
+    blurred_sigma = 0.0  # in full-resolution voxels
+    factor = 1  # pyramid downsampling of the current level
 
-        # Normalize by sigma^2 (scale normalization)
-        laplacian = laplacian * (sigma ** 2)
+    scales: "deque[_ScaleResponse]" = deque(maxlen=3)
+    blobs = []
 
-        log_images.append(laplacian)
+    for i, sigma in enumerate(sigmas):
+        if pyramid and blurred_sigma / factor >= 2 * _PYRAMID_MIN_SIGMA and min(blurred.shape) >= 2 * _PYRAMID_MIN_SIZE:
+            # Halving leaves at least _PYRAMID_MIN_SIGMA voxels of blur, so
+            # the subsampled volume is band-limited
+            blurred = DeviceVolume.from_numpy(np.ascontiguousarray(as_numpy(blurred)[::2, ::2, ::2]))
+            factor *= 2
+
+        # Incremental blur from the previous scale (FIR or recursive, chosen per sigma)
+        increment = np.sqrt(sigma ** 2 - blurred_sigma ** 2) / factor
+        blurred, blur_info = gaussian_blur_3d(blurred, sigma=increment, return_info=True)
+        blurred_sigma = sigma
+        logger.debug(
+            f"Scale {i + 1}/{num_sigma}: sigma={sigma:.2f} (+{increment:.2f} at 1/{factor}) "
+            f"via {blur_info['method']}"
+        )
+
+        # Negative Laplacian (bright blobs are maxima), normalized by sigma^2
+        # in the current level's voxels
+        response = as_numpy(_laplacian_3d(blurred, scale=-(sigma / factor) ** 2))
+        scales.append(_ScaleResponse(response, sigma, factor))
+
+        if len(scales) == 3:
+            blobs.extend(_scale_space_maxima(*scales, threshold))
 
         if progress_callback:
-            progress_callback((i + 1) / num_sigma * 0.8)
+            progress_callback((i + 1) / num_sigma * 0.9)
 
-    # Stack scale space
-    log_stack = np.stack(log_images, axis=0)
+    # Remove overlapping blobs
+    blobs = _remove_overlapping_blobs(blobs, overlap)
 
     if progress_callback:
-        progress_callback(0.85)
+        progress_callback(1.0)
 
-    # Find local maxima in scale space
-    from skimage.feature import peak_local_max
+    logger.info(f"Detected {len(blobs)} blobs")
+    return blobs
 
-    # Find peaks in 4D (scale + 3D space)
-    coordinates = peak_local_max(
-        log_stack,
-        threshold_abs=threshold,
-        exclude_border=True
-    )
 
-    if progress_callback:
-        progress_callback(0.95)
+# Blur (in level voxels) left after halving a pyramid level, and the
+# smallest level extent that is still halved
+_PYRAMID_MIN_SIGMA = 2.0
+_PYRAMID_MIN_SIZE = 8
 
-    # Filter overlapping blobs
-    blobs = []
-    for coord in coordinates:
-        scale_idx = coord[0]
-        z, y, x = coord[1:]
-        sigma = sigmas[scale_idx]
-        blobs.append((int(z), int(y), int(x), float(sigma)))
 
-    # Remove overlapping blobs
-    blobs = _remove_overlapping_blobs(blobs, overlap)
+class _ScaleResponse:
+    """LoG response at one scale and its 3x3x3 neighbourhood maximum."""
 
-    if progress_callback:
-        progress_callback(1.0)
+    def __init__(self, response: np.ndarray, sigma: float, factor: int):
+        from scipy import ndimage
 
-    logger.info(f"Detected {len(blobs)} blobs")
-    return blobs
+        self.response = response
+        self.sigma = float(sigma)
+        self.factor = factor
+        self.neighbourhood = ndimage.maximum_filter(response, size=3, mode="nearest")
+
+    def neighbourhood_on(self, reference: "_ScaleResponse") -> np.ndarray:
+        """Neighbourhood maximum resampled to another pyramid level."""
+        if self.factor == reference.factor:
+            return self.neighbourhood
+
+        shape = reference.response.shape
+        if self.factor < reference.factor:
+            step = reference.factor // self.factor
+            return self.neighbourhood[::step, ::step, ::step][:shape[0], :shape[1], :shape[2]]
 
+        repeated = self.neighbourhood
+        for axis in range(3):
+            repeated = np.repeat(repeated, self.factor // reference.factor, axis=axis)
+        return repeated[:shape[0], :shape[1], :shape[2]]
 
-def _laplacian_3d(volume: np.ndarray) -> np.ndarray:
+
+def _scale_space_maxima(
+    below: _ScaleResponse,
+    scale: _ScaleResponse,
+    above: _ScaleResponse,
+    threshold: float
+) -> List[Tuple[int, int, int, float]]:
+    """
+    Blobs at the middle of three adjacent scales.
+
+    A voxel is a blob if its response exceeds the threshold and is the
+    maximum of its 3x3x3 neighbourhood at this and both adjacent scales.
+    Neighbouring scales on another pyramid level are compared on this
+    scale's grid.
+
+    Returns:
+        Blobs as (z, y, x, sigma) in full-resolution coordinates
+    """
+    neighbourhood = np.maximum(scale.neighbourhood, below.neighbourhood_on(scale))
+    np.maximum(neighbourhood, above.neighbourhood_on(scale), out=neighbourhood)
+
+    peaks = (scale.response >= neighbourhood) & (scale.response > threshold)
+    del neighbourhood
+
+    # Exclude the volume border
+    for axis in range(3):
+        index = [slice(None)] * 3
+        index[axis] = [0, -1]
+        peaks[tuple(index)] = False
+
+    coordinates = np.argwhere(peaks) * scale.factor
+    return [(int(z), int(y), int(x), scale.sigma) for z, y, x in coordinates]
+
+
+def _laplacian_3d(
+    volume: Union[np.ndarray, DeviceVolume],
+    scale: float = 1.0
+) -> Union[np.ndarray, DeviceVolume]:
     """
     Compute 3D Laplacian (sum of second derivatives).
 
+    A DeviceVolume already on the device is differentiated there, as a
+    lazy sum of three 3-tap passes. With a one-voxel border, replicate
+    padding equals scipy's "reflect" mode, so both paths agree.
+
     Args:
         volume: Input volume
+        scale: Factor applied to the result (e.g. sigma^2 normalization)
 
     Returns:
-        Laplacian volume
+        Laplacian volume (DeviceVolume for device-resident input)
     """
     from scipy import ndimage
 
+    if isinstance(volume, DeviceVolume):
+        if not volume.on_device:
+            volume = volume.numpy()
+        else:
+            second = np.array([1.0, -2.0, 1.0])
+            tensor = volume.tensor
+            storage = tensor.dtype
+            # Sum the three derivatives in float32 (fused, no extra memory)
+            tensor = tensor.cast(_device_manager.get_accumulator_dtype())
+            laplacian = sum(_convolve_1d(tensor, second, axis=axis) for axis in range(3))
+            return DeviceVolume.from_tensor((laplacian * scale).cast(storage))
+
     # Laplacian kernel
     laplacian_kernel = np.array([
         [[0, 0, 0], [0, 1, 0], [0, 0, 0]],
@@ -226,7 +375,7 @@ def _laplacian_3d(volume: np.ndarray) -> np.ndarray:
         [[0, 0, 0], [0, 1, 0], [0, 0, 0]]
     ], dtype=np.float32)
 
-    return ndimage.convolve(volume, laplacian_kernel)
+    return ndimage.convolve(volume, laplacian_kernel) * scale
 
 
 def _remove_overlapping_blobs(
@@ -236,113 +385,176 @@ def _remove_overlapping_blobs(
     """
     Remove overlapping blobs based on overlap threshold.
 
+    Each blob is a sphere of radius sqrt(3) * sigma. Blobs are visited
+    from the largest sigma down, and a blob is dropped if the volume it
+    shares with an already kept blob exceeds ``overlap`` times the volume
+    of the smaller sphere (as skimage's blob_log pruning). Candidate pairs
+    come from KD-tree queries over radius classes (powers of two): each
+    pair of classes is searched up to the sum of their largest radii, so
+    a few large blobs do not widen the search among the small ones and the
+    cost stays near-linear in the number of blobs for typical densities.
+
     Args:
         blobs: List of (z, y, x, sigma) tuples
         overlap: Maximum allowed overlap (0-1)
 
     Returns:
-        Filtered list of blobs
+        Filtered list of blobs, largest sigma first
     """
+    from scipy import sparse
+    from scipy.spatial import cKDTree
+
     if len(blobs) == 0:
         return []
 
     # Sort by sigma (larger blobs first)
     blobs = sorted(blobs, key=lambda b: b[3], reverse=True)
+    array = np.asarray(blobs, dtype=np.float64)
+    centers = array[:, :3]
+    radii = array[:, 3] * np.sqrt(3)
+
+    # Spheres further apart than the sum of their radii never overlap;
+    # bound each pair of radius classes by their largest radii
+    classes = np.floor(np.log2(np.maximum(radii, 1e-12))).astype(np.int64)
+    members = [np.flatnonzero(classes == c) for c in np.unique(classes)]
+    trees = [cKDTree(centers[index]) for index in members]
+    bounds = [radii[index].max() for index in members]
+
+    pairs = []
+    for a in range(len(members)):
+        local = trees[a].query_pairs(2 * bounds[a], output_type="ndarray")
+        pairs.append(members[a][local])
+        for b in range(a + 1, len(members)):
+            cross = trees[a].sparse_distance_matrix(trees[b], bounds[a] + bounds[b], output_type="ndarray")
+            pairs.append(np.stack([members[a][cross["i"]], members[b][cross["j"]]], axis=1))
+    pairs = np.concatenate(pairs).reshape(-1, 2)
+    if len(pairs) == 0:
+        return blobs
+
+    first, second = pairs.min(axis=1), pairs.max(axis=1)
+    distance = np.linalg.norm(centers[first] - centers[second], axis=1)
+    conflicting = _sphere_overlap(distance, radii[first], radii[second]) > overlap
+    first, second = first[conflicting], second[conflicting]
+
+    # Blobs that a larger (earlier) blob may suppress, grouped by that blob
+    suppresses = sparse.csr_matrix(
+        (np.ones(len(first), dtype=bool), (first, second)), shape=(len(blobs), len(blobs))
+    )
 
-    # Track which blobs to keep
     keep = np.ones(len(blobs), dtype=bool)
+    for i in np.unique(first):
+        if keep[i]:
+            keep[suppresses.indices[suppresses.indptr[i]:suppresses.indptr[i + 1]]] = False
 
-    for i in range(len(blobs)):
-        if not keep[i]:
-            continue
+    return [blob for blob, kept in zip(blobs, keep) if kept]
 
-        z1, y1, x1, s1 = blobs[i]
 
-        for j in range(i + 1, len(blobs)):
-            if not keep[j]:
-                continue
+def _sphere_overlap(distance: np.ndarray, r1: np.ndarray, r2: np.ndarray) -> np.ndarray:
+    """
+    Intersection volume of sphere pairs as a fraction of the smaller sphere.
+
+    Args:
+        distance: Center distances
+        r1: First radii
+        r2: Second radii
 
-            z2, y2, x2, s2 = blobs[j]
+    Returns:
+        Overlap fractions in [0, 1]
+    """
+    smaller = np.minimum(r1, r2)
+    fraction = np.zeros_like(distance)
 
-            # Compute distance between blob centers
-            distance = np.sqrt((z1 - z2)**2 + (y1 - y2)**2 + (x1 - x2)**2)
+    # One sphere inside the other
+    contained = distance <= np.abs(r1 - r2)
+    fraction[contained] = 1.0
 
-            # Check overlap
-            if distance < overlap * (s1 + s2):
-                keep[j] = False
+    # Lens-shaped intersection
+    partial = ~contained & (distance < r1 + r2)
+    d, a, b = distance[partial], r1[partial], r2[partial]
+    volume = np.pi * (a + b - d) ** 2 * (d ** 2 + 2 * d * (a + b) - 3 * (a - b) ** 2) / (12 * d)
+    fraction[partial] = volume / (4.0 / 3.0 * np.pi * smaller[partial] ** 3)
 
-    return [blobs[i] for i in range(len(blobs)) if keep[i]]
+    return np.clip(fraction, 0.0, 1.0)
 
 
 @benchmark
 def threshold_segmentation(
-    volume: np.ndarray,
+    volume: Union[np.ndarray, DeviceVolume],
     method: str = "otsu",
     threshold_value: Optional[float] = None,
     min_object_size: int = 100,
     fill_holes: bool = True,
-    progress_callback: Optional[Callable[[float], None]] = None
+    progress_callback: Optional[Callable[[float], None]] = None,
+    histogram: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    classes: int = 3
 ) -> Tuple[np.ndarray, Dict]:
     """
     GPU-accelerated threshold-based segmentation with morphological cleanup.
 
+    Automatic methods share one intensity histogram (see compute_histogram).
+    Pass a precomputed ``histogram`` to try several methods on the same
+    volume without re-reading it.
+
     Args:
         volume: Input volume
-        method: Thresholding method ("otsu", "manual")
+        method: Thresholding method ("otsu", "multiotsu", "li", "triangle",
+            "yen", "manual"). "multiotsu" keeps the brightest class.
         threshold_value: Manual threshold value (if method="manual")
         min_object_size: Minimum object size to keep
         fill_holes: Whether to fill holes in objects
         progress_callback: Progress callback
+        histogram: Optional precomputed (counts, bin_centers)
+        classes: Number of classes for "multiotsu"
 
     Returns:
-        Tuple of (segmented_volume, metadata_dict)
+        Tuple of (segmented_volume, metadata_dict); labels are sequential
+        and stored in the smallest unsigned dtype that fits
     """
     if progress_callback:
         progress_callback(0.0)
 
+    volume = as_numpy(volume)
+
     # Determine threshold
-    if method == "otsu":
-        threshold, binary = otsu_threshold(volume, progress_callback=None)
-        logger.info(f"Otsu threshold: {threshold:.4f}")
+    thresholds = None
+    if method in THRESHOLD_METHODS:
+        if histogram is None:
+            histogram = compute_histogram(volume)
+        result = histogram_threshold(*histogram, method=method, classes=classes)
+        if method == "multiotsu":
+            thresholds = result
+            threshold = result[-1]
+        else:
+            threshold = result
+        binary = volume > threshold
+        logger.info(f"{method} threshold: {threshold:.4f}")
     elif method == "manual":
         if threshold_value is None:
             raise ValueError("threshold_value required for manual method")
         threshold = threshold_value
-        binary = (volume >= threshold).astype(np.float32)
+        binary = volume >= threshold
     else:
         raise ValueError(f"Unknown thresholding method: {method}")
 
     if progress_callback:
         progress_callback(0.3)
 
-    # Morphological operations for cleanup
-    from scipy import ndimage
-
-    # Fill holes
+    # Fill holes (bool mask, one flood fill of the background from the border)
     if fill_holes:
-        binary = ndimage.binary_fill_holes(binary).astype(np.float32)
+        binary = _fill_holes(binary)
 
     if progress_callback:
         progress_callback(0.5)
 
-    # Remove small objects
-    labeled, num_features = ndimage.label(binary)
-    if min_object_size > 1:
-        sizes = ndimage.sum(binary, labeled, range(num_features + 1))
-        mask = sizes >= min_object_size
-        binary = mask[labeled]
-
-    if progress_callback:
-        progress_callback(0.8)
-
-    # Relabel cleaned segmentation
-    labeled, num_features = ndimage.label(binary)
+    # Label once; small objects are dropped by the sequential relabel LUT
+    labeled, num_features = connected_components_3d(binary, min_size=min_object_size)
 
     if progress_callback:
         progress_callback(1.0)
 
     metadata = {
         "threshold": float(threshold),
+        "thresholds": thresholds,
         "method": method,
         "num_objects": int(num_features),
         "min_object_size": min_object_size,
@@ -354,123 +566,33 @@ def threshold_segmentation(
     return labeled, metadata
 
 
-class UNet3D:
+def _fill_holes(binary: np.ndarray) -> np.ndarray:
     """
-    Simple 3D U-Net style encoder-decoder for segmentation.
-
-    This is a lightweight implementation optimized for microscopy images.
-    For production use, train on your specific dataset.
-    """
-
-    def __init__(
-        self,
-        in_channels: int = 1,
-        out_channels: int = 1,
-        base_channels: int = 32
-    ):
-        """
-        Initialize 3D U-Net.
-
-        Args:
-            in_channels: Number of input channels
-            out_channels: Number of output channels (classes)
-            base_channels: Base number of channels (doubles at each level)
-        """
-        self.in_channels = in_channels
-        self.out_channels = out_channels
-        self.base_channels = base_channels
-
-        logger.info(f"Initialized UNet3D: in={in_channels}, out={out_channels}, base={base_channels}")
-
-    @benchmark
-    def forward(
-        self,
-        volume: np.ndarray,
-        progress_callback: Optional[Callable[[float], None]] = None
-    ) -> np.ndarray:
-        """
-        Forward pass through U-Net.
-
-        Args:
-            volume: Input volume (C, D, H, W) or (D, H, W)
-            progress_callback: Progress callback
-
-        Returns:
-            Segmentation logits
-        """
-        if progress_callback:
-            progress_callback(0.0)
-
-        # Add channel dimension if needed
-        if volume.ndim == 3:
-            volume = volume[np.newaxis, :]
+    Fill background regions not connected to the volume border.
 
-        # Convert to tensor
-        x = to_tensor(volume)
-
-        # Note: This is a placeholder architecture
-        # Production U-Net would have proper encoder-decoder with skip connections
-        # Training would be done on labeled data
-
-        if progress_callback:
-            progress_callback(0.5)
-
-        # Placeholder: simple threshold-based segmentation
-        # Replace with trained model inference
-        output = (x > x.mean()).cast(dtypes.float32)
-
-        if progress_callback:
-            progress_callback(1.0)
-
-        result = to_numpy(output)
-
-        # Remove channel dimension if single class
-        if self.out_channels == 1:
-            result = result[0]
-
-        return result
-
-    def train(self, train_data, train_labels, epochs: int = 100):
-        """
-        Train the U-Net model.
-
-        Args:
-            train_data: Training volumes
-            train_labels: Training labels
-            epochs: Number of training epochs
-        """
-        logger.warning("UNet3D.train() not implemented - use pretrained model or implement training loop")
-        # Production implementation would include:
-        # - Data loading and augmentation
-        # - Loss function (Dice + Cross-entropy)
-        # - Optimizer (Adam)
-        # - Training loop with validation
-        # - Checkpoint saving
-        pass
-
-
-def create_unet_model(
-    in_channels: int = 1,
-    out_channels: int = 1,
-    pretrained: bool = False
-) -> UNet3D:
-    """
-    Factory function to create U-Net model.
+    Equivalent to ``ndimage.binary_fill_holes`` (6-connected background),
+    but done as one labeling of the background: components that reach a
+    border face are outside, everything else is a hole.
 
     Args:
-        in_channels: Number of input channels
-        out_channels: Number of output channels
-        pretrained: Whether to load pretrained weights
+        binary: Boolean mask
 
     Returns:
-        UNet3D model instance
+        Boolean mask with holes filled
     """
-    model = UNet3D(
-        in_channels=in_channels,
-        out_channels=out_channels
-    )
+    background, num_regions = connected_components_3d(~binary, min_size=1)
+
+    faces = [background[index] for axis in range(3) for index in _border_faces(axis)]
+    outside = np.zeros(num_regions + 1, dtype=bool)
+    outside[np.unique(np.concatenate([face.ravel() for face in faces]))] = True
+    outside[0] = False  # Foreground
+
+    return ~outside[background]
 
-    if pretrained:
-        logger.warning("Pretrained U-Net not available - train your own or use other segmentation methods")
 
-    return model
+def _border_faces(axis: int) -> Tuple[Tuple[Union[int, slice], ...], ...]:
+    """Index tuples of the first and last slice along an axis of a 3D array."""
+    first = [slice(None)] * 3
+    last = [slice(None)] * 3
+    first[axis], last[axis] = 0, -1
+    return tuple(first), tuple(last)
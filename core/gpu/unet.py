@@ -0,0 +1,504 @@
+"""
+3D U-Net inference with tiled, Gaussian-blended prediction.
+
+``UNet3D`` is a standard 3D U-Net (Cicek et al., 2016): per level two
+3x3x3 convolutions with ReLU, 2x2x2 max pooling on the way down,
+2x2x2 stride-2 transposed convolutions and skip concatenation on the way
+up, and a 1x1x1 head with a sigmoid (one class) or softmax.
+
+Weights are loaded from a local ``.safetensors`` or ``.npz`` file using
+PyTorch parameter names and layouts::
+
+    encoder.{level}.conv1.weight / .bias    (out, in, 3, 3, 3)
+    encoder.{level}.conv2.weight / .bias
+    decoder.{level}.up.weight / .bias       (in, out, 2, 2, 2)
+    decoder.{level}.conv1.weight / .bias
+    decoder.{level}.conv2.weight / .bias
+    head.weight / .bias                     (classes, base, 1, 1, 1)
+
+so a model trained with ``torch.nn.Conv3d`` / ``ConvTranspose3d`` layers
+of the same structure can be exported with ``safetensors.torch.save_file``.
+The architecture (input channels, classes, base width, depth) is read
+from the weight shapes.
+
+``UNet3D.predict`` runs sliding-window inference: tiles overlap, each
+tile's prediction is weighted by a Gaussian importance map (low at tile
+borders, where the receptive field is truncated), and several tiles go
+through one forward pass. The forward graph runs through the TinyJit
+kernel cache, so every batch after the first replays the captured
+kernels. Tiles are read with ``volume[slices]`` (NumPy, memmap or dask)
+and accumulated in a band one tile deep along Z, so working memory does
+not grow with the stack depth; ``out`` may be a memmap.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from tinygrad.tensor import Tensor
+
+from .device_manager import DeviceManager
+from .kernel_cache import get_kernel_cache
+from .kernels import to_tensor, benchmark
+
+logger = logging.getLogger(__name__)
+_device_manager = DeviceManager()
+
+UNET_WEIGHT_SUFFIXES = (".safetensors", ".npz")
+
+
+class UNet3D:
+    """
+    3D U-Net for voxel-wise segmentation.
+
+    Without loaded weights the parameters are He-initialized, which is
+    only useful as a starting point for training.
+    """
+
+    def __init__(
+        self,
+        in_channels: int = 1,
+        out_channels: int = 1,
+        base_channels: int = 32,
+        depth: int = 4
+    ):
+        """
+        Initialize 3D U-Net.
+
+        Args:
+            in_channels: Number of input channels
+            out_channels: Number of output channels (classes)
+            base_channels: Base number of channels (doubles at each level)
+            depth: Number of resolution levels (depth - 1 poolings)
+        """
+        if depth < 1:
+            raise ValueError(f"U-Net depth must be at least 1, got {depth}")
+
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        self.base_channels = base_channels
+        self.depth = depth
+
+        self.weights = _initial_weights(self.parameter_shapes())
+        self._tensors: Optional[List[Tensor]] = None
+
+        logger.info(
+            f"Initialized UNet3D: in={in_channels}, out={out_channels}, "
+            f"base={base_channels}, depth={depth}"
+        )
+
+    def parameter_shapes(self) -> Dict[str, Tuple[int, ...]]:
+        """Expected shape of every parameter, in PyTorch layout."""
+        shapes: Dict[str, Tuple[int, ...]] = {}
+        width = [self.base_channels * 2 ** level for level in range(self.depth)]
+
+        def conv(name: str, channels_in: int, channels_out: int, kernel: int = 3) -> None:
+            shapes[f"{name}.weight"] = (channels_out, channels_in) + (kernel,) * 3
+            shapes[f"{name}.bias"] = (channels_out,)
+
+        for level in range(self.depth):
+            conv(f"encoder.{level}.conv1", self.in_channels if level == 0 else width[level - 1], width[level])
+            conv(f"encoder.{level}.conv2", width[level], width[level])
+
+        for level in range(self.depth - 1):
+            shapes[f"decoder.{level}.up.weight"] = (width[level + 1], width[level], 2, 2, 2)
+            shapes[f"decoder.{level}.up.bias"] = (width[level],)
+            conv(f"decoder.{level}.conv1", 2 * width[level], width[level])
+            conv(f"decoder.{level}.conv2", width[level], width[level])
+
+        conv("head", width[0], self.out_channels, kernel=1)
+        return shapes
+
+    @classmethod
+    def from_weights(cls, path: Union[str, Path]) -> "UNet3D":
+        """
+        Create a model whose architecture matches a weight file, and load it.
+
+        Args:
+            path: .safetensors or .npz file
+
+        Returns:
+            UNet3D with the weights loaded
+        """
+        weights = _read_weights(path)
+
+        try:
+            first = weights["encoder.0.conv1.weight"].shape
+            head = weights["head.weight"].shape
+        except KeyError as e:
+            raise ValueError(f"{path} is not a UNet3D weight file (missing {e})") from None
+        depth = sum(1 for name in weights if name.startswith("encoder.") and name.endswith(".conv1.weight"))
+
+        model = cls(in_channels=first[1], out_channels=head[0], base_channels=first[0], depth=depth)
+        model.load_weights(weights)
+        return model
+
+    def load_weights(self, source: Union[str, Path, Dict[str, np.ndarray]]) -> None:
+        """
+        Load parameters from a weight file or a name -> array dict.
+
+        Args:
+            source: .safetensors / .npz path, or dict of arrays
+
+        Raises:
+            ValueError: If parameters are missing or have the wrong shape
+        """
+        weights = source if isinstance(source, dict) else _read_weights(source)
+        expected = self.parameter_shapes()
+
+        missing = sorted(set(expected) - set(weights))
+        if missing:
+            raise ValueError(f"Missing U-Net parameters: {', '.join(missing[:5])}")
+
+        loaded = {}
+        for name, shape in expected.items():
+            array = np.asarray(weights[name], dtype=np.float32)
+            if array.shape != shape:
+                raise ValueError(f"Parameter {name} has shape {array.shape}, expected {shape}")
+            loaded[name] = array
+
+        unused = sorted(set(weights) - set(expected))
+        if unused:
+            logger.warning(f"Ignoring {len(unused)} unknown U-Net parameters (e.g. {unused[0]})")
+
+        self.weights = loaded
+        self._tensors = None
+
+    def _device_weights(self) -> List[Tensor]:
+        """Parameters as realized device tensors, in parameter_shapes order."""
+        if self._tensors is None:
+            self._tensors = [to_tensor(self.weights[name]).realize() for name in self.parameter_shapes()]
+        return self._tensors
+
+    def _forward_graph(self, x: Tensor, *parameters: Tensor) -> Tensor:
+        """U-Net graph on a (batch, channels, z, y, x) tensor."""
+        p = dict(zip(self.parameter_shapes(), parameters))
+
+        def block(x: Tensor, name: str) -> Tensor:
+            x = x.conv2d(p[f"{name}.conv1.weight"], p[f"{name}.conv1.bias"], padding=1).relu()
+            return x.conv2d(p[f"{name}.conv2.weight"], p[f"{name}.conv2.bias"], padding=1).relu()
+
+        skips = []
+        for level in range(self.depth):
+            x = block(x, f"encoder.{level}")
+            if level < self.depth - 1:
+                skips.append(x)
+                b, c, z, y, w = x.shape
+                x = x.reshape(b, c, z // 2, 2, y // 2, 2, w // 2, 2).max(axis=(3, 5, 7))
+
+        for level in reversed(range(self.depth - 1)):
+            x = x.conv_transpose2d(p[f"decoder.{level}.up.weight"], p[f"decoder.{level}.up.bias"], stride=2)
+            x = block(skips[level].cat(x, dim=1), f"decoder.{level}")
+
+        x = x.conv2d(p["head.weight"], p["head.bias"])
+        return x.sigmoid() if self.out_channels == 1 else x.softmax(axis=1)
+
+    def forward_batch(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run one forward pass on a batch of tiles.
+
+        Args:
+            batch: (batch, channels, z, y, x) tiles; spatial sizes must be
+                multiples of 2 ** (depth - 1)
+
+        Returns:
+            (batch, classes, z, y, x) probabilities (float32)
+        """
+        multiple = 2 ** (self.depth - 1)
+        if batch.ndim != 5 or any(n % multiple for n in batch.shape[2:]):
+            raise ValueError(f"Expected (B, C, Z, Y, X) tiles with sizes divisible by {multiple}, got {batch.shape}")
+
+        inputs = [to_tensor(np.ascontiguousarray(batch, dtype=np.float32))] + self._device_weights()
+        params = (self.in_channels, self.out_channels, self.base_channels, self.depth)
+        result = get_kernel_cache().run("unet3d_forward", self._forward_graph, inputs, params=params)
+        return np.asarray(result, dtype=np.float32)
+
+    @benchmark
+    def predict(
+        self,
+        volume: Any,
+        tile_shape: Tuple[int, int, int] = (32, 128, 128),
+        overlap: float = 0.25,
+        batch_size: int = 4,
+        out: Optional[np.ndarray] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> np.ndarray:
+        """
+        Sliding-window prediction over a whole stack.
+
+        Tiles step by ``tile * (1 - overlap)`` and the last tile on each
+        axis is aligned with the volume end. Predictions are blended with a
+        Gaussian importance map (sigma = tile / 8) and normalized by the
+        summed weights. Every forward pass has ``batch_size`` tiles (the
+        last batch is zero-padded), so one JIT kernel serves the run.
+
+        Args:
+            volume: (C, Z, Y, X) or (Z, Y, X) volume, NumPy, memmap or dask
+            tile_shape: Tile shape (z, y, x); multiples of 2 ** (depth - 1).
+                Axes shorter than the tile are edge-padded.
+            overlap: Fraction of the tile shared with its neighbour (0-0.9)
+            batch_size: Tiles per forward pass
+            out: Optional output array (float32, (classes, Z, Y, X), or
+                (Z, Y, X) for one class), e.g. a memmap
+            progress_callback: Progress callback
+
+        Returns:
+            Probabilities (float32), (Z, Y, X) for one class or
+            (classes, Z, Y, X); ``out`` if given
+        """
+        if progress_callback:
+            progress_callback(0.0)
+
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError(f"overlap must be in [0, 1), got {overlap}")
+        multiple = 2 ** (self.depth - 1)
+        tile_shape = tuple(int(t) for t in tile_shape)
+        if len(tile_shape) != 3 or any(t <= 0 or t % multiple for t in tile_shape):
+            raise ValueError(f"tile_shape must be 3 positive multiples of {multiple}, got {tile_shape}")
+
+        if volume.ndim == 3:
+            volume = volume[np.newaxis]
+        if volume.shape[0] != self.in_channels:
+            raise ValueError(f"Expected {self.in_channels} input channels, got {volume.shape[0]}")
+
+        shape = tuple(int(n) for n in volume.shape[1:])
+        starts = [_tile_starts(n, t, overlap) for n, t in zip(shape, tile_shape)]
+        plane_tiles = [(y, x) for y in starts[1] for x in starts[2]]
+        total_tiles = len(starts[0]) * len(plane_tiles)
+
+        if out is None:
+            out = np.empty(shape if self.out_channels == 1 else (self.out_channels,) + shape, dtype=np.float32)
+        output = out[np.newaxis] if out.ndim == 3 else out
+
+        importance = _importance_map(tile_shape)
+
+        # Accumulators for one tile depth of Z; rows are flushed to the
+        # output once no later tile can reach them
+        band_depth = tile_shape[0]
+        accumulated = np.zeros((self.out_channels, band_depth) + shape[1:], dtype=np.float32)
+        weights = np.zeros((band_depth,) + shape[1:], dtype=np.float32)
+        band_start = 0
+
+        logger.info(
+            f"U-Net inference on {shape}: {total_tiles} tiles of {tile_shape} "
+            f"(overlap {overlap:.0%}, batch {batch_size})"
+        )
+
+        done = 0
+        for z_index, z in enumerate(starts[0]):
+            # Flush rows before this tile row and shift the band
+            shift = z - band_start
+            if shift:
+                _flush(output, accumulated, weights, band_start, shift)
+                accumulated[:, :band_depth - shift] = accumulated[:, shift:]
+                accumulated[:, band_depth - shift:] = 0
+                weights[:band_depth - shift] = weights[shift:]
+                weights[band_depth - shift:] = 0
+                band_start = z
+
+            for first in range(0, len(plane_tiles), batch_size):
+                group = plane_tiles[first:first + batch_size]
+                batch = np.zeros((batch_size, self.in_channels) + tile_shape, dtype=np.float32)
+                for i, (y, x) in enumerate(group):
+                    batch[i] = _read_tile(volume, (z, y, x), tile_shape)
+
+                predictions = self.forward_batch(batch)
+
+                for i, (y, x) in enumerate(group):
+                    size = tuple(min(t, n - s) for t, n, s in zip(tile_shape, shape, (z, y, x)))
+                    region = (slice(0, size[0]), slice(y, y + size[1]), slice(x, x + size[2]))
+                    tile_weight = importance[:size[0], :size[1], :size[2]]
+                    accumulated[(slice(None),) + region] += predictions[i][:, :size[0], :size[1], :size[2]] * tile_weight
+                    weights[region] += tile_weight
+
+                done += len(group)
+                if progress_callback:
+                    progress_callback(done / total_tiles)
+
+        _flush(output, accumulated, weights, band_start, min(band_depth, shape[0] - band_start))
+
+        if progress_callback:
+            progress_callback(1.0)
+
+        return out
+
+    def forward(
+        self,
+        volume: np.ndarray,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> np.ndarray:
+        """
+        Forward pass through U-Net (tiled, see predict).
+
+        Args:
+            volume: Input volume (C, D, H, W) or (D, H, W)
+            progress_callback: Progress callback
+
+        Returns:
+            Segmentation probabilities
+        """
+        return self.predict(volume, progress_callback=progress_callback)
+
+    def train(self, train_data, train_labels, epochs: int = 100):
+        """
+        Train the U-Net model.
+
+        Args:
+            train_data: Training volumes
+            train_labels: Training labels
+            epochs: Number of training epochs
+        """
+        logger.warning("UNet3D.train() not implemented - train externally and load the weights")
+        # Production implementation would include:
+        # - Data loading and augmentation
+        # - Loss function (Dice + Cross-entropy)
+        # - Optimizer (Adam)
+        # - Training loop with validation
+        # - Checkpoint saving
+        pass
+
+
+def _initial_weights(shapes: Dict[str, Tuple[int, ...]]) -> Dict[str, np.ndarray]:
+    """He-normal weights and zero biases (fixed seed)."""
+    rng = np.random.default_rng(0)
+    weights = {}
+    for name, shape in shapes.items():
+        if name.endswith(".bias"):
+            weights[name] = np.zeros(shape, dtype=np.float32)
+        else:
+            fan_in = int(np.prod(shape[1:])) if ".up." not in name else shape[0] * int(np.prod(shape[2:]))
+            weights[name] = (rng.standard_normal(shape) * np.sqrt(2.0 / fan_in)).astype(np.float32)
+    return weights
+
+
+def _read_weights(path: Union[str, Path]) -> Dict[str, np.ndarray]:
+    """Read a .safetensors or .npz weight file into float32 arrays."""
+    path = Path(path).expanduser()
+    if path.suffix not in UNET_WEIGHT_SUFFIXES:
+        raise ValueError(f"Unsupported weight file {path} (expected {' or '.join(UNET_WEIGHT_SUFFIXES)})")
+    if not path.exists():
+        raise FileNotFoundError(f"U-Net weights not found: {path}")
+
+    if path.suffix == ".npz":
+        with np.load(path) as data:
+            return {name: data[name].astype(np.float32) for name in data.files}
+
+    from tinygrad.nn.state import safe_load
+
+    # safe_load maps the file on the DISK device; cast after moving it
+    return {
+        name: tensor.to(_device_manager.device).float().numpy()
+        for name, tensor in safe_load(str(path)).items()
+    }
+
+
+def _tile_starts(size: int, tile: int, overlap: float) -> List[int]:
+    """Tile origins along one axis; the last tile ends at the volume end."""
+    if size <= tile:
+        return [0]
+    step = max(int(tile * (1.0 - overlap)), 1)
+    starts = list(range(0, size - tile, step))
+    starts.append(size - tile)
+    return starts
+
+
+def _importance_map(tile_shape: Tuple[int, int, int]) -> np.ndarray:
+    """Separable Gaussian blending weights (sigma = tile / 8), peak 1, floor 1e-3."""
+    profiles = []
+    for t in tile_shape:
+        coordinates = np.arange(t, dtype=np.float32) - (t - 1) / 2.0
+        profiles.append(np.exp(-coordinates ** 2 / (2 * (t / 8.0) ** 2)))
+    importance = np.einsum("i,j,k->ijk", *profiles).astype(np.float32)
+    return np.maximum(importance / importance.max(), 1e-3)
+
+
+def _read_tile(volume: Any, start: Tuple[int, int, int], tile_shape: Tuple[int, int, int]) -> np.ndarray:
+    """Read a (C, z, y, x) tile, edge-padding axes that run past the volume."""
+    index = (slice(None),) + tuple(slice(s, s + t) for s, t in zip(start, tile_shape))
+    tile = np.asarray(volume[index], dtype=np.float32)
+    pad = [(0, 0)] + [(0, t - n) for t, n in zip(tile_shape, tile.shape[1:])]
+    if any(after for _, after in pad):
+        tile = np.pad(tile, pad, mode="edge")
+    return tile
+
+
+def _flush(
+    output: np.ndarray,
+    accumulated: np.ndarray,
+    weights: np.ndarray,
+    band_start: int,
+    rows: int
+) -> None:
+    """Write the first ``rows`` band rows, normalized by the blending weights."""
+    output[:, band_start:band_start + rows] = accumulated[:, :rows] / np.maximum(weights[:rows], 1e-12)
+
+
+def create_unet_model(
+    in_channels: int = 1,
+    out_channels: int = 1,
+    pretrained: bool = False,
+    weights_path: Optional[Union[str, Path]] = None
+) -> UNet3D:
+    """
+    Factory function to create U-Net model.
+
+    Args:
+        in_channels: Number of input channels
+        out_channels: Number of output channels
+        pretrained: Whether to load pretrained weights (from weights_path
+            or ZSTACK_UNET_WEIGHTS)
+        weights_path: Local .safetensors / .npz file; the architecture is
+            taken from the file
+
+    Returns:
+        UNet3D model instance
+    """
+    if pretrained and weights_path is None:
+        weights_path = os.environ.get("ZSTACK_UNET_WEIGHTS")
+        if not weights_path:
+            raise ValueError("No U-Net weights: pass weights_path or set ZSTACK_UNET_WEIGHTS")
+
+    if weights_path is not None:
+        model = load_unet_model(weights_path)
+        if (model.in_channels, model.out_channels) != (in_channels, out_channels):
+            raise ValueError(
+                f"{weights_path} has {model.in_channels} input and {model.out_channels} output "
+                f"channels, expected {in_channels} and {out_channels}"
+            )
+        return model
+
+    return UNet3D(in_channels=in_channels, out_channels=out_channels)
+
+
+# Loaded models by path with the file's modification time, so jobs share
+# device weights; a rewritten file replaces its entry
+_models: Dict[str, Tuple[float, UNet3D]] = {}
+_models_lock = threading.Lock()
+
+
+def load_unet_model(weights_path: Union[str, Path]) -> UNet3D:
+    """
+    Load a U-Net from a weight file, reusing an already loaded model.
+
+    Args:
+        weights_path: Local .safetensors / .npz file
+
+    Returns:
+        UNet3D (shared; do not modify its weights)
+    """
+    path = Path(weights_path).expanduser().resolve()
+    if not path.exists():
+        raise FileNotFoundError(f"U-Net weights not found: {path}")
+    mtime = path.stat().st_mtime
+
+    with _models_lock:
+        cached = _models.get(str(path))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        model = UNet3D.from_weights(path)
+        _models[str(path)] = (mtime, model)
+        logger.info(f"Loaded U-Net weights from {path}")
+        return model
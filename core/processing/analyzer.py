@@ -1,24 +1,41 @@
 import asyncio
+import contextvars
+import hashlib
+import json
+import tempfile
 import time
-from typing import Dict, Any, Optional, Callable, Awaitable
+from functools import partial
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
 import logging
+import os
 import numpy as np
 from pathlib import Path
 
 from core.processing.image_loader import ImageLoader
+from core.processing.image_writer import ImageWriter
 from core.gpu import (
     DeviceManager,
+    DeviceVolume,
+    track_transfers,
     gaussian_blur_3d,
     threshold_segmentation,
     watershed_segmentation_3d,
+    connected_components_3d,
+    load_unet_model,
     blob_detection_3d,
     colocalization_analysis,
     intensity_statistics,
     object_measurements,
     z_profile_analysis,
     richardson_lucy_deconvolution,
+    blind_richardson_lucy_deconvolution,
     wiener_deconvolution,
-    generate_psf,
+    wiener_deconvolution_multichannel,
+    tiled_deconvolution,
+    rolling_ball_background,
+    get_psf_library,
+    psf_parameters_from_metadata,
+    psf_sigma,
 )
 
 logger = logging.getLogger(__name__)
@@ -36,6 +53,8 @@ class ZStackAnalyzer:
             "blob_detection": self._run_blob_detection,
             "object_measurements": self._run_object_measurements,
             "z_profile": self._run_z_profile,
+            "background_subtraction": self._run_background_subtraction,
+            "ml_segmentation": self._run_ml_segmentation,
         }
 
         logger.info(f"Initialized ZStackAnalyzer with device: {self.device_manager.device}")
@@ -45,6 +64,17 @@ class ZStackAnalyzer:
         if self.progress_callback:
             await self.progress_callback(progress, step, eta)
 
+    async def _run_in_executor(self, func: Callable, *args) -> Any:
+        """
+        Run a blocking GPU call in the default executor.
+
+        The call runs in a copy of the current context so host<->device
+        transfers are attributed to the job's tracker.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, partial(context.run, func, *args))
+
     async def analyze(
         self,
         file_path: str,
@@ -63,9 +93,24 @@ class ZStackAnalyzer:
 
             await self._emit_progress(15.0, "Image loaded, initializing analysis", None)
 
-            # Run analysis
+            if algorithm == "deconvolution":
+                # PSF optics come from the file unless set explicitly
+                parameters = {**psf_parameters_from_metadata(metadata, parameters.get("channel", 0)), **parameters}
+                # The deconvolved stack is kept next to the input
+                if parameters.get("save_output", True) and "output_path" not in parameters:
+                    parameters["output_path"] = _derived_output_path(file_path, algorithm, parameters)
+
+            # Run analysis, counting host<->device traffic for this job
             algorithm_func = self.available_algorithms[algorithm]
-            results = await algorithm_func(data, parameters)
+            with track_transfers() as transfers:
+                results = await algorithm_func(data, parameters)
+
+            data_transfer = transfers.as_dict()
+            logger.info(
+                f"{algorithm} moved {data_transfer['total_bytes'] / 1e6:.1f}MB "
+                f"({data_transfer['host_to_device_count']} uploads, "
+                f"{data_transfer['device_to_host_count']} downloads)"
+            )
 
             await self._emit_progress(95.0, "Finalizing results", None)
 
@@ -78,6 +123,7 @@ class ZStackAnalyzer:
                 "version": "1.0.0",
                 "gpu_device": self._get_gpu_device(),
                 "processing_time_ms": processing_time_ms,
+                "data_transfer": data_transfer,
                 "results": results,
                 "confidence_score": results.get("confidence_score"),
                 "metadata": metadata,
@@ -101,21 +147,21 @@ class ZStackAnalyzer:
 
         await self._emit_progress(20.0, "Preprocessing volume data", None)
 
+        # Keep intermediates on the device between steps
+        data = DeviceVolume.from_numpy(data)
+
         # Optional: Apply Gaussian smoothing for noise reduction
+        smoothing_method = None
         if parameters.get("smooth", True):
             sigma = parameters.get("sigma", 1.0)
 
             def smooth_progress(prog):
                 asyncio.create_task(self._emit_progress(20.0 + prog * 15, "Smoothing volume", None))
 
-            loop = asyncio.get_event_loop()
-            data = await loop.run_in_executor(
-                None,
-                gaussian_blur_3d,
-                data,
-                sigma,
-                smooth_progress
+            data, blur_info = await self._run_in_executor(
+                partial(gaussian_blur_3d, data, sigma, smooth_progress, return_info=True)
             )
+            smoothing_method = blur_info["method"]
 
         await self._emit_progress(35.0, "Running segmentation algorithm", None)
 
@@ -123,12 +169,10 @@ class ZStackAnalyzer:
             def segment_progress(prog):
                 asyncio.create_task(self._emit_progress(35.0 + prog * 30, "Threshold segmentation", None))
 
-            loop = asyncio.get_event_loop()
-            labels, seg_metadata = await loop.run_in_executor(
-                None,
+            labels, seg_metadata = await self._run_in_executor(
                 threshold_segmentation,
                 data,
-                "otsu" if threshold_value is None else "manual",
+                parameters.get("threshold_method", "otsu") if threshold_value is None else "manual",
                 threshold_value,
                 min_object_size,
                 True,  # fill_holes
@@ -139,15 +183,15 @@ class ZStackAnalyzer:
             def watershed_progress(prog):
                 asyncio.create_task(self._emit_progress(35.0 + prog * 30, "Watershed segmentation", None))
 
-            loop = asyncio.get_event_loop()
-            labels = await loop.run_in_executor(
-                None,
+            labels = await self._run_in_executor(
                 watershed_segmentation_3d,
                 data,
                 None,  # auto-generate markers
                 None,  # no mask
                 0.0,   # compactness
-                watershed_progress
+                watershed_progress,
+                parameters.get("voxel_size"),  # anisotropic distance transform
+                parameters.get("h", 2.0)  # seed h-maxima height
             )
             seg_metadata = {"method": "watershed"}
 
@@ -156,13 +200,9 @@ class ZStackAnalyzer:
 
         await self._emit_progress(70.0, "Computing object metrics", None)
 
-        # Compute object volumes
-        num_objects = labels.max()
-        object_volumes = []
-
-        for obj_id in range(1, num_objects + 1):
-            voxel_count = np.sum(labels == obj_id)
-            object_volumes.append(int(voxel_count))
+        # Compute object volumes (labels may be uint8/uint16; count in one pass)
+        object_volumes = [int(v) for v in np.bincount(labels.ravel())[1:]]
+        num_objects = len(object_volumes)
 
         await self._emit_progress(85.0, "Finalizing segmentation", None)
 
@@ -174,8 +214,10 @@ class ZStackAnalyzer:
             "confidence_score": 0.85,
             "parameters_used": {
                 "method": method,
+                "threshold_method": seg_metadata.get("method"),
                 "threshold": seg_metadata.get("threshold"),
                 "min_object_size": min_object_size,
+                "smoothing_method": smoothing_method,
             }
         }
     
@@ -204,9 +246,7 @@ class ZStackAnalyzer:
         def coloc_progress(prog):
             asyncio.create_task(self._emit_progress(40.0 + prog * 45, "Analyzing colocalization", None))
 
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            None,
+        results = await self._run_in_executor(
             colocalization_analysis,
             channel1,
             channel2,
@@ -242,9 +282,7 @@ class ZStackAnalyzer:
         def stats_progress(prog):
             asyncio.create_task(self._emit_progress(20.0 + prog * 70, "Analyzing intensities", None))
 
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            None,
+        results = await self._run_in_executor(
             intensity_statistics,
             data,
             labels,
@@ -272,79 +310,179 @@ class ZStackAnalyzer:
         parameters: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        GPU-accelerated deconvolution (Richardson-Lucy or Wiener).
+        GPU-accelerated deconvolution (Richardson-Lucy, blind Richardson-Lucy or Wiener).
         """
         method = parameters.get("method", "richardson_lucy")
         iterations = parameters.get("iterations", 10)
         psf_type = parameters.get("psf_type", "gaussian")
+        accelerate = parameters.get("accelerate", True)
+        tolerance = parameters.get("tolerance", 1e-3)
+        stop_metric = parameters.get("stop_metric", "relative_change")
+        # Lazily loaded (dask) stacks are deconvolved block-wise by default;
+        # blind RL refines one PSF over the whole volume, so it never tiles
+        tiled = parameters.get("tiled", method != "blind_rl" and not isinstance(data, np.ndarray))
+        memory_budget_mb = parameters.get("memory_budget_mb")
+        convolution = parameters.get("convolution", "auto")  # direct/separable/fft
+
+        optics = {
+            "shape": tuple(parameters.get("psf_shape", (31, 31, 31))),  # Standard PSF size
+            "psf_type": psf_type,
+            "wavelength": parameters.get("wavelength", 0.52),  # μm
+            "numerical_aperture": parameters.get("numerical_aperture", 1.4),
+            "refractive_index": parameters.get("refractive_index", 1.518),
+            "voxel_size": tuple(parameters.get("voxel_size", (0.2, 0.1, 0.1))),  # μm (z, y, x)
+        }
 
         await self._emit_progress(15.0, "Generating PSF", None)
 
-        # Generate or load PSF
-        psf_shape = (31, 31, 31)  # Standard PSF size
-        loop = asyncio.get_event_loop()
-
-        psf = await loop.run_in_executor(
-            None,
-            generate_psf,
-            psf_shape,
-            psf_type,
-            None,  # sigma (auto)
-            0.52,  # wavelength
-            1.4,   # NA
-            1.518, # refractive index
-            (0.2, 0.1, 0.1),  # voxel size
-            None   # no progress callback for PSF
-        )
+        # Generate or load PSF (cached per optical setup)
+        psf = await self._run_in_executor(partial(get_psf_library().get, **optics))
 
         await self._emit_progress(25.0, f"Running {method} deconvolution", None)
 
         def deconv_progress(prog):
             asyncio.create_task(self._emit_progress(25.0 + prog * 65, f"{method} iteration", None))
 
-        if method == "richardson_lucy":
-            deconvolved = await loop.run_in_executor(
-                None,
+        convergence = None
+        refined_psf = None
+        if method not in ("richardson_lucy", "blind_rl", "wiener"):
+            raise ValueError(f"Unknown deconvolution method: {method}")
+        if method == "blind_rl" and tiled:
+            raise ValueError("blind_rl refines a single PSF and cannot run tiled")
+
+        if tiled:
+            method_kwargs = (
+                {"iterations": iterations, "clip": True, "accelerate": accelerate,
+                 "tolerance": tolerance, "stop_metric": stop_metric, "convolution": convolution}
+                if method == "richardson_lucy" else {}
+            )
+            # Tiles are blended into a disk-backed array, so the result never
+            # has to fit in memory
+            deconvolved, tiling = await self._run_in_executor(
+                partial(
+                    tiled_deconvolution,
+                    data,
+                    psf,
+                    method=method,
+                    memory_budget_mb=memory_budget_mb,
+                    out=_scratch_array(data.shape, parameters.get("output_path")),
+                    progress_callback=deconv_progress,
+                    return_info=True,
+                    **method_kwargs
+                )
+            )
+            if method == "richardson_lucy":
+                # Tiles stop independently; report the slowest one
+                slowest = max(tiling["tile_info"], key=lambda info: info["iterations"])
+                convergence = dict(
+                    slowest,
+                    converged=all(info["converged"] for info in tiling["tile_info"]),
+                )
+        elif method == "richardson_lucy":
+            deconvolved, convergence = await self._run_in_executor(
                 richardson_lucy_deconvolution,
                 data,
                 psf,
                 iterations,
                 True,  # clip
-                deconv_progress
+                deconv_progress,
+                accelerate,
+                tolerance,
+                stop_metric,
+                True,  # return_info
+                convolution
             )
-        elif method == "wiener":
-            deconvolved = await loop.run_in_executor(
-                None,
-                wiener_deconvolution,
+        elif method == "blind_rl":
+            deconvolved, refined_psf, convergence = await self._run_in_executor(
+                blind_richardson_lucy_deconvolution,
+                data,
+                psf,
+                iterations,
+                True,  # clip
+                deconv_progress,
+                tolerance,
+                True  # return_info
+            )
+        else:
+            # (C, Z, Y, X) stacks are filtered in one batched transform
+            deconvolved = await self._run_in_executor(
+                wiener_deconvolution_multichannel if data.ndim == 4 else wiener_deconvolution,
                 data,
                 psf,
                 None,  # noise_variance (auto)
                 None,  # signal_variance (auto)
                 deconv_progress
             )
-        else:
-            raise ValueError(f"Unknown deconvolution method: {method}")
+
+        output = None
+        output_path = parameters.get("output_path")
+        if output_path:
+            await self._emit_progress(90.0, "Saving deconvolved stack", None)
+            output = await self._run_in_executor(
+                ImageWriter().write_ome_tiff,
+                deconvolved,
+                output_path,
+                optics["voxel_size"]
+            )
 
         await self._emit_progress(92.0, "Computing improvement metrics", None)
 
-        # Compute improvement ratio (edge sharpness)
-        original_edges = np.std(np.gradient(data))
-        deconvolved_edges = np.std(np.gradient(deconvolved))
+        # Compute improvement ratio (edge sharpness), one slice at a time
+        original_edges = await self._run_in_executor(_gradient_std, data)
+        deconvolved_edges = await self._run_in_executor(_gradient_std, deconvolved)
         improvement_ratio = deconvolved_edges / original_edges if original_edges > 0 else 1.0
 
-        return {
+        results = {
             "improvement_ratio": float(improvement_ratio),
-            "iterations_used": iterations if method == "richardson_lucy" else None,
+            "iterations_used": convergence["iterations"] if convergence else None,
             "method": method,
             "psf_type": psf_type,
-            "convergence_achieved": True,
+            # Wiener is a closed-form filter, so there is nothing to converge
+            "convergence_achieved": convergence["converged"] if convergence else True,
             "confidence_score": 0.80,
             "parameters_used": {
                 "method": method,
                 "iterations": iterations,
                 "psf_type": psf_type,
+                "psf_shape": list(optics["shape"]),
+                "wavelength": optics["wavelength"],
+                "numerical_aperture": optics["numerical_aperture"],
+                "refractive_index": optics["refractive_index"],
+                "voxel_size": list(optics["voxel_size"]),
             }
         }
+
+        if output:
+            results["output_path"] = output["path"]
+            results["output"] = output
+
+        if tiled:
+            results["tiling"] = {
+                "tiles": tiling["tiles"],
+                "tile_shape": list(tiling["tile_shape"]),
+                "halo": list(tiling["halo"]),
+            }
+            results["parameters_used"]["memory_budget_mb"] = memory_budget_mb
+
+        if refined_psf is not None:
+            results["psf_refinement"] = {
+                "initial_sigma": list(psf_sigma(psf)),
+                "refined_sigma": list(convergence["psf_sigma"]),
+                "psf_change_trace": convergence["psf_change_trace"],
+            }
+
+        if convergence:
+            results["convergence_metric"] = convergence["metric"]
+            results["convergence_trace"] = convergence["metric_trace"]
+            results["parameters_used"].update({
+                # Blind RL has no acceleration and stops on the object change
+                "accelerate": accelerate and method == "richardson_lucy",
+                "tolerance": tolerance,
+                "stop_metric": convergence["metric"],
+                "convolution": convergence["convolution"],
+            })
+
+        return results
     
     async def _run_blob_detection(
         self,
@@ -358,15 +496,14 @@ class ZStackAnalyzer:
         max_sigma = parameters.get("max_sigma", 50.0)
         num_sigma = parameters.get("num_sigma", 10)
         threshold = parameters.get("threshold", 0.1)
+        pyramid = parameters.get("pyramid", False)  # downsample at coarse scales
 
         await self._emit_progress(20.0, "Detecting blobs across scales", None)
 
         def blob_progress(prog):
             asyncio.create_task(self._emit_progress(20.0 + prog * 70, "Blob detection", None))
 
-        loop = asyncio.get_event_loop()
-        blobs = await loop.run_in_executor(
-            None,
+        blobs = await self._run_in_executor(
             blob_detection_3d,
             data,
             min_sigma,
@@ -374,7 +511,8 @@ class ZStackAnalyzer:
             num_sigma,
             threshold,
             0.5,  # overlap
-            blob_progress
+            blob_progress,
+            pyramid
         )
 
         await self._emit_progress(95.0, "Finalizing blob detection", None)
@@ -397,6 +535,82 @@ class ZStackAnalyzer:
                 "min_sigma": min_sigma,
                 "max_sigma": max_sigma,
                 "threshold": threshold,
+                "pyramid": pyramid,
+            }
+        }
+
+    async def _run_ml_segmentation(
+        self,
+        data: np.ndarray,
+        parameters: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        3D U-Net segmentation with tiled inference from a local weight file.
+        """
+        weights = parameters.get("weights") or os.environ.get("ZSTACK_UNET_WEIGHTS")
+        if not weights:
+            raise ValueError(
+                "ml_segmentation requires a 'weights' parameter "
+                "(or ZSTACK_UNET_WEIGHTS) pointing to a .safetensors/.npz file"
+            )
+        tile_shape = tuple(parameters.get("tile_shape", (32, 128, 128)))
+        overlap = parameters.get("overlap", 0.25)
+        batch_size = parameters.get("batch_size", 4)
+        probability_threshold = parameters.get("probability_threshold", 0.5)
+        min_object_size = parameters.get("min_object_size", 100)
+
+        await self._emit_progress(10.0, "Loading U-Net weights", None)
+
+        model = await self._run_in_executor(load_unet_model, weights)
+
+        await self._emit_progress(20.0, "Running U-Net inference", None)
+
+        def predict_progress(prog):
+            asyncio.create_task(self._emit_progress(20.0 + prog * 60, "U-Net inference", None))
+
+        # Probabilities go to a disk-backed array; only the mask is in memory
+        spatial_shape = tuple(data.shape[-3:])
+        classes = model.out_channels
+        probabilities = await self._run_in_executor(
+            partial(
+                model.predict,
+                data,
+                tile_shape=tile_shape,
+                overlap=overlap,
+                batch_size=batch_size,
+                out=_scratch_array(spatial_shape if classes == 1 else (classes,) + spatial_shape),
+                progress_callback=predict_progress
+            )
+        )
+
+        await self._emit_progress(80.0, "Labeling predicted objects", None)
+
+        foreground = await self._run_in_executor(
+            _foreground_mask, probabilities, probability_threshold
+        )
+        del probabilities
+
+        labels, num_objects = await self._run_in_executor(
+            connected_components_3d, foreground, min_object_size
+        )
+        object_volumes = [int(v) for v in np.bincount(labels.ravel())[1:]]
+
+        await self._emit_progress(95.0, "Finalizing segmentation", None)
+
+        return {
+            "num_objects": int(num_objects),
+            "object_volumes": object_volumes,
+            "total_volume": float(np.sum(object_volumes)),
+            "mean_volume": float(np.mean(object_volumes)) if object_volumes else 0.0,
+            "confidence_score": 0.9,
+            "parameters_used": {
+                "weights": str(weights),
+                "tile_shape": tile_shape,
+                "overlap": overlap,
+                "batch_size": batch_size,
+                "probability_threshold": probability_threshold,
+                "min_object_size": min_object_size,
+                "classes": model.out_channels,
             }
         }
 
@@ -420,9 +634,7 @@ class ZStackAnalyzer:
         def measure_progress(prog):
             asyncio.create_task(self._emit_progress(20.0 + prog * 75, "Measuring objects", None))
 
-        loop = asyncio.get_event_loop()
-        measurements = await loop.run_in_executor(
-            None,
+        measurements = await self._run_in_executor(
             object_measurements,
             labels,
             voxel_size,
@@ -457,9 +669,7 @@ class ZStackAnalyzer:
         def profile_progress(prog):
             asyncio.create_task(self._emit_progress(20.0 + prog * 75, "Computing profiles", None))
 
-        loop = asyncio.get_event_loop()
-        profile_data = await loop.run_in_executor(
-            None,
+        profile_data = await self._run_in_executor(
             z_profile_analysis,
             data,
             labels,
@@ -475,9 +685,166 @@ class ZStackAnalyzer:
 
         return profile_data
 
+    async def _run_background_subtraction(
+        self,
+        data: np.ndarray,
+        parameters: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Rolling-ball / morphological background subtraction.
+        """
+        radius = parameters.get("radius", 50.0)
+        method = parameters.get("method", "paraboloid")
+        per_slice = parameters.get("per_slice", False)
+        shrink = parameters.get("shrink", None)
+
+        await self._emit_progress(20.0, "Estimating background", None)
+
+        # Process each channel of a (C, Z, Y, X) stack independently
+        channels = data if data.ndim == 4 else data[np.newaxis]
+        channel_stats = []
+        for idx, channel in enumerate(channels):
+            def background_progress(prog, idx=idx):
+                overall = (idx + prog) / len(channels)
+                asyncio.create_task(self._emit_progress(20.0 + overall * 70, "Subtracting background", None))
+
+            corrected = await self._run_in_executor(
+                partial(
+                    rolling_ball_background,
+                    channel,
+                    radius,
+                    background_progress,
+                    method=method,
+                    per_slice=per_slice,
+                    shrink=shrink,
+                )
+            )
+
+            original_mean = float(np.mean(channel))
+            corrected_mean = float(np.mean(corrected))
+            channel_stats.append({
+                "channel": idx,
+                "original_mean": original_mean,
+                "corrected_mean": corrected_mean,
+                "background_mean": original_mean - corrected_mean,
+            })
+
+        await self._emit_progress(92.0, "Finalizing background subtraction", None)
+
+        return {
+            "channels": channel_stats,
+            "confidence_score": 0.90,
+            "parameters_used": {
+                "radius": radius,
+                "method": method,
+                "per_slice": per_slice,
+                "shrink": shrink,
+            }
+        }
+
     def _get_gpu_device(self) -> Optional[str]:
         """Get GPU device information from device manager."""
         device_info = self.device_manager.device_info
         device_name = device_info.get("name", "Unknown")
         device_type = self.device_manager.device
-        return f"{device_name} ({device_type})"
\ No newline at end of file
+        return f"{device_name} ({device_type})"
+
+
+def _derived_output_path(file_path: str, algorithm: str, parameters: Dict[str, Any]) -> str:
+    """
+    Path for a derived stack next to its source.
+
+    The name includes a digest of the parameters, so rerunning the same job
+    overwrites its own output but not other runs'.
+    """
+    digest = hashlib.sha1(json.dumps(parameters, sort_keys=True, default=str).encode()).hexdigest()[:8]
+    path = Path(file_path)
+    stem = path.name.split(".")[0]
+    return str(path.with_name(f"{stem}_{algorithm}_{digest}.ome.tif"))
+
+
+def _scratch_array(shape: Tuple[int, ...], near: Optional[str] = None) -> np.ndarray:
+    """
+    Disk-backed float32 scratch array for results larger than memory.
+
+    A .npy memmap is created next to ``near`` (the job's output), or in the
+    temp directory, and unlinked at once: the disk space is released when
+    the array is garbage collected, even if the job fails.
+    """
+    directory = Path(near).parent if near else None
+    fd, path = tempfile.mkstemp(suffix=".npy", dir=directory)
+    os.close(fd)
+    try:
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=tuple(shape))
+    finally:
+        os.unlink(path)
+
+
+def _foreground_mask(probabilities: np.ndarray, threshold: float, slab: int = 16) -> np.ndarray:
+    """
+    Foreground of U-Net probabilities, read a slab of Z planes at a time.
+
+    One class: probability >= threshold. Several classes: the most likely
+    class is not the background (class 0).
+    """
+    depth = probabilities.shape[-3]
+    foreground = np.empty(probabilities.shape[-3:], dtype=bool)
+    for z in range(0, depth, slab):
+        block = np.asarray(probabilities[..., z:z + slab, :, :])
+        if block.ndim == 3:
+            foreground[z:z + slab] = block >= threshold
+        else:
+            foreground[z:z + slab] = np.argmax(block, axis=0) != 0
+    return foreground
+
+
+def _gradient_std(volume: Any) -> float:
+    """
+    Standard deviation of all gradient components of a (C,) Z, Y, X volume.
+
+    Matches ``np.std(np.gradient(volume))`` for 3D volumes, but reads one
+    Z slice at a time (plus its neighbours) and accumulates the moments, so
+    memory stays at a few slices instead of three full float64 gradients.
+    Channels of a 4D stack are pooled without differencing across channels.
+    """
+    channels = [volume[c] for c in range(volume.shape[0])] if volume.ndim == 4 else [volume]
+    count = 0
+    total = 0.0
+    total_sq = 0.0
+
+    def accumulate(values: np.ndarray) -> None:
+        nonlocal count, total, total_sq
+        count += values.size
+        total += float(values.sum())
+        total_sq += float(np.vdot(values, values))
+
+    for channel in channels:
+        depth = channel.shape[0]
+
+        def plane(z: int) -> np.ndarray:
+            return np.asarray(channel[z], dtype=np.float64)
+
+        previous, current = None, plane(0)
+        following = plane(1) if depth > 1 else None
+
+        for z in range(depth):
+            # Same stencil as np.gradient: one-sided at the ends, central inside
+            if depth > 1:
+                if z == 0:
+                    accumulate(following - current)
+                elif z == depth - 1:
+                    accumulate(current - previous)
+                else:
+                    accumulate((following - previous) / 2)
+
+            for gradient in np.gradient(current):
+                accumulate(gradient)
+
+            previous, current = current, following
+            following = plane(z + 2) if z + 2 < depth else None
+
+    if count == 0:
+        return 0.0
+
+    mean = total / count
+    return float(np.sqrt(max(total_sq / count - mean * mean, 0.0)))
\ No newline at end of file
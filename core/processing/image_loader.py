@@ -21,8 +21,10 @@ from typing import Dict, Any, Optional, Tuple, Union, List
 import logging
 from datetime import datetime
 from functools import partial
+from xml.etree import ElementTree
 
 import numpy as np
+import dask
 import dask.array as da
 
 # Microscopy format readers
@@ -32,6 +34,12 @@ try:
 except ImportError:
     TIFFFILE_AVAILABLE = False
 
+try:
+    import zarr
+    ZARR_AVAILABLE = True
+except ImportError:
+    ZARR_AVAILABLE = False
+
 try:
     from aicspylibczi import CziFile
     CZI_AVAILABLE = True
@@ -352,10 +360,7 @@ class ImageLoader:
         try:
             # Try OME-XML metadata first
             if tif.is_ome:
-                ome_metadata = tif.ome_metadata
-                # Parse OME-XML for PhysicalSizeX, PhysicalSizeY, PhysicalSizeZ
-                # This is simplified - full OME-XML parsing would be more complex
-                pass
+                pixel_sizes.update(self._parse_ome_pixel_sizes(tif.ome_metadata))
 
             # Try ImageJ metadata
             if tif.is_imagej:
@@ -372,8 +377,8 @@ class ImageLoader:
             page = tif.pages[0]
             tags = page.tags
 
-            # X and Y resolution
-            if 'XResolution' in tags and 'YResolution' in tags:
+            # X and Y resolution (OME physical sizes take precedence)
+            if 'XResolution' in tags and 'YResolution' in tags and not ('x' in pixel_sizes and 'y' in pixel_sizes):
                 x_res = tags['XResolution'].value
                 y_res = tags['YResolution'].value
 
@@ -394,6 +399,26 @@ class ImageLoader:
 
         return pixel_sizes
 
+    def _parse_ome_pixel_sizes(self, ome_xml: str) -> Dict[str, PhysicalSize]:
+        """Read PhysicalSizeX/Y/Z of the first OME image"""
+        pixel_sizes = {}
+        units = {unit.value: unit for unit in PhysicalUnit}
+        units["um"] = PhysicalUnit.MICROMETER
+
+        root = ElementTree.fromstring(ome_xml)
+        pixels = next((el for el in root.iter() if el.tag.endswith("}Pixels") or el.tag == "Pixels"), None)
+        if pixels is None:
+            return pixel_sizes
+
+        for axis in ("x", "y", "z"):
+            value = pixels.get(f"PhysicalSize{axis.upper()}")
+            if value is None:
+                continue
+            unit = units.get(pixels.get(f"PhysicalSize{axis.upper()}Unit", "µm"), PhysicalUnit.MICROMETER)
+            pixel_sizes[axis] = PhysicalSize(value=float(value), unit=unit)
+
+        return pixel_sizes
+
     def _extract_tiff_channels(self, tif: tifffile.TiffFile, num_channels: int) -> List[ChannelInfo]:
         """Extract channel information from TIFF"""
         channels = []
@@ -450,7 +475,15 @@ class ImageLoader:
     def _load_tiff(self, file_path: str, lazy: bool) -> Union[np.ndarray, da.Array]:
         """Load TIFF image data"""
         if lazy:
-            # Use dask for lazy loading
+            # Read through tifffile's zarr store so each dask chunk is one
+            # page; slicing a tile then only decodes the pages it touches
+            if ZARR_AVAILABLE:
+                try:
+                    store = tifffile.imread(file_path, aszarr=True, series=0, level=0)
+                    return da.from_zarr(zarr.open(store, mode="r"))
+                except Exception as e:
+                    logger.debug(f"Chunked TIFF reading failed ({e}), loading as one chunk")
+
             return da.from_delayed(
                 dask.delayed(tifffile.imread)(file_path),
                 shape=self._get_tiff_shape(file_path),
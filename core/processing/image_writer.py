@@ -0,0 +1,133 @@
+"""
+Writer for derived (processed) image stacks.
+
+Processed volumes are stored as compressed OME-TIFF so ImageLoader can read
+them back like any upload, with physical voxel sizes preserved:
+- zlib-compressed strips, so lazy loading (``load_image(lazy=True)``)
+  decodes only the rows a tile touches
+- planes are written one at a time from NumPy, memmap or dask arrays, so
+  the volume never needs a second full-size copy
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+import logging
+
+import numpy as np
+
+try:
+    import tifffile
+    TIFFFILE_AVAILABLE = True
+except ImportError:
+    TIFFFILE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ImageWriteError(Exception):
+    """Custom exception for image writing errors"""
+    pass
+
+
+class ImageWriter:
+    """
+    Write processed volumes as chunked, compressed OME-TIFF.
+
+    Supports (Z, Y, X) and (C, Z, Y, X) volumes.
+    """
+
+    def __init__(self, compression: str = "zlib", rows_per_strip: int = 64):
+        """
+        Initialize image writer.
+
+        Args:
+            compression: TIFF compression (zlib needs no extra codecs)
+            rows_per_strip: Rows per compressed strip (read chunk height)
+        """
+        self.compression = compression
+        self.rows_per_strip = rows_per_strip
+
+    def write_ome_tiff(
+        self,
+        volume: Any,
+        file_path: str,
+        voxel_size: Optional[Tuple[float, float, float]] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Write a volume plane by plane.
+
+        The file is written to a temporary name and renamed when complete,
+        so readers never see a partial stack.
+
+        Args:
+            volume: (Z, Y, X) or (C, Z, Y, X) array (NumPy, memmap or dask)
+            file_path: Output path (.ome.tif)
+            voxel_size: Voxel size (z, y, x) in μm
+            progress_callback: Optional callback(progress: 0.0-1.0)
+
+        Returns:
+            Dict with path, shape, dtype, compression and file size
+        """
+        if not TIFFFILE_AVAILABLE:
+            raise ImageWriteError("tifffile is required to write OME-TIFF")
+
+        if volume.ndim not in (3, 4):
+            raise ImageWriteError(f"Expected a (Z, Y, X) or (C, Z, Y, X) volume, got shape {volume.shape}")
+
+        path = Path(file_path)
+        tmp_path = path.with_name(path.name + ".part")
+        axes = "ZYX" if volume.ndim == 3 else "CZYX"
+        dtype = np.dtype(volume.dtype)
+        n_planes = int(np.prod(volume.shape[:-2]))
+
+        metadata: Dict[str, Any] = {"axes": axes}
+        resolution = None
+        if voxel_size is not None:
+            vz, vy, vx = voxel_size
+            metadata.update({
+                "PhysicalSizeZ": vz, "PhysicalSizeZUnit": "µm",
+                "PhysicalSizeY": vy, "PhysicalSizeYUnit": "µm",
+                "PhysicalSizeX": vx, "PhysicalSizeXUnit": "µm",
+            })
+            resolution = (1.0 / vx, 1.0 / vy)
+
+        def planes() -> Iterator[np.ndarray]:
+            for i, index in enumerate(np.ndindex(*volume.shape[:-2])):
+                yield np.asarray(volume[index], dtype=dtype)
+                if progress_callback:
+                    progress_callback((i + 1) / n_planes)
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tifffile.imwrite(
+                tmp_path,
+                planes(),
+                shape=volume.shape,
+                dtype=dtype,
+                ome=True,
+                bigtiff=volume.size * dtype.itemsize > 2**31,
+                compression=self.compression,
+                rowsperstrip=self.rows_per_strip,
+                resolution=resolution,
+                metadata=metadata,
+            )
+            tmp_path.replace(path)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            raise ImageWriteError(f"Failed to write {path}: {e}") from e
+
+        file_size = path.stat().st_size
+        logger.info(
+            f"Wrote {path.name}: {volume.shape} {dtype}, "
+            f"{file_size / 1e6:.1f}MB ({volume.size * dtype.itemsize / max(file_size, 1):.1f}x compression)"
+        )
+
+        return {
+            "path": str(path),
+            "shape": list(volume.shape),
+            "dtype": str(dtype),
+            "format": "OME-TIFF",
+            "compression": self.compression,
+            "file_size_bytes": file_size,
+        }
@@ -6,6 +6,7 @@ Tests device detection, basic kernels, and integration with analyzer.
 """
 
 import sys
+import time
 import logging
 import numpy as np
 from pathlib import Path
@@ -65,6 +66,84 @@ def test_basic_kernels():
     assert blurred.shape == volume.shape, "Shape mismatch after blur"
     logger.info(f"✓ Gaussian blur: {blurred.shape}")
 
+    # The FIR/IIR crossover is read from the calibration file instead of re-measured
+    import json
+    import os
+    import tempfile
+    from core.gpu import kernels as kernels_module
+    from core.gpu.device_manager import DeviceManager
+    with tempfile.TemporaryDirectory() as tmp:
+        calibration = Path(tmp) / "gaussian_crossover.json"
+        calibration.write_text(json.dumps({DeviceManager().device: 7.0}))
+        previous = os.environ.get("ZSTACK_GAUSSIAN_CALIBRATION")
+        os.environ["ZSTACK_GAUSSIAN_CALIBRATION"] = str(calibration)
+        saved = dict(kernels_module._gaussian_crossover_cache)
+        kernels_module._gaussian_crossover_cache.clear()
+        try:
+            # Small sigmas go straight to FIR without reading or measuring the crossover
+            _, info = gaussian_blur_3d(volume[:8, :16, :16], sigma=2.0, return_info=True)
+            assert info["method"] == "fir"
+            assert DeviceManager().device not in kernels_module._gaussian_crossover_cache
+            assert kernels_module.get_gaussian_crossover_sigma() == 7.0
+        finally:
+            kernels_module._gaussian_crossover_cache.clear()
+            kernels_module._gaussian_crossover_cache.update(saved)
+            if previous is None:
+                del os.environ["ZSTACK_GAUSSIAN_CALIBRATION"]
+            else:
+                os.environ["ZSTACK_GAUSSIAN_CALIBRATION"] = previous
+    logger.info("✓ Gaussian crossover loaded from the calibration file")
+
+    # IIR matches FIR for large sigma, including the replicated borders.
+    # Tolerance: 1% of the signal range (Young-van Vliet approximation plus
+    # the FIR kernel's +/-3 sigma truncation).
+    edges = np.random.default_rng(1).random((32, 64, 64), dtype=np.float32)
+    edges[:, :, :8] += 4.0  # bright band touching the x=0 face
+    edges[-4:] += 2.0  # bright slab touching the last z face
+    fir = gaussian_blur_3d(edges, sigma=6.0, method="fir")
+    iir = gaussian_blur_3d(edges, sigma=6.0, method="iir")
+    tolerance = 1e-2 * float(edges.max() - edges.min())
+    assert np.max(np.abs(iir - fir)) < tolerance
+    for face in (np.s_[0], np.s_[-1], np.s_[:, 0], np.s_[:, -1], np.s_[:, :, 0], np.s_[:, :, -1]):
+        assert np.max(np.abs(iir[face] - fir[face])) < tolerance
+    flat = np.full((16, 32, 32), 3.0, dtype=np.float32)
+    assert np.allclose(gaussian_blur_3d(flat, sigma=8.0, method="iir"), 3.0, atol=1e-4)
+    logger.info("✓ IIR Gaussian matches FIR within 1% of range, edges included")
+
+    # Recorded calls show up in the Prometheus text with buckets and device label
+    from core.gpu.metrics import MetricsRegistry
+    registry = MetricsRegistry()
+    registry.record("gaussian_blur_3d", "CUDA", 0.003, voxels=1000, nbytes=4000)
+    registry.record("gaussian_blur_3d", "CUDA", 0.2, voxels=1000, nbytes=4000)
+    registry.record("gaussian_blur_3d", "CUDA", 0.2, error=True)
+    text = registry.to_prometheus()
+    series = 'kernel="gaussian_blur_3d",device="CUDA"'
+    assert f"zstack_kernel_calls_total{{{series}}} 3" in text
+    assert f"zstack_kernel_errors_total{{{series}}} 1" in text
+    assert f'zstack_kernel_duration_seconds_bucket{{{series},le="0.0025"}} 0' in text
+    assert f'zstack_kernel_duration_seconds_bucket{{{series},le="0.005"}} 1' in text
+    assert f'zstack_kernel_duration_seconds_bucket{{{series},le="0.25"}} 3' in text
+    assert f'zstack_kernel_duration_seconds_bucket{{{series},le="+Inf"}} 3' in text
+    assert f"zstack_kernel_duration_seconds_count{{{series}}} 3" in text
+    assert f"zstack_kernel_voxels_total{{{series}}} 2000" in text
+    logger.info("✓ Prometheus text has counts, histogram buckets and device labels")
+
+    # Same shape/dtype reuses one TinyJit entry; a new shape adds one
+    from tinygrad.tensor import Tensor
+    from core.gpu.kernel_cache import KernelCache
+    cache = KernelCache()
+    double = lambda t: t * 2
+    for _ in range(3):
+        out = cache.run("double", double, [Tensor(np.ones((4, 8, 8), dtype=np.float32))])
+    assert np.array_equal(out, np.full((4, 8, 8), 2.0, dtype=np.float32))
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["misses"] == 1 and stats["hits"] == 2
+    cache.run("double", double, [Tensor(np.ones((4, 8, 16), dtype=np.float32))])
+    assert cache.stats()["entries"] == 2 and cache.stats()["misses"] == 2
+    from cli.config import parse_shapes
+    assert parse_shapes("60,512,512; 100x1024x1024") == ((60, 512, 512), (100, 1024, 1024))
+    logger.info("✓ Kernel cache keys JIT entries by shape and reuses them")
+
     # Test Sobel edge detection
     logger.info("\nTesting sobel_3d...")
     edges = sobel_3d(volume)
@@ -78,6 +157,61 @@ def test_basic_kernels():
     logger.info(f"  Binary mask shape: {binary.shape}")
     logger.info(f"  Foreground pixels: {binary.sum() / binary.size * 100:.1f}%")
 
+    from scipy import ndimage
+    rng = np.random.default_rng(0)
+
+    # Histogram thresholds match skimage on the same (exact) integer histogram
+    logger.info("\nTesting histogram_threshold against skimage...")
+    from skimage import filters
+    from core.gpu import compute_histogram, histogram_threshold
+    stack = np.concatenate([
+        rng.normal(40, 8, 20000), rng.normal(120, 15, 8000), rng.normal(200, 10, 2000)
+    ]).clip(0, 255).astype(np.uint8).reshape(10, 30, 100)
+    counts, centers = compute_histogram(stack)
+    references = {
+        "otsu": filters.threshold_otsu(stack),
+        "li": filters.threshold_li(stack),
+        "triangle": filters.threshold_triangle(stack),
+        "yen": filters.threshold_yen(stack),
+    }
+    for method, reference in references.items():
+        value = histogram_threshold(counts, centers, method)
+        assert abs(value - reference) <= 1.0, f"{method}: {value} vs {reference}"
+    multi = histogram_threshold(counts, centers, "multiotsu", classes=3)
+    assert np.allclose(multi, filters.threshold_multiotsu(stack, classes=3), atol=1.0)
+    logger.info("✓ Otsu, multi-Otsu, Li, triangle and Yen match skimage")
+
+    # Tiled union-find labeling matches ndimage.label + size filter + relabel
+    logger.info("\nTesting connected_components_3d against ndimage.label...")
+    from core.gpu import connected_components_3d
+    for trial in range(30):
+        shape = tuple(int(n) for n in rng.integers(4, 40, 3))
+        mask = ndimage.binary_opening(rng.random(shape) < rng.uniform(0.3, 0.7))
+        tile_depth = int(rng.integers(1, shape[0] + 1))
+        min_size = int(rng.choice([1, 5, 20]))
+        labels, count = connected_components_3d(mask, min_size=min_size, tile_depth=tile_depth)
+        reference, _ = ndimage.label(mask)
+        sizes = np.bincount(reference.ravel())
+        reference, expected = ndimage.label((sizes >= min_size)[reference] & (reference > 0))
+        assert count == expected and np.array_equal(labels, reference), (trial, shape, tile_depth, min_size)
+    logger.info("✓ 30 random volumes, tile depths and size filters match")
+
+    # van Herk/Gil-Werman running min/max matches scipy's filters
+    logger.info("\nTesting van Herk min/max against ndimage...")
+    from core.gpu.kernels import _van_herk_1d
+    noisy = rng.random((12, 17, 23)).astype(np.float32)
+    for axis in range(3):
+        for size in (2, 3, 4, 7, noisy.shape[axis]):
+            assert np.array_equal(
+                _van_herk_1d(noisy, size, axis, np.minimum),
+                ndimage.minimum_filter1d(noisy, size, axis=axis, mode="reflect")
+            ), ("min", axis, size)
+            assert np.array_equal(
+                _van_herk_1d(noisy, size, axis, np.maximum),
+                ndimage.maximum_filter1d(noisy, size, axis=axis, mode="reflect")
+            ), ("max", axis, size)
+    logger.info("✓ Running min/max matches minimum_filter1d/maximum_filter1d")
+
     logger.info("\n✓ Basic kernels test passed\n")
     return True
 
@@ -88,7 +222,7 @@ def test_segmentation():
     logger.info("TEST 3: Segmentation")
     logger.info("=" * 60)
 
-    from core.gpu import threshold_segmentation, blob_detection_3d
+    from core.gpu import threshold_segmentation, blob_detection_3d, watershed_segmentation_3d
 
     # Create synthetic volume with blobs
     volume = np.zeros((50, 100, 100), dtype=np.float32)
@@ -117,6 +251,42 @@ def test_segmentation():
     logger.info(f"  Objects detected: {metadata['num_objects']}")
     logger.info(f"  Threshold: {metadata['threshold']:.4f}")
 
+    # Single-pass cleanup matches fill_holes + label + size filter + relabel
+    from scipy import ndimage
+    binary = ndimage.binary_fill_holes(volume > metadata["threshold"])
+    reference, _ = ndimage.label(binary)
+    sizes = np.bincount(reference.ravel())
+    reference, _ = ndimage.label((sizes >= 50)[reference] & (reference > 0))
+    assert np.array_equal(labels, reference)
+    shell = np.zeros((20, 20, 20), dtype=bool)
+    shell[5:15, 5:15, 5:15] = True
+    shell[8:12, 8:12, 8:12] = False
+    shell[0:3, 0:3, 0:20] = True  # touches the border on both Z faces
+    from core.gpu.segmentation import _fill_holes
+    assert np.array_equal(_fill_holes(shell), ndimage.binary_fill_holes(shell))
+    logger.info("✓ Cleanup matches the two-pass reference")
+
+    # Two touching anisotropic spheres are split into two watershed seeds
+    logger.info("\nTesting watershed_segmentation_3d...")
+    zz, yy, xx = np.ogrid[:20, :40, :60]
+    spheres = (
+        (((zz - 10) * 2.0) ** 2 + (yy - 20) ** 2 + (xx - 20) ** 2 < 144)
+        | (((zz - 10) * 2.0) ** 2 + (yy - 20) ** 2 + (xx - 40) ** 2 < 144)
+    )
+    split = watershed_segmentation_3d(
+        spheres.astype(np.float32), mask=spheres, voxel_size=(2.0, 1.0, 1.0), h=2.0
+    )
+    assert len(np.unique(split[spheres])) == 2 and not split[~spheres].any()
+    logger.info(f"✓ Watershed split touching spheres into {split.max()} objects")
+
+    # Objects thinner than h still get a seed and keep their label
+    puncta = np.zeros((20, 40, 40), dtype=bool)
+    for z, y, x in [(5, 5, 5), (10, 20, 20), (15, 30, 10)]:
+        puncta[z - 1:z + 2, y - 1:y + 2, x - 1:x + 2] = True
+    small = watershed_segmentation_3d(puncta.astype(np.float32), mask=puncta, h=2.0)
+    assert len(np.unique(small[puncta])) == 3 and (small[puncta] > 0).all()
+    logger.info("✓ Watershed keeps objects thinner than h")
+
     # Test blob detection
     logger.info("\nTesting blob_detection_3d...")
     blobs = blob_detection_3d(
@@ -131,6 +301,77 @@ def test_segmentation():
     if blobs:
         logger.info(f"  First blob: z={blobs[0][0]}, y={blobs[0][1]}, x={blobs[0][2]}, σ={blobs[0][3]:.2f}")
 
+    # A bright sphere is found at its center and scale, with or without the pyramid
+    zz, yy, xx = np.ogrid[:40, :64, :64]
+    sphere = np.exp(-((zz - 20) ** 2 + (yy - 30) ** 2 + (xx - 34) ** 2) / (2 * 4.0 ** 2)).astype(np.float32)
+    for pyramid in (False, True):
+        found = blob_detection_3d(sphere, min_sigma=1.0, max_sigma=16.0, num_sigma=9, threshold=0.05, pyramid=pyramid)
+        assert len(found) == 1, f"pyramid={pyramid}: {found}"
+        z, y, x, sigma = found[0]
+        assert abs(z - 20) <= 1 and abs(y - 30) <= 1 and abs(x - 34) <= 1 and 2.5 <= sigma <= 6.5
+    logger.info("✓ Streaming scale space finds a single sphere with and without the pyramid")
+
+    # Overlap pruning keeps the larger of two overlapping blobs and separate blobs
+    from core.gpu.segmentation import _remove_overlapping_blobs
+    pruned = _remove_overlapping_blobs([(10, 10, 10, 2.0), (10, 10, 12, 4.0), (30, 30, 30, 2.0)], 0.5)
+    assert pruned == [(10, 10, 12, 4.0), (30, 30, 30, 2.0)]
+    many = [(int(z), int(y), int(x), 1.0) for z, y, x in np.random.default_rng(0).integers(0, 2000, (100000, 3))]
+    start = time.perf_counter()
+    _remove_overlapping_blobs(many, 0.5)
+    logger.info(f"✓ Pruned 100k blobs in {time.perf_counter() - start:.2f}s")
+
+    # Mixed sigmas: one large blob must not widen the search among the small ones
+    rng = np.random.default_rng(1)
+    mixed = [
+        (int(z), int(y), int(x), float(s))
+        for (z, y, x), s in zip(rng.integers(0, (100, 2000, 2000), (100000, 3)), rng.uniform(1.0, 2.0, 100000))
+    ] + [(50, 1000, 1000, 50.0)]
+    start = time.perf_counter()
+    kept = _remove_overlapping_blobs(mixed, 0.5)
+    elapsed = time.perf_counter() - start
+    assert kept[0] == (50, 1000, 1000, 50.0) and elapsed < 10.0
+    logger.info(f"✓ Pruned 100k mixed-sigma blobs in {elapsed:.2f}s")
+
+    # Same result as greedy all-pairs suppression
+    from core.gpu.segmentation import _sphere_overlap
+    dense = [
+        (int(z), int(y), int(x), float(s))
+        for (z, y, x), s in zip(rng.integers(0, 40, (400, 3)), rng.choice([1.0, 1.5, 3.0, 12.0], 400))
+    ]
+    expected = []
+    for blob in sorted(dense, key=lambda b: b[3], reverse=True):
+        if all(
+            _sphere_overlap(
+                np.array([np.linalg.norm(np.subtract(blob[:3], other[:3]))]),
+                np.array([other[3] * np.sqrt(3)]), np.array([blob[3] * np.sqrt(3)])
+            )[0] <= 0.5
+            for other in expected
+        ):
+            expected.append(blob)
+    assert _remove_overlapping_blobs(dense, 0.5) == expected
+
+    # U-Net: weights round-trip through a file; tiled prediction matches a single full tile
+    import tempfile
+    from core.gpu import UNet3D, load_unet_model
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "unet.npz"
+        np.savez(path, **UNet3D(base_channels=4, depth=2).weights)
+        model = load_unet_model(path)
+        assert load_unet_model(path) is model
+        # A rewritten file replaces the cached model instead of adding one
+        import os
+        from core.gpu import unet as unet_module
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert load_unet_model(path) is not model
+        assert len([key for key in unet_module._models if key == str(path.resolve())]) == 1
+    small = np.random.default_rng(1).random((8, 24, 24), dtype=np.float32)
+    tiled = model.predict(small, tile_shape=(8, 16, 16), overlap=0.5, batch_size=2)
+    assert tiled.shape == small.shape and 0.0 <= tiled.min() and tiled.max() <= 1.0
+    whole = model.predict(small, tile_shape=(8, 24, 24), batch_size=1)
+    np.testing.assert_allclose(whole, model.forward_batch(small[None, None])[0, 0], atol=1e-5)
+    logger.info(f"✓ U-Net tiled inference: {tiled.shape}, max |tiled - whole| = {np.abs(tiled - whole).max():.3f}")
+
     logger.info("\n✓ Segmentation test passed\n")
     return True
 
@@ -182,7 +423,18 @@ def test_deconvolution():
     logger.info("TEST 5: Deconvolution")
     logger.info("=" * 60)
 
-    from core.gpu import generate_psf, richardson_lucy_deconvolution
+    from core.gpu import (
+        blind_richardson_lucy_deconvolution,
+        convolve_3d,
+        estimate_psf_from_beads,
+        generate_psf,
+        get_fft_backend,
+        psf_sigma,
+        richardson_lucy_deconvolution,
+        tiled_deconvolution,
+        wiener_deconvolution,
+        wiener_deconvolution_multichannel,
+    )
 
     # Create synthetic blurred volume
     volume = np.zeros((30, 64, 64), dtype=np.float32)
@@ -206,6 +458,24 @@ def test_deconvolution():
     blurred = fftconvolve(volume, psf, mode='same')
 
     logger.info(f"Original peaks: {(volume > 0.5).sum()}")
+
+    # The configured FFT backend matches NumPy's transform
+    logger.info("\nTesting get_fft_backend...")
+    backend = get_fft_backend()
+    spectrum = backend.rfftn(volume)
+    assert np.allclose(spectrum, np.fft.rfftn(volume), atol=1e-4)
+    assert np.allclose(backend.irfftn(spectrum, s=volume.shape), volume, atol=1e-6)
+    logger.info(f"✓ {backend.name} backend with {backend.workers} workers")
+    from core.gpu import limit_fft_workers
+    with limit_fft_workers(1):
+        assert np.array_equal(backend.rfftn(volume), spectrum)
+
+    # Every convolution method reproduces fftconvolve
+    logger.info("\nTesting convolve_3d...")
+    for method in ("direct", "separable", "fft"):
+        convolved = convolve_3d(volume, psf, method=method)
+        assert np.allclose(convolved, blurred, atol=1e-6), f"{method} convolution differs"
+    logger.info("✓ Direct, separable and FFT convolution agree")
     logger.info(f"Blurred volume: mean={blurred.mean():.6f}, max={blurred.max():.6f}")
 
     # Test Richardson-Lucy deconvolution (only 3 iterations for speed)
@@ -219,6 +489,96 @@ def test_deconvolution():
     logger.info(f"✓ Deconvolution completed")
     logger.info(f"  Deconvolved: mean={deconvolved.mean():.6f}, max={deconvolved.max():.6f}")
 
+    # In-place buffer rotation matches the textbook update
+    reference = blurred.astype(np.float32)
+    for _ in range(3):
+        ratio = blurred / (fftconvolve(reference, psf, mode="same") + 1e-10)
+        reference = np.maximum(reference * fftconvolve(ratio, psf[::-1, ::-1, ::-1], mode="same"), 0)
+    assert np.allclose(deconvolved, reference, rtol=1e-3, atol=1e-5)
+    logger.info("✓ Matches the reference RL update")
+
+    # Accelerated RL with early stopping reports what it actually did
+    logger.info("\nTesting accelerated richardson_lucy_deconvolution...")
+    accelerated, info = richardson_lucy_deconvolution(
+        blurred,
+        psf,
+        iterations=20,
+        accelerate=True,
+        tolerance=1e-2,
+        return_info=True
+    )
+    assert accelerated.shape == blurred.shape
+    assert info["iterations"] == len(info["metric_trace"]) <= 20
+    assert info["converged"] == (info["metric_trace"][-1] < 1e-2)
+    logger.info(f"✓ Stopped after {info['iterations']} iterations (converged={info['converged']})")
+
+    # Tiled deconvolution matches the whole-volume result
+    logger.info("\nTesting tiled_deconvolution...")
+    whole = richardson_lucy_deconvolution(blurred, psf, iterations=3)
+    tiled = tiled_deconvolution(blurred, psf, tile_shape=(16, 32, 32), iterations=3, max_workers=2)
+    assert tiled.shape == whole.shape
+    seam_error = np.abs(tiled - whole).max() / whole.max()
+    assert seam_error < 1e-2, f"Tile seams differ by {seam_error:.2e}"
+    logger.info(f"✓ Tiled result matches (max relative difference {seam_error:.2e})")
+
+    # Tiled Wiener on a memmap: variance read in slabs, same as the in-memory stats
+    import tempfile
+    from core.gpu.deconvolution import _slab_variance
+    assert np.isclose(_slab_variance(blurred, slab=7), blurred.var(dtype=np.float64), rtol=1e-9)
+    with tempfile.TemporaryDirectory() as tmp:
+        mapped = np.lib.format.open_memmap(Path(tmp) / "stack.npy", mode="w+", dtype=np.float32, shape=blurred.shape)
+        mapped[...] = blurred
+        from_memmap = tiled_deconvolution(mapped, psf, method="wiener", tile_shape=(16, 32, 32), max_workers=2)
+        in_memory = tiled_deconvolution(np.asarray(blurred, dtype=np.float32), psf, method="wiener",
+                                        tile_shape=(16, 32, 32), max_workers=2)
+        assert np.allclose(from_memmap, in_memory, atol=1e-6)
+        del mapped
+    logger.info("✓ Tiled Wiener runs on a memmap input")
+
+    # Blind RL narrows a too-wide initial PSF towards the true one
+    logger.info("\nTesting blind_richardson_lucy_deconvolution...")
+    wide = generate_psf((11, 11, 11), "gaussian", sigma=(3.0, 1.5, 1.5))
+    refined_volume, refined, blind_info = blind_richardson_lucy_deconvolution(
+        blurred, wide, iterations=20, return_info=True
+    )
+    assert refined_volume.shape == blurred.shape and refined.shape == wide.shape
+    assert abs(refined.sum() - 1.0) < 1e-4 and refined.min() >= 0
+    assert blind_info["psf_sigma"][0] < psf_sigma(wide)[0]
+    logger.info(f"✓ PSF sigma {psf_sigma(wide)} -> {tuple(round(s, 2) for s in blind_info['psf_sigma'])}")
+
+    # Batched Wiener matches the per-channel filter
+    logger.info("\nTesting wiener_deconvolution_multichannel...")
+    stack = np.stack([blurred, blurred[::-1]]).astype(np.float32)
+    batched = wiener_deconvolution_multichannel(stack, psf, regularization=1e-3)
+    single = wiener_deconvolution(stack[1], psf, regularization=1e-3)
+    assert batched.shape == stack.shape and batched.dtype == np.float32
+    assert np.allclose(batched[1], single, atol=1e-5)
+    logger.info(f"✓ Batched Wiener matches per-channel result")
+
+    # Estimated (per-stack) regularization reuses the cached OTF
+    from core.gpu import deconvolution as deconv_module
+    deconv_module.clear_wiener_filter_cache()
+    wiener_deconvolution(blurred, psf)
+    wiener_deconvolution(blurred[::-1].copy(), psf)
+    assert len(deconv_module._wiener_otf_cache) == 1
+    logger.info("✓ Wiener OTF cached independently of the regularization")
+
+    # Bead PSF estimation recovers the PSF from beads at sub-voxel positions
+    logger.info("\nTesting estimate_psf_from_beads...")
+    rng = np.random.default_rng(0)
+    beads = np.zeros((40, 96, 96), dtype=np.float32)
+    grid = np.stack(np.meshgrid(np.arange(12, 30, 16), np.arange(12, 90, 16), np.arange(12, 90, 16), indexing="ij"), -1)
+    for center in grid.reshape(-1, 3) + rng.uniform(-0.5, 0.5, (grid.size // 3, 3)):
+        z, y, x = np.indices(beads.shape, dtype=np.float32)
+        beads += 1000 * np.exp(-((z - center[0]) ** 2 / 8.0 + (y - center[1]) ** 2 / 2.0 + (x - center[2]) ** 2 / 2.0))
+    beads = rng.poisson(beads + 50).astype(np.float32)
+    estimated, bead_info = estimate_psf_from_beads(beads, psf_size=(11, 11, 11), return_info=True)
+    expected = generate_psf((11, 11, 11), "gaussian", sigma=(2.0, 1.0, 1.0))
+    psf_error = np.abs(estimated - expected).max() / expected.max()
+    assert bead_info["beads_used"] >= 0.8 * grid.size // 3
+    assert psf_error < 0.1, f"Bead PSF differs by {psf_error:.2e}"
+    logger.info(f"✓ PSF from {bead_info['beads_used']} beads (max relative error {psf_error:.2e})")
+
     logger.info("\n✓ Deconvolution test passed\n")
     return True
 
@@ -236,10 +596,57 @@ def test_analyzer_integration():
     logger.info(f"  GPU device: {analyzer._get_gpu_device()}")
     logger.info(f"  Available algorithms: {list(analyzer.available_algorithms.keys())}")
 
+    # 255 objects fit uint8 labels; volumes must still be reported for all of them
+    import asyncio
+    cubes = np.zeros((4, 64, 64), dtype=np.float32)
+    for i in range(255):
+        y, x = divmod(i, 16)
+        cubes[1:3, 4 * y:4 * y + 2, 4 * x:4 * x + 2] = 1.0
+    result = asyncio.run(analyzer._run_segmentation_3d(
+        cubes, {"smooth": False, "threshold": 0.5, "min_object_size": 1}
+    ))
+    assert result["num_objects"] == 255 and result["object_volumes"] == [8] * 255
+    logger.info("✓ Segmentation reports volumes for 255 objects with uint8 labels")
+
     logger.info("\n✓ Analyzer integration test passed\n")
     return True
 
 
+def test_reduced_precision():
+    """Test reduced-precision outputs against float32."""
+    logger.info("=" * 60)
+    logger.info("TEST 7: Reduced Precision")
+    logger.info("=" * 60)
+
+    from core.gpu.precision import check_precision_accuracy
+
+    for precision in ("float16", "bfloat16"):
+        results = check_precision_accuracy(precision)
+        if not results:
+            logger.info(f"  {precision}: not supported on this device, skipped")
+            continue
+
+        for name, result in results.items():
+            logger.info(f"  {precision} {name}: error={result['error']:.2e} (tol {result['tolerance']:.1e})")
+            assert result["passed"], f"{name} exceeds {precision} tolerance"
+
+    # Saturated uint16 camera data stays in float16 (clipped at its max)
+    from core.gpu.device_manager import DeviceManager
+    from core.gpu.device_volume import host_to_tensor
+    from core.gpu.precision import precision_scope
+    from tinygrad.dtype import dtypes
+    if DeviceManager().supports_dtype(dtypes.float16):
+        counts = np.array([[[0, 1000, 65504, 65535]]], dtype=np.uint16)
+        with precision_scope("float16"):
+            uploaded = host_to_tensor(counts)
+        assert uploaded.dtype == dtypes.float16
+        assert np.array_equal(uploaded.numpy().astype(np.float32), [[[0, 1000, 65504, 65504]]])
+        logger.info("✓ Saturated uint16 volume uploaded as float16")
+
+    logger.info("\n✓ Reduced precision test passed\n")
+    return True
+
+
 def main():
     """Run all tests."""
     logger.info("\n" + "=" * 60)
@@ -253,6 +660,7 @@ def main():
         ("Analysis Functions", test_analysis),
         ("Deconvolution", test_deconvolution),
         ("Analyzer Integration", test_analyzer_integration),
+        ("Reduced Precision", test_reduced_precision),
     ]
 
     results = []